@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
+from datetime import date
 
 from app.crud.attendance import AttendanceCRUD
+from app.services.attendance_stats import AttendanceStatsService
 from app.db.core import get_async_db
-from app.schemas.attendance import StatusOptions
+from app.schemas.attendance import (
+    AttendanceHeatmapCell,
+    AttendanceOut,
+    AttendanceRatesOut,
+    AttendanceScope,
+    AttendanceSummaryOut,
+    ChronicAbsenteeOut,
+    StatusOptions,
+)
 from app.schemas.users import UserTypes
 from app.db.models.attendance import Attendance
-from app.db.models.users import User
-from app.services.auth import get_current_user
-from app.exceptions.basic import NotFound
-from app.dependecies.auth import check_role
+from app.exceptions.basic import NotAllowed, NotFound, NoDataError, InvalidCursor
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
+from app.dependecies.pagination import PageParams, set_next_link
 
 import logging
 
@@ -22,6 +31,7 @@ attendances_router = APIRouter(prefix="/attendances", tags=["attendances"])
 
 @attendances_router.get(
     "/",
+    response_model=list[AttendanceOut],
     dependencies=[
         Depends(
             check_role(
@@ -37,33 +47,191 @@ attendances_router = APIRouter(prefix="/attendances", tags=["attendances"])
 )
 async def get_attendances(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     school_id: int,
     group_id: int | None = None,
     teacher_id: int | None = None,
     status_option: StatusOptions | None = None,
+    schedule_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
 ):
     try:
-        attendances: list[Attendance] = await AttendanceCRUD.get_attendances_id(
+        attendances = await AttendanceCRUD.get_attendances_id(
             db=db,
-            user=user,
+            user=auth.user,
             school_id=school_id,
             group_id=group_id,
             teacher_id=teacher_id,
             status=status_option,
+            schedule_id=schedule_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=page.limit,
+            cursor=page.cursor,
         )
-        return attendances
+        set_next_link(request, response, attendances)
+        return attendances.items
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="attendances not found"
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.exception("Error fetching attendances: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@attendances_router.get(
+    "/stats/",
+    response_model=AttendanceRatesOut,
+    dependencies=[
+        Depends(check_role([UserTypes.admin, UserTypes.principal, UserTypes.teacher]))
+    ],
+)
+async def get_attendance_rates(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    school_id: int,
+    by: AttendanceScope = AttendanceScope.group,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    try:
+        return await AttendanceStatsService.rates(
+            db=db,
+            user=auth.user,
+            school_id=school_id,
+            group_by=by,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.exception("Error computing attendance rates: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@attendances_router.get(
+    "/stats/chronic/",
+    response_model=list[ChronicAbsenteeOut],
+    dependencies=[
+        Depends(check_role([UserTypes.admin, UserTypes.principal, UserTypes.teacher]))
+    ],
+)
+async def get_chronic_absentees(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    school_id: int,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    threshold: Annotated[float, Query(gt=0, le=1)] = 0.1,
+    min_lessons: Annotated[int, Query(ge=1)] = 10,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    try:
+        return await AttendanceStatsService.chronic_absentees(
+            db=db,
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+            threshold=threshold,
+            min_lessons=min_lessons,
+            limit=limit,
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception as e:
+        logger.exception("Error listing chronic absentees: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@attendances_router.get(
+    "/stats/heatmap/",
+    response_model=list[AttendanceHeatmapCell],
+    dependencies=[
+        Depends(check_role([UserTypes.admin, UserTypes.principal, UserTypes.teacher]))
+    ],
+)
+async def get_attendance_heatmap(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    school_id: int,
+    group_id: int | None = None,
+    teacher_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    try:
+        return await AttendanceStatsService.heatmap(
+            db=db,
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            teacher_id=teacher_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception as e:
+        logger.exception("Error computing attendance heatmap: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@attendances_router.get(
+    "/students/{student_id}/summary",
+    response_model=AttendanceSummaryOut,
+    dependencies=[
+        Depends(
+            check_role(
+                [
+                    UserTypes.admin,
+                    UserTypes.principal,
+                    UserTypes.student,
+                    UserTypes.teacher,
+                ]
+            )
+        )
+    ],
+)
+async def get_student_summary(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    student_id: int,
+    day: date | None = None,
+):
+    """Attendance of a student over the term containing ``day`` (default today)."""
+    try:
+        return await AttendanceCRUD.get_student_summary(
+            db=db, user=auth.user, student_id=student_id, day=day
+        )
+    except NotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
     except Exception as e:
-        logger.exception(f"Error fetching attendances: {e}")
+        logger.exception("Error fetching attendance summary %s: %s", student_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @attendances_router.get(
     "/{attendance_id}",
+    response_model=AttendanceOut,
     dependencies=[
         Depends(
             check_role(
@@ -79,12 +247,12 @@ async def get_attendances(
 )
 async def get_attendance(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     attendance_id: int,
 ):
     try:
         attendance = await AttendanceCRUD.get_attendance_id(
-            db=db, user=user, attendance_id=attendance_id
+            db=db, user=auth.user, attendance_id=attendance_id
         )
         if not attendance:
             raise HTTPException(
@@ -92,7 +260,7 @@ async def get_attendance(
             )
         return attendance
     except Exception as e:
-        logger.exception(f"Error fetching attendance {attendance_id}: {e}")
+        logger.exception("Error fetching attendance %s: %s", attendance_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -104,12 +272,12 @@ async def get_attendance(
 )
 async def delete_attendance(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     attendance_id: int,
 ):
     try:
         await AttendanceCRUD.delete_attendance(
-            db=db, user=user, attendance_id=attendance_id
+            db=db, user=auth.user, attendance_id=attendance_id
         )
         return {"detail": f"attendance with id {attendance_id} was deleted"}
     except NotFound:
@@ -121,5 +289,5 @@ async def delete_attendance(
             status_code=400, detail="Cannot delete: related records exist"
         )
     except Exception as e:
-        logger.exception(f"Error deleting attendance {attendance_id}: {e}")
+        logger.exception("Error deleting attendance %s: %s", attendance_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
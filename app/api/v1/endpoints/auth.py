@@ -27,6 +27,7 @@ from app.exceptions.auth import (
     UserExists,
     UserDoesNotExist,
     WrongPassword,
+    HashingBusy,
 )
 from app.dependecies.auth import check_role
 
@@ -48,8 +49,14 @@ async def login(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
     except UserDoesNotExist as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except HashingBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.exception(f"Unexpected error during login: {e}")
+        logger.exception("Unexpected error during login: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -70,8 +77,14 @@ async def registration_teacher(
         )
     except RoleNotAllowed:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    except HashingBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.exception(f"Unexpected error during teacher registration: {e}")
+        logger.exception("Unexpected error during teacher registration: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -92,8 +105,14 @@ async def registration_student(
         )
     except RoleNotAllowed:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    except HashingBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.exception(f"Unexpected error during student registration: {e}")
+        logger.exception("Unexpected error during student registration: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -115,6 +134,12 @@ async def registration_principal(
         )
     except RoleNotAllowed:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    except HashingBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.exception(f"Unexpected error during principal registration: {e}")
+        logger.exception("Unexpected error during principal registration: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+from typing import Annotated, Iterator
+
+from app.db.core import get_sessionmaker
+from app.schemas.exports import ExportFormat
+from app.schemas.users import UserTypes
+from app.services.export_service import ExportService
+from app.services.attendance_archive import read_archived
+from app.exceptions.basic import NotAllowed
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+exports_router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+    dependencies=[Depends(check_role([UserTypes.admin, UserTypes.principal]))],
+)
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def export_response(
+    session_factory,
+    stmt: Select,
+    export_format: ExportFormat,
+    name: str,
+    archived: Iterator[dict] | None = None,
+) -> StreamingResponse:
+    filename = f"{name}.{export_format.value}"
+    return StreamingResponse(
+        ExportService.stream(session_factory, stmt, export_format, archived),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@exports_router.get("/attendances/")
+async def export_attendances(
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    session_factory: Annotated[sessionmaker, Depends(get_sessionmaker)],
+    school_id: int,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.ndjson,
+) -> StreamingResponse:
+    try:
+        stmt = ExportService.attendances(
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        # Closed academic years are read back from their archive files
+        archived = read_archived(
+            school_id=school_id,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return export_response(
+            session_factory, stmt, export_format, f"attendances_{school_id}", archived
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@exports_router.get("/grades/")
+async def export_grades(
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    session_factory: Annotated[sessionmaker, Depends(get_sessionmaker)],
+    school_id: int,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.ndjson,
+) -> StreamingResponse:
+    try:
+        stmt = ExportService.grades(
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return export_response(
+            session_factory, stmt, export_format, f"grades_{school_id}"
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@exports_router.get("/homeworks/")
+async def export_homeworks(
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    session_factory: Annotated[sessionmaker, Depends(get_sessionmaker)],
+    school_id: int,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.ndjson,
+) -> StreamingResponse:
+    try:
+        stmt = ExportService.homeworks(
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return export_response(
+            session_factory, stmt, export_format, f"homeworks_{school_id}"
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
 from app.db.core import get_async_db
-from app.db.models.users import User
-from app.dependecies.auth import get_current_user
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
+from app.schemas.grades import GradeAveragesOut, GradeScope
+from app.schemas.users import UserTypes
 from app.services.grades_service import GradeService
 from app.exceptions.basic import NotAllowed, NotFound, NoDataError
 
@@ -17,12 +18,14 @@ grades_router = APIRouter(prefix="/grades", tags=["grades"])
 
 @grades_router.get("/students/{student_id}/average/")
 async def average_grades_student(
-    db: Annotated[Session, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     student_id: int,
 ) -> dict:
     try:
-        return await GradeService(db=db, user=user, student_id=student_id).average()
+        return await GradeService.student_average(
+            db=db, user=auth.user, student_id=student_id
+        )
     except NotFound as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except NotAllowed as e:
@@ -31,3 +34,53 @@ async def average_grades_student(
         return {"message": "Student doesn't have grades yet"}
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@grades_router.get(
+    "/groups/{group_id}/averages/",
+    response_model=GradeAveragesOut,
+    dependencies=[
+        Depends(check_role([UserTypes.admin, UserTypes.principal, UserTypes.teacher]))
+    ],
+)
+async def average_grades_group(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    group_id: int,
+    by: GradeScope = GradeScope.student,
+) -> dict:
+    try:
+        return await GradeService.averages(
+            db=db, user=auth.user, group_by=by, group_id=group_id
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@grades_router.get(
+    "/schools/{school_id}/averages/",
+    response_model=GradeAveragesOut,
+    dependencies=[
+        Depends(check_role([UserTypes.admin, UserTypes.principal, UserTypes.teacher]))
+    ],
+)
+async def average_grades_school(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    school_id: int,
+    by: GradeScope = GradeScope.group,
+) -> dict:
+    try:
+        return await GradeService.averages(
+            db=db, user=auth.user, group_by=by, school_id=school_id
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
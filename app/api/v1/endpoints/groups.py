@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
@@ -8,10 +8,9 @@ from app.db.core import get_async_db
 from app.schemas.groups import GroupData, GroupDataOut
 from app.schemas.users import UserTypes
 from app.db.models.groups import Group
-from app.exceptions.basic import NotFound
-from app.db.models.users import User
-from app.services.auth import get_current_user
-from app.dependecies.auth import check_role
+from app.exceptions.basic import NotFound, InvalidCursor
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
+from app.dependecies.pagination import PageParams, set_next_link
 
 import logging
 
@@ -29,11 +28,11 @@ groups_router = APIRouter(
 )
 async def add_group(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     data: GroupData,
 ) -> Group:
     try:
-        group = await GroupCRUD.add_group(db=db, user=user, data=data)
+        group = await GroupCRUD.add_group(db=db, user=auth.user, data=data)
         return group
     except IntegrityError:
         raise HTTPException(
@@ -46,18 +45,28 @@ async def add_group(
 @groups_router.get("/schools/{school_id}/", response_model=list[GroupDataOut])
 async def get_groups(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     school_id: int,
 ) -> list[Group]:
     try:
-        groups: list[Group] = await GroupCRUD.get_groups(
-            db=db, user=user, school_id=school_id
+        groups = await GroupCRUD.get_groups(
+            db=db,
+            user=auth.user,
+            school_id=school_id,
+            limit=page.limit,
+            cursor=page.cursor,
         )
-        return groups
+        set_next_link(request, response, groups)
+        return groups.items
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Groups not found"
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -65,11 +74,11 @@ async def get_groups(
 @groups_router.get("/{group_id}/", response_model=GroupDataOut)
 async def get_group(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     group_id: int,
 ) -> Group:
     try:
-        group = await GroupCRUD.get_group(db=db, user=user, group_id=group_id)
+        group = await GroupCRUD.get_group(db=db, user=auth.user, group_id=group_id)
         return group
     except IntegrityError:
         raise HTTPException(
@@ -82,12 +91,12 @@ async def get_group(
 @groups_router.delete("/{group_id}/", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_group(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     group_id: int,
 ) -> None:
     try:
-        await GroupCRUD.delete_group(db=db, user=user, group_id=group_id)
-        logger.debug(f"Group with id {group_id} was deleted")
+        await GroupCRUD.delete_group(db=db, user=auth.user, group_id=group_id)
+        logger.debug("Group with id %s was deleted", group_id)
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
@@ -103,13 +112,13 @@ async def delete_group(
 @groups_router.patch("/{group_id}/", response_model=GroupDataOut)
 async def update_group(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     group_id: int,
     data: GroupData,
 ) -> Group:
     try:
         updated_group = await GroupCRUD.update_group(
-            db=db, user=user, group_id=group_id, data=data
+            db=db, user=auth.user, group_id=group_id, data=data
         )
         return updated_group
     except IntegrityError:
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
+from pydantic import TypeAdapter
 
 from app.crud.homeworks import HomeworkCRUD
 from app.db.core import get_async_db
 from app.schemas.homeworks import HomeworkData, HomeworkDataUpdate, HomeworkDataOut
 from app.db.models.homeworks import Homework
-from app.db.models.users import User
-from app.exceptions.basic import NotFound, NotAllowed
-from app.dependecies.auth import check_role, get_current_user
+from app.exceptions.basic import NotFound, NotAllowed, InvalidCursor
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 from app.schemas.auth import UserTypes
+from app.dependecies.pagination import PageParams, set_next_link
+from app.core.response_cache import homeworks_scope
+from app.dependecies.response_cache import cache_key, cached_response, cache_response
 
 import logging
 
@@ -18,6 +21,8 @@ logger = logging.getLogger(__name__)
 
 homeworks_router = APIRouter(prefix="/homeworks", tags=["homeworks"])
 
+HOMEWORK_LIST = TypeAdapter(list[HomeworkDataOut])
+
 
 @homeworks_router.post(
     "/",
@@ -27,12 +32,12 @@ homeworks_router = APIRouter(prefix="/homeworks", tags=["homeworks"])
 )
 async def add_homework(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     data: HomeworkData,
 ) -> Homework:
     try:
         homework: Homework = await HomeworkCRUD.add_homework(
-            db=db, user=user, data=data
+            db=db, user=auth.user, data=data
         )
         return homework
     except IntegrityError:
@@ -66,24 +71,42 @@ async def add_homework(
 )
 async def get_homeworks(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     school_id: int,
     group_id: int | None = None,
     teacher_id: int | None = None,
 ) -> list[Homework]:
     try:
-        homeworks: list[Homework] = await HomeworkCRUD.get_homeworks_id(
+        # The CRUD always lists the caller's own school unless they are an admin
+        target_school_id = school_id if auth.role == UserTypes.admin else auth.school_id
+        scope = homeworks_scope(target_school_id, group_id)
+        key = cache_key(request, auth)
+        cached, generation = await cached_response(scope, key, response)
+        if cached is not None:
+            return cached
+
+        homeworks = await HomeworkCRUD.get_homeworks_id(
             db=db,
-            user=user,
+            user=auth.user,
             school_id=school_id,
             group_id=group_id,
             teacher_id=teacher_id,
+            limit=page.limit,
+            cursor=page.cursor,
+        )
+        set_next_link(request, response, homeworks)
+        return await cache_response(
+            scope, key, response, homeworks.items, HOMEWORK_LIST, generation
         )
-        return homeworks
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="homeworks not found"
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -91,12 +114,12 @@ async def get_homeworks(
 @homeworks_router.get("/{homework_id}/", response_model=HomeworkDataOut)
 async def get_homework(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     homework_id: int,
 ) -> Homework:
     try:
         homework = await HomeworkCRUD.get_homework_id(
-            db=db, user=user, homework_id=homework_id
+            db=db, user=auth.user, homework_id=homework_id
         )
         return homework
     except Exception:
@@ -106,12 +129,14 @@ async def get_homework(
 @homeworks_router.delete("/{homework_id}/")
 async def delete_homework(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     homework_id: int,
 ) -> None:
     try:
-        await HomeworkCRUD.delete_homework(db=db, user=user, homework_id=homework_id)
-        logger.debug(f"Homework with id {homework_id} was deleted")
+        await HomeworkCRUD.delete_homework(
+            db=db, user=auth.user, homework_id=homework_id
+        )
+        logger.debug("Homework with id %s was deleted", homework_id)
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="homework not found"
@@ -127,13 +152,13 @@ async def delete_homework(
 @homeworks_router.patch("/{homework_id}/", response_model=HomeworkDataOut)
 async def update_homework(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     homework_id: int,
     data: HomeworkDataUpdate,
 ) -> Homework:
     try:
         updated_homework = await HomeworkCRUD.update_homework(
-            db=db, user=user, homework_id=homework_id, data=data
+            db=db, user=auth.user, homework_id=homework_id, data=data
         )
         return updated_homework
     except IntegrityError:
@@ -4,10 +4,9 @@ from typing import Annotated
 
 from app.crud.invitations import get_invitations
 from app.db.core import get_async_db
-from app.db.models.users import User
 from app.db.models.invitations import Invitation
 from app.schemas.invitations import InvitationOut
-from app.dependecies.auth import get_current_user
+from app.dependecies.auth import AuthContext, get_auth_context
 
 import logging
 
@@ -19,10 +18,10 @@ invitations_router = APIRouter(prefix="/invitations", tags=["invitations"])
 @invitations_router.get("/", response_model=InvitationOut)
 async def get_invitations_by_user(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
 ) -> list[Invitation]:
     try:
-        invitations: list[Invitation] = await get_invitations(db=db, user=user)
+        invitations: list[Invitation] = await get_invitations(db=db, user=auth.user)
         return invitations
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
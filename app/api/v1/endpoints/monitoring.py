@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from secrets import compare_digest
+
+from app.core.metrics import metrics_registry
+from app.core.response_cache import response_cache
+from app.core.security import hashing_pool
+from app.core.settings import settings
+from app.db.core import engine
+from app.db.pool import pool_stats
+from app.schemas.users import UserTypes
+from app.dependecies.auth import check_role
+
+monitoring_router = APIRouter(
+    prefix="/monitoring",
+    tags=["monitoring"],
+    dependencies=[Depends(check_role(UserTypes.admin))],
+)
+
+
+async def check_metrics_access(request: Request) -> None:
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if settings.METRICS_TOKEN is not None and not compare_digest(
+        request.headers.get("authorization", "").encode(),
+        f"Bearer {settings.METRICS_TOKEN}".encode(),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Scraped by Prometheus, which does not log in but can send a static token
+metrics_router = APIRouter(
+    tags=["monitoring"], dependencies=[Depends(check_metrics_access)]
+)
+
+
+@monitoring_router.get("/hashing/")
+async def hashing_stats() -> dict:
+    return hashing_pool.stats()
+
+
+@monitoring_router.get("/pool/")
+async def connection_pool_stats() -> dict:
+    return pool_stats(engine)
+
+
+@monitoring_router.get("/cache/")
+async def response_cache_stats() -> dict:
+    return await response_cache.stats()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
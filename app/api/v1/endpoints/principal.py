@@ -5,14 +5,13 @@ from sqlalchemy.exc import IntegrityError
 
 from app.services.principal_service import PrincipalService
 from app.db.core import get_async_db
-from app.db.models.users import User
 from app.db.models.invitations import Invitation
 from app.exceptions.teachers import TeacherAlreadyAssigned
 from app.exceptions.students import StudentAlreadyAssigned
 from app.exceptions.basic import NotFound
 from app.schemas.users import UserTypes
 from app.schemas.invitations import InvitationOut
-from app.dependecies.auth import check_role, get_current_user
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 
 import logging
 
@@ -30,13 +29,13 @@ principal_router = APIRouter(
 )
 async def invite_teacher_to_school_id(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     school_id: int,
     teacher_id: int,
 ) -> Invitation:
     try:
         invitation = await PrincipalService.invite_teacher_to_school_id(
-            db=db, school_id=school_id, user=user, teacher_id=teacher_id
+            db=db, school_id=school_id, user=auth.user, teacher_id=teacher_id
         )
         return invitation
     except NotFound:
@@ -62,13 +61,13 @@ async def invite_teacher_to_school_id(
 )
 async def invite_student_to_school_by_id(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     school_id: int,
     student_id: int,
 ) -> Invitation:
     try:
         invitation = await PrincipalService.invite_student_to_school_id(
-            db=db, user=user, school_id=school_id, student_id=student_id
+            db=db, user=auth.user, school_id=school_id, student_id=student_id
         )
         return invitation
     except NotFound:
@@ -92,13 +91,13 @@ async def invite_student_to_school_by_id(
 @principal_router.post(path="/groups/{group_id}/students/{student_id}/")
 async def assign_student_to_group_by_id(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     group_id: int,
     student_id: int,
 ) -> dict:
     try:
         await PrincipalService.link_student_to_group_id(
-            db=db, user=user, group_id=group_id, student_id=student_id
+            db=db, user=auth.user, group_id=group_id, student_id=student_id
         )
         return {"detail": "Student assigned to group"}
     except NotFound:
@@ -122,13 +121,13 @@ async def assign_student_to_group_by_id(
 @principal_router.post(path="/subjects/{subject_id}/teachers/{teacher_id}/")
 async def assign_teacher_to_subject_by_id(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     subject_id: int,
     teacher_id: int,
 ) -> dict:
     try:
         await PrincipalService.link_teacher_to_subject_id(
-            db=db, user=user, teacher_id=teacher_id, subject_id=subject_id
+            db=db, user=auth.user, teacher_id=teacher_id, subject_id=subject_id
         )
         return {"detail": "Teacher assigned to subject"}
     except Exception:
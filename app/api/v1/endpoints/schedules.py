@@ -1,22 +1,36 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
+from pydantic import TypeAdapter
+from datetime import date
 
 from app.crud.schedules import ScheduleCRUD
+from app.services.timetable import validate_timetable
 from app.db.core import get_async_db
 from app.schemas.schedules import (
+    ScheduleConflictOut,
     ScheduleData,
     ScheduleUpdateData,
     ScheduleDataOut,
+    ScheduleWeekOut,
     Week,
 )
 from app.db.models.schedules import Schedule
-from app.db.models.users import User
-from app.exceptions.basic import NotAllowed, NotFound
-from app.dependecies.auth import check_role
-from app.services.auth import get_current_user
+from app.exceptions.basic import (
+    AlreadyExistsError,
+    NoDataError,
+    NotAllowed,
+    NotFound,
+    InvalidCursor,
+)
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 from app.schemas.users import UserTypes
+from app.dependecies.pagination import PageParams, set_next_link
+from app.dependecies.http_cache import conditional_get
+from app.db.versions import school_version
+from app.core.response_cache import schedules_scope
+from app.dependecies.response_cache import cache_key, cached_response, cache_response
 
 import logging
 
@@ -24,6 +38,9 @@ logger = logging.getLogger(__name__)
 
 schedules_router = APIRouter(prefix="/schedules", tags=["schedules"])
 
+SCHEDULE_LIST = TypeAdapter(list[ScheduleDataOut])
+SCHEDULE_WEEK = TypeAdapter(ScheduleWeekOut)
+
 
 @schedules_router.post(
     "/",
@@ -33,14 +50,18 @@ schedules_router = APIRouter(prefix="/schedules", tags=["schedules"])
 )
 async def add_schedule(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     data: ScheduleData,
 ) -> Schedule:
     try:
-        schedule = await ScheduleCRUD.create_schedule(db=db, user=user, data=data)
+        schedule = await ScheduleCRUD.create_schedule(db=db, user=auth.user, data=data)
         return schedule
     except NotFound:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    except AlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except NotAllowed:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -68,31 +89,67 @@ async def add_schedule(
 )
 async def get_schedules_today_or_day_of_week(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     day_of_week: Annotated[Week | None, Query()] = None,
     school_id: int | None = None,
     group_id: int | None = None,
     teacher_id: int | None = None,
 ) -> list[Schedule]:
     try:
+        scope = None
+        # Other schools are rejected by the CRUD, only validate what it would serve
+        if school_id is None or auth.role == UserTypes.admin:
+            target_school_id = school_id if school_id is not None else auth.school_id
+            day = day_of_week or date.today().strftime("%A").lower()
+            not_modified = conditional_get(
+                request,
+                response,
+                f"schedules.{target_school_id}.{day}",
+                (
+                    await school_version(db, target_school_id)
+                    if target_school_id
+                    else None
+                ),
+            )
+            if not_modified is not None:
+                return not_modified
+
+            scope = schedules_scope(target_school_id, group_id)
+            key = f"{cache_key(request, auth)}&day={day}"
+            cached, generation = await cached_response(scope, key, response)
+            if cached is not None:
+                return cached
+
         if day_of_week:
             schedules = await ScheduleCRUD.get_schedule_day_of_week(
                 db=db,
-                user=user,
+                user=auth.user,
                 day_of_week=day_of_week,
                 school_id=school_id,
                 group_id=group_id,
                 teacher_id=teacher_id,
+                limit=page.limit,
+                cursor=page.cursor,
             )
         else:
             schedules = await ScheduleCRUD.get_schedule_today(
                 db=db,
-                user=user,
+                user=auth.user,
                 school_id=school_id,
                 group_id=group_id,
                 teacher_id=teacher_id,
+                limit=page.limit,
+                cursor=page.cursor,
+            )
+        set_next_link(request, response, schedules)
+        if scope is not None:
+            return await cache_response(
+                scope, key, response, schedules.items, SCHEDULE_LIST, generation
             )
-        return schedules
+        return schedules.items
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="schedules not found"
@@ -102,6 +159,92 @@ async def get_schedules_today_or_day_of_week(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Principal cannot access 'school_id' query parameter",
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@schedules_router.get(
+    "/week/",
+    response_model=ScheduleWeekOut,
+    dependencies=[
+        Depends(
+            check_role(
+                [
+                    UserTypes.admin,
+                    UserTypes.principal,
+                    UserTypes.student,
+                    UserTypes.teacher,
+                ]
+            )
+        )
+    ],
+)
+async def get_schedule_week(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    school_id: int | None = None,
+    group_id: int | None = None,
+    teacher_id: int | None = None,
+) -> dict:
+    try:
+        scope = None
+        target_school_id = school_id if auth.role == UserTypes.admin else auth.school_id
+        if school_id is None or target_school_id == school_id:
+            if target_school_id is not None:
+                not_modified = conditional_get(
+                    request,
+                    response,
+                    f"schedules.{target_school_id}.week",
+                    await school_version(db, target_school_id),
+                )
+                if not_modified is not None:
+                    return not_modified
+            if target_school_id is not None or group_id is not None:
+                scope = schedules_scope(target_school_id, group_id)
+                key = cache_key(request, auth)
+                cached, generation = await cached_response(scope, key, response)
+                if cached is not None:
+                    return cached
+
+        week = await ScheduleCRUD.get_schedule_week(
+            db=db,
+            user=auth.user,
+            school_id=school_id,
+            group_id=group_id,
+            teacher_id=teacher_id,
+        )
+        if scope is not None:
+            return await cache_response(
+                scope, key, response, week, SCHEDULE_WEEK, generation
+            )
+        return week
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@schedules_router.get(
+    "/conflicts/",
+    response_model=list[ScheduleConflictOut],
+    dependencies=[Depends(check_role([UserTypes.admin, UserTypes.principal]))],
+)
+async def get_timetable_conflicts(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    school_id: int,
+) -> list[dict]:
+    """Every pair of lessons double-booking a group or teacher in the school."""
+    try:
+        return await validate_timetable(db=db, user=auth.user, school_id=school_id)
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -132,12 +275,14 @@ async def get_schedule(
 )
 async def delete_schedule(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     schedule_id: int,
 ) -> None:
     try:
-        await ScheduleCRUD.delete_schedule(db=db, user=user, schedule_id=schedule_id)
-        logger.debug(f"Schedule with id {schedule_id} was deleted")
+        await ScheduleCRUD.delete_schedule(
+            db=db, user=auth.user, schedule_id=schedule_id
+        )
+        logger.debug("Schedule with id %s was deleted", schedule_id)
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="schedule not found"
@@ -162,15 +307,19 @@ async def delete_schedule(
 )
 async def update_schedule(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     schedule_id: int,
     data: ScheduleUpdateData,
 ) -> Schedule:
     try:
         updated_schedule = await ScheduleCRUD.update_schedule(
-            db=db, user=user, schedule_id=schedule_id, data=data
+            db=db, user=auth.user, schedule_id=schedule_id, data=data
         )
         return updated_schedule
+    except AlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except IntegrityError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
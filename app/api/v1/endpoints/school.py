@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Request, Response
 from typing import Annotated
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.core import get_async_db
 from app.crud.schools import SchoolCRUD
 from app.schemas.schools import SchoolData, SchoolOut, SchoolUpdate, SchoolUpdateOut
-from app.exceptions.basic import NotFound, NotAllowed
-from app.dependecies.auth import check_role
+from app.exceptions.basic import NotFound, NotAllowed, InvalidCursor
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 from app.schemas.users import UserTypes
-from app.services.auth import get_current_user
-from app.db.models.users import User
 from app.db.models.schools import School
+from app.dependecies.pagination import PageParams, set_next_link
+from app.dependecies.http_cache import conditional_get
+from app.db.versions import school_version, schools_version
+from app.core.response_cache import SCHOOLS_SCOPE
+from app.dependecies.response_cache import cache_key, cached_response, cache_response
 
 import logging
 
@@ -21,6 +25,8 @@ school_router = APIRouter(
     tags=["schools"],
 )
 
+SCHOOL_LIST = TypeAdapter(list[SchoolOut])
+
 
 @school_router.post(
     "/",
@@ -41,7 +47,7 @@ async def add_school(
             detail=f"School name {data.name} is already used",
         )
     except Exception as e:
-        print(str(e))
+        logger.error("School creation failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
         )
@@ -50,11 +56,23 @@ async def add_school(
 @school_router.get("/{school_id}/", response_model=SchoolOut)
 async def get_school(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
     school_id: int,
 ) -> School:
     try:
-        school = await SchoolCRUD.get_school(db=db, user=user, school_id=school_id)
+        if auth.role == UserTypes.admin or auth.school_id == school_id:
+            not_modified = conditional_get(
+                request,
+                response,
+                f"school.{school_id}",
+                await school_version(db, school_id),
+            )
+            if not_modified is not None:
+                return not_modified
+
+        school = await SchoolCRUD.get_school(db=db, user=auth.user, school_id=school_id)
         return school
     except NotFound:
         raise HTTPException(
@@ -101,12 +119,12 @@ async def update_school_data(
 )
 async def delete_school(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     school_id: Annotated[int, Path()],
 ) -> None:
     try:
-        await SchoolCRUD.delete_school(db=db, user=user, school_id=school_id)
-        logger.debug(f"school with id {school_id} was deleted")
+        await SchoolCRUD.delete_school(db=db, user=auth.user, school_id=school_id)
+        logger.debug("school with id %s was deleted", school_id)
         return None
     except NotFound:
         raise HTTPException(
@@ -126,17 +144,41 @@ async def delete_school(
 )
 async def get_schools(
     db: Annotated[AsyncSession, Depends(get_async_db)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     country: str | None = None,
     is_active: bool | None = None,
 ) -> list[School]:
     try:
+        not_modified = conditional_get(
+            request, response, "schools", await schools_version(db)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        key = cache_key(request, auth)
+        cached, generation = await cached_response(SCHOOLS_SCOPE, key, response)
+        if cached is not None:
+            return cached
+
         schools = await SchoolCRUD.get_schools(
-            db=db, country=country, is_active=is_active
+            db=db,
+            country=country,
+            is_active=is_active,
+            limit=page.limit,
+            cursor=page.cursor,
+        )
+        set_next_link(request, response, schools)
+        return await cache_response(
+            SCHOOLS_SCOPE, key, response, schools.items, SCHOOL_LIST, generation
         )
-        return schools
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Schools not found"
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
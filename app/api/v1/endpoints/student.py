@@ -5,8 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.student_service import StudentService
 from app.db.core import get_async_db
 from app.exceptions.basic import NotAllowed, NotFound
-from app.db.models.users import User
-from app.services.auth import get_current_user
+from app.dependecies.auth import AuthContext, get_auth_context
 
 import logging
 
@@ -19,11 +18,11 @@ student_router = APIRouter(prefix="/students", tags=["students"])
 async def accept_invitation_endpoint(
     invitation_id: Annotated[int, Path()],
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
 ) -> dict:
     try:
         return await StudentService.accept_invitation(
-            db=db, user=user, invitation_id=invitation_id
+            db=db, user=auth.user, invitation_id=invitation_id
         )
     except NotFound as e:
         msg = str(e).lower()
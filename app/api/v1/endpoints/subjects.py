@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Request, Response
 from typing import Annotated
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -11,12 +12,15 @@ from app.schemas.subjects import (
     SubjectUpdate,
     SubjectUpdateOut,
 )
-from app.exceptions.basic import NotFound, NotAllowed
-from app.db.models.users import User
+from app.exceptions.basic import NotFound, NotAllowed, InvalidCursor
 from app.db.models.subjects import Subject
-from app.services.auth import get_current_user
-from app.dependecies.auth import check_role
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 from app.schemas.auth import UserTypes
+from app.dependecies.pagination import PageParams, set_next_link
+from app.dependecies.http_cache import conditional_get
+from app.db.versions import school_version
+from app.core.response_cache import subjects_scope
+from app.dependecies.response_cache import cache_key, cached_response, cache_response
 
 import logging
 
@@ -24,6 +28,8 @@ logger = logging.getLogger(__name__)
 
 subject_router = APIRouter(prefix="/subjects", tags=["subjects"])
 
+SUBJECT_LIST = TypeAdapter(list[SubjectDataOut])
+
 
 @subject_router.post(
     "/",
@@ -56,12 +62,12 @@ async def add_subject(
 )
 async def get_subject(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     subject_id: str,
 ) -> Subject:
     try:
         subject = await SubjectCRUD.get_subject_id(
-            db=db, user=user, subject_id=subject_id
+            db=db, user=auth.user, subject_id=subject_id
         )
         return subject
     except NotFound:
@@ -81,13 +87,13 @@ async def get_subject(
 )
 async def update_subject_data(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     subject_id: Annotated[int, Path()],
     data: SubjectUpdate,
 ) -> Subject:
     try:
         updated_subject = await SubjectCRUD.update_subject_data(
-            db=db, user=user, subject_id=subject_id, data=data
+            db=db, user=auth.user, subject_id=subject_id, data=data
         )
         return updated_subject
     except NotFound:
@@ -112,12 +118,12 @@ async def update_subject_data(
 )
 async def delete_subject(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
     subject_id: Annotated[int, Path()],
 ) -> None:
     try:
-        await SubjectCRUD.delete_subject(db=db, user=user, subject_id=subject_id)
-        logger.debug(f"Subject with id {subject_id} was deleted")
+        await SubjectCRUD.delete_subject(db=db, user=auth.user, subject_id=subject_id)
+        logger.debug("Subject with id %s was deleted", subject_id)
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -147,16 +153,49 @@ async def delete_subject(
 )
 async def get_subjects(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     school_id: int,
     name: str | None = None,
 ) -> list[Subject]:
     try:
-        subjects: list[Subject] = await SubjectCRUD.get_subjects(
-            db=db, school_id=school_id, user=user, name=name
+        if auth.role == UserTypes.admin or auth.school_id == school_id:
+            not_modified = conditional_get(
+                request,
+                response,
+                f"subjects.{school_id}",
+                await school_version(db, school_id),
+            )
+            if not_modified is not None:
+                return not_modified
+
+            scope = subjects_scope(school_id)
+            key = cache_key(request, auth)
+            cached, generation = await cached_response(scope, key, response)
+            if cached is not None:
+                return cached
+        else:
+            scope = None
+
+        subjects = await SubjectCRUD.get_subjects(
+            db=db,
+            school_id=school_id,
+            user=auth.user,
+            name=name,
+            limit=page.limit,
+            cursor=page.cursor,
         )
-        return subjects
+        set_next_link(request, response, subjects)
+        if scope is not None:
+            return await cache_response(
+                scope, key, response, subjects.items, SUBJECT_LIST, generation
+            )
+        return subjects.items
     except NotAllowed as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -6,15 +6,22 @@ from sqlalchemy.exc import IntegrityError
 from app.services.teacher_service import TeacherService
 from app.db.core import get_async_db
 from app.exceptions.basic import NoDataError, NotAllowed, NotFound
-from app.schemas.teachers import MarkPresenceData
+from app.schemas.teachers import (
+    AttendanceMarkResult,
+    LessonAttendanceData,
+    MarkPresenceData,
+)
 from app.schemas.attendance import AttendanceOut
-from app.schemas.grades import AssignGradeData, GradeDataOut
+from app.schemas.grades import (
+    AssignGradeData,
+    GradeDataOut,
+    LessonGradeResult,
+    LessonGradesData,
+)
 from app.schemas.users import UserTypes
-from app.db.models.users import User
 from app.db.models.grades import Grade
 from app.db.models.attendance import Attendance
-from app.services.auth import get_current_user
-from app.dependecies.auth import check_role
+from app.dependecies.auth import AuthContext, check_role, get_auth_context
 
 import logging
 
@@ -37,16 +44,16 @@ async def mark_attendance_id(
     teacher_id: int,
     attendance_id: int,
     student_id: int,
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
 ) -> Attendance:
     try:
         attendance = await TeacherService.mark_presence(
             db=db,
-            user=user,
+            user=auth.user,
             student_id=student_id,
             lesson_id=attendance_id,
-            teacher_id=teacher_id,
             status=data.status,
+            lesson_date=data.lesson_date,
         )
         return attendance
     except NotFound as e:
@@ -63,6 +70,36 @@ async def mark_attendance_id(
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No such lesson"
             )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@teacher_router.post(
+    "/lessons/{schedule_id}/attendance/",
+    response_model=list[AttendanceMarkResult],
+)
+async def mark_lesson_attendance(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    data: LessonAttendanceData,
+    schedule_id: int,
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+) -> list[dict]:
+    try:
+        return await TeacherService.mark_lesson_attendance(
+            db=db,
+            user=auth.user,
+            schedule_id=schedule_id,
+            marks=data.marks,
+            lesson_date=data.lesson_date,
+        )
+    except NotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No such lesson"
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -75,15 +112,19 @@ async def assign_grade(
     data: AssignGradeData,
     schedule_id: int,
     student_id: int,
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
 ) -> Grade:
     try:
         grade = await TeacherService.assign_grade(
-            db=db, user=user, schedule_id=schedule_id, student_id=student_id, data=data
+            db=db,
+            user=auth.user,
+            schedule_id=schedule_id,
+            student_id=student_id,
+            data=data,
         )
         return grade
     except NoDataError as e:
-        logger.info(f"No full data passed: {e}")
+        logger.info("No full data passed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Value or grade system is blank",
@@ -98,17 +139,17 @@ async def assign_grade(
                 detail="This grade is already assigned",
             )
         elif '"schedules"' in err_msg:
-            logger.info(f"Schedule with id {data.schedule_id} is not found")
+            logger.info("Schedule with id %s is not found", data.schedule_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No such lesson/schedule"
             )
         elif '"students"' in err_msg:
-            logger.info(f"Student with id {data.student_id} is not found")
+            logger.info("Student with id %s is not found", data.student_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No such Student"
             )
         elif '"teachers"' in err_msg:
-            logger.info(f"Teacher with id {data.marked_by} is not found")
+            logger.info("Teacher with id %s is not found", data.marked_by)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No such teacher"
             )
@@ -116,15 +157,83 @@ async def assign_grade(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@teacher_router.post(
+    "/lessons/{schedule_id}/grades/", response_model=list[LessonGradeResult]
+)
+async def assign_lesson_grades(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    data: LessonGradesData,
+    schedule_id: int,
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+) -> list[dict]:
+    try:
+        return await TeacherService.assign_lesson_grades(
+            db=db, user=auth.user, schedule_id=schedule_id, data=data
+        )
+    except NoDataError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No such lesson"
+        )
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@teacher_router.patch("/grades/{grade_id}/", response_model=GradeDataOut)
+async def update_grade(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    data: AssignGradeData,
+    grade_id: int,
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+) -> Grade:
+    try:
+        return await TeacherService.update_grade(
+            db=db, user=auth.user, grade_id=grade_id, data=data
+        )
+    except NoDataError as e:
+        logger.info("No full data passed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Value or grade system is blank",
+        )
+    except NotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@teacher_router.delete("/grades/{grade_id}/")
+async def delete_grade(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    grade_id: int,
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
+) -> dict:
+    try:
+        return await TeacherService.delete_grade(
+            db=db, user=auth.user, grade_id=grade_id
+        )
+    except NotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except NotAllowed as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @teacher_router.post("/invitations/{invitation_id}/", status_code=200)
 async def accept_invitation_endpoint(
     invitation_id: int,
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    user: Annotated[User, Depends(get_current_user)],
+    auth: Annotated[AuthContext, Depends(get_auth_context)],
 ) -> dict:
     try:
         return await TeacherService.accept_invitation(
-            db=db, user=user, invitation_id=invitation_id
+            db=db, user=auth.user, invitation_id=invitation_id
         )
     except NotFound as e:
         msg = str(e).lower()
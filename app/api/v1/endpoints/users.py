@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Path, status, HTTPException, Depends, Query
+from fastapi import APIRouter, Path, status, HTTPException, Depends, Request, Response
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,8 +6,9 @@ from app.crud.users import UsersCRUD
 from app.db.core import get_async_db
 from app.db.models.users import User
 from app.schemas.users import UserOut, UserTypes
-from app.exceptions.basic import NotFound
+from app.exceptions.basic import NotFound, InvalidCursor
 from app.dependecies.auth import check_role
+from app.dependecies.pagination import PageParams, set_next_link
 
 import logging
 
@@ -21,18 +22,23 @@ users_router = APIRouter(
 @users_router.get("/", response_model=list[UserOut])
 async def get_users(
     db: Annotated[AsyncSession, Depends(get_async_db)],
-    page: Annotated[int | None, Query(ge=1)] = 1,
-    limit: Annotated[int | None, Query(ge=1, le=50)] = 10,
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
     username: str | None = None,
 ) -> list[User]:
     try:
-        return await UsersCRUD.get_users(
-            db=db, page=page, limit=limit, username=username
+        users = await UsersCRUD.get_users(
+            db=db, limit=page.limit, cursor=page.cursor, username=username
         )
+        set_next_link(request, response, users)
+        return users.items
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No such user"
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,7 +52,7 @@ async def delete_user(
 ) -> None:
     try:
         await UsersCRUD.delete_user(db=db, user_id=user_id)
-        logger.debug(f"User with id {user_id} was deleted")
+        logger.debug("User with id %s was deleted", user_id)
     except NotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No such user"
@@ -0,0 +1,224 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.settings import settings
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+
+
+@dataclass
+class RequestStats:
+    """Database work done while serving one request."""
+
+    db_seconds: float = 0.0
+    statements: int = 0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.db_seconds += seconds
+        self.statements += 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attribute every statement run on ``engine`` to the current request."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+@dataclass
+class RouteMetrics:
+    responses: dict[str, int] = field(default_factory=dict)
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    db_time: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    statements: Histogram = field(default_factory=lambda: Histogram(STATEMENT_BUCKETS))
+    slowest_seconds: float | None = None
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Per-route request and database metrics of this process.
+
+    Routes are keyed by their path template, so path parameters do not grow
+    the number of series.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestStats
+    ) -> None:
+        metrics = self.routes.setdefault((method, route), RouteMetrics())
+        metrics.responses[str(status)] = metrics.responses.get(str(status), 0) + 1
+        metrics.latency.observe(seconds)
+        metrics.db_time.observe(stats.db_seconds)
+        metrics.statements.observe(stats.statements)
+        if stats.slowest_statement is not None and (
+            metrics.slowest_seconds is None
+            or stats.slowest_seconds >= metrics.slowest_seconds
+        ):
+            metrics.slowest_seconds = stats.slowest_seconds
+            # SQL text is unbounded and may hold literals, so it goes to the
+            # log rather than into a label
+            logger.info(
+                "Slowest statement of %s %s so far took %.1f ms: %s",
+                method,
+                route,
+                stats.slowest_seconds * 1000,
+                stats.slowest_statement,
+            )
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), metrics in sorted(self.routes.items()):
+            for status, count in sorted(metrics.responses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{_label(route)}",'
+                    f'status="{status}"}} {count}'
+                )
+
+        histograms = (
+            ("http_request_duration_seconds", "latency", "Request latency."),
+            ("http_request_db_seconds", "db_time", "Database time per request."),
+            (
+                "http_request_db_statements",
+                "statements",
+                "SQL statements issued per request.",
+            ),
+        )
+        for name, attr, description in histograms:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+            for (method, route), metrics in sorted(self.routes.items()):
+                labels = f'method="{method}",route="{_label(route)}"'
+                histogram: Histogram = getattr(metrics, attr)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines += [
+                    f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}',
+                    f"{name}_sum{{{labels}}} {histogram.sum}",
+                    f"{name}_count{{{labels}}} {histogram.count}",
+                ]
+
+        lines += [
+            "# HELP http_request_db_slowest_statement_seconds Slowest statement seen per route.",
+            "# TYPE http_request_db_slowest_statement_seconds gauge",
+        ]
+        for (method, route), metrics in sorted(self.routes.items()):
+            if metrics.slowest_seconds is None:
+                continue
+            lines.append(
+                f'http_request_db_slowest_statement_seconds{{method="{method}",'
+                f'route="{_label(route)}"}} {metrics.slowest_seconds}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def server_timing(seconds: float, stats: RequestStats) -> str:
+    return (
+        f"app;dur={seconds * 1000:.1f}, "
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} statements", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}"
+    )
+
+
+class MetricsMiddleware:
+    """Times each request and the SQL it issues.
+
+    The totals go to ``metrics_registry`` once the response has been sent and
+    to a ``Server-Timing`` header. The header is written with the response
+    start, so statements run while a streamed body is produced only show up
+    in the registry.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    value = server_timing(time.perf_counter() - started, stats)
+                    headers.append((b"server-timing", value.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            metrics_registry.observe(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - started,
+                stats,
+            )
@@ -0,0 +1,235 @@
+from typing import Protocol
+
+from app.core.cache import TTLCache
+from app.core.settings import settings
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    async def generation(self, scope: str) -> int: ...
+
+    async def get(self, scope: str, key: str, generation: int) -> bytes | None: ...
+
+    async def set(
+        self, scope: str, key: str, value: bytes, generation: int
+    ) -> None: ...
+
+    async def invalidate(self, *scopes: str) -> None: ...
+
+    async def stats(self) -> dict: ...
+
+
+class MemoryBackend:
+    """Per-process LRU+TTL backend.
+
+    Invalidating a scope bumps its generation; entries of older generations
+    are never read again and age out through the LRU and the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generations: dict[str, int] = {}
+
+    async def generation(self, scope: str) -> int:
+        return self.generations.get(scope, 0)
+
+    async def get(self, scope: str, key: str, generation: int) -> bytes | None:
+        return self.entries.get((scope, generation, key))
+
+    async def set(self, scope: str, key: str, value: bytes, generation: int) -> None:
+        # Built before an invalidation that happened meanwhile, it is already stale
+        if generation != self.generations.get(scope, 0):
+            return
+        self.entries.set((scope, generation, key), value)
+
+    async def invalidate(self, *scopes: str) -> None:
+        for scope in scopes:
+            self.generations[scope] = self.generations.get(scope, 0) + 1
+
+    async def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": len(self.entries),
+            "evictions": self.entries.evictions,
+        }
+
+
+class RedisBackend:
+    """Shared backend for any Redis-compatible server.
+
+    Each scope has a generation counter and one hash per generation, so
+    invalidation is an ``INCR`` and a ``DEL`` of the old hash. A body built
+    before an invalidation is written to the hash of the generation it was
+    read under, which nobody reads any more; it expires ``ttl`` seconds
+    after the last write like the rest of that hash.
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "response-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _name(self, scope: str, generation: int) -> str:
+        return f"{self.prefix}{scope}:{generation}"
+
+    async def generation(self, scope: str) -> int:
+        return int(await self.client.get(f"{self.prefix}generation:{scope}") or 0)
+
+    async def get(self, scope: str, key: str, generation: int) -> bytes | None:
+        return await self.client.hget(self._name(scope, generation), key)
+
+    async def set(self, scope: str, key: str, value: bytes, generation: int) -> None:
+        if generation != await self.generation(scope):
+            return
+        name = self._name(scope, generation)
+        await self.client.hset(name, key, value)
+        await self.client.expire(name, self.ttl)
+
+    async def invalidate(self, *scopes: str) -> None:
+        for scope in scopes:
+            generation = await self.client.incr(f"{self.prefix}generation:{scope}")
+            await self.client.delete(self._name(scope, generation - 1))
+
+    async def stats(self) -> dict:
+        info = await self.client.info("stats")
+        return {"backend": "redis", "evictions": info.get("evicted_keys")}
+
+
+class ResponseCache:
+    """Serialized responses of read endpoints, grouped into invalidation scopes.
+
+    A failing backend is treated as a miss so the cache can never take a
+    request down with it.
+    """
+
+    def __init__(self, backend: CacheBackend | None):
+        self.configure(backend)
+
+    def configure(self, backend: CacheBackend | None) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def generation(self, scope: str) -> int | None:
+        """Read before the data a response is built from, and passed to ``set``."""
+        if self.backend is None:
+            return None
+        try:
+            return await self.backend.generation(scope)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Response cache read failed: %s", e)
+            return None
+
+    async def get(
+        self, scope: str, key: str, generation: int | None = None
+    ) -> bytes | None:
+        if self.backend is None:
+            return None
+        try:
+            if generation is None:
+                generation = await self.backend.generation(scope)
+            value = await self.backend.get(scope, key, generation)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Response cache read failed: %s", e)
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(
+        self, scope: str, key: str, value: bytes, generation: int | None = None
+    ) -> None:
+        """Store ``value`` unless ``scope`` was invalidated since ``generation``."""
+        if self.backend is None:
+            return
+        try:
+            if generation is None:
+                generation = await self.backend.generation(scope)
+            await self.backend.set(scope, key, value, generation)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Response cache write failed: %s", e)
+
+    async def invalidate(self, *scopes: str) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.invalidate(*scopes)
+            self.invalidations += len(scopes)
+        except Exception as e:
+            self.errors += 1
+            logger.error("Response cache invalidation of %s failed: %s", scopes, e)
+
+    async def stats(self) -> dict:
+        if self.backend is None:
+            return {"backend": None}
+        lookups = self.hits + self.misses
+        return {
+            **await self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+def create_backend() -> CacheBackend | None:
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if settings.RESPONSE_CACHE_URL:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL requires the redis package")
+        return RedisBackend(
+            redis.from_url(settings.RESPONSE_CACHE_URL),
+            ttl=settings.RESPONSE_CACHE_TTL,
+        )
+    return MemoryBackend(
+        maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL
+    )
+
+
+def schedules_scope(school_id: int | None, group_id: int | None = None) -> str:
+    if group_id is not None:
+        return f"schedules:group:{group_id}"
+    return f"schedules:school:{school_id}"
+
+
+def subjects_scope(school_id: int | None) -> str:
+    return f"subjects:school:{school_id}"
+
+
+def homeworks_scope(school_id: int | None, group_id: int | None = None) -> str:
+    if group_id is not None:
+        return f"homeworks:group:{group_id}"
+    return f"homeworks:school:{school_id}"
+
+
+def named_scopes(school_ids, group_ids=()) -> list[str]:
+    """Schedule and homework scopes of schools and groups.
+
+    Their responses show subject, group and teacher names, renaming any of
+    these drops them.
+    """
+    scopes = []
+    for school_id in set(school_ids):
+        scopes += [schedules_scope(school_id), homeworks_scope(school_id)]
+    for group_id in set(group_ids):
+        scopes += [schedules_scope(None, group_id), homeworks_scope(None, group_id)]
+    return scopes
+
+
+SCHOOLS_SCOPE = "schools"
+
+response_cache = ResponseCache(create_backend())
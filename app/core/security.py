@@ -1,12 +1,63 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from app.core.settings import settings
-from app.exceptions.auth import WrongPassword
+from app.exceptions.auth import WrongPassword, HashingBusy
+
+import asyncio
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class HashingPool:
+    """Bounded executor for bcrypt so hashing never blocks the event loop.
+
+    At most ``max_pending`` calls may be running or queued at once; further
+    calls fail fast with ``HashingBusy`` instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingBusy("Password hashing queue is full")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "running": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_pool = HashingPool(
+    workers=settings.HASH_POOL_SIZE, max_pending=settings.HASH_QUEUE_LIMIT
+)
+
+
 def hash_password(password) -> str:
     hashed_password = pwd_context.hash(password)
     return hashed_password
@@ -20,12 +71,20 @@ def verify_password(plain, hashed) -> bool:
         raise WrongPassword("Wrong password")
 
 
+async def hash_password_async(password) -> str:
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain, hashed) -> bool:
+    return await hashing_pool.run(verify_password, plain, hashed)
+
+
 def create_access_token(data: dict, expiration: timedelta | None = None) -> str:
     data_copy = data.copy()
     if expiration == None:
         expire = datetime.now(tz=timezone.utc) + timedelta(minutes=30)
     else:
         expire = datetime.now(tz=timezone.utc) + expiration
-    data_copy.update({"exp": expire})
+    data_copy.update({"exp": expire, "iat": datetime.now(tz=timezone.utc)})
     encoded_token = jwt.encode(data_copy, settings.SECRET_KEY, algorithm="HS256")
     return encoded_token
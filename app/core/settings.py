@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from datetime import time
 
 
 class Settings(BaseSettings):
@@ -11,6 +12,64 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Set both to 0 behind PgBouncer in transaction pooling mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    # Safe (GET) requests are served from the replica when it is configured
+    DB_REPLICA_URL: str | None = None
+    DB_REPLICA_READ_YOUR_WRITES: float = 5
+    DB_REPLICA_MAX_LAG: float = 5
+
+    ROLL_JOB_ENABLED: bool = True
+    ROLL_JOB_TIME: time = time(0, 5)
+    ROLL_JOB_DAYS_AHEAD: int = 1
+
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_SIZE: int = 10_000
+
+    HASH_POOL_SIZE: int = 4
+    HASH_QUEUE_LIMIT: int = 64
+
+    # Clients revalidate schedules, subjects and schools after this many seconds
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    # Server-side cache of hot read endpoints; a redis:// URL shares it between workers
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_URL: str | None = None
+    RESPONSE_CACHE_TTL: int = 60
+    RESPONSE_CACHE_SIZE: int = 10_000
+
+    # Per-route latency and SQL metrics at /metrics; Server-Timing exposes them to clients.
+    # Scrapers send METRICS_TOKEN as a bearer token when it is set
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str | None = None
+    SERVER_TIMING_ENABLED: bool = True
+
+    LOG_LEVEL: str = "INFO"
+    # Per-module overrides, e.g. "app.crud=WARNING,sqlalchemy.engine=INFO"
+    LOG_LEVELS: str = ""
+    LOG_JSON: bool = True
+    LOG_FILE: str | None = "app/logging/E_diary.log"
+    LOG_FILE_MAX_BYTES: int = 10_000_000
+    LOG_FILE_BACKUP_COUNT: int = 5
+    # Keep one in this many info records per call site of the sampled loggers
+    LOG_SAMPLE_EVERY: int = 1
+    LOG_SAMPLED_LOGGERS: str = "app.crud,app.services,app.api"
+
+    # PostgreSQL keeps attendances in monthly partitions created this far ahead
+    ATTENDANCE_PARTITION_MONTHS_AHEAD: int = 3
+    # Closed academic years are moved out of the database into gzipped NDJSON here
+    ATTENDANCE_ARCHIVE_DIR: str = "archive/attendances"
+    ACADEMIC_YEAR_START_MONTH: int = 9
+    # Months terms start in; attendance bitmaps are kept per student and term
+    TERM_START_MONTHS: list[int] = [9, 2]
+
     model_config = ConfigDict(env_file=".env")
 
 
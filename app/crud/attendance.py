@@ -1,14 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from datetime import date
 
 from app.db.models.attendance import Attendance
-from app.db.models.types import Teacher, Student, Principal
+from app.db.models.types import Student
 from app.db.models.users import User
 from app.db.models.schedules import Schedule
+from app.db.loaders import get_loaded, loader_options
 from app.exceptions.basic import NotAllowed, NotFound
-from app.schemas.attendance import StatusOptions
+from app.schemas.attendance import AttendanceOut, StatusOptions
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
 from app.schemas.users import UserTypes
+from app.services import attendance_bitmap
 
 import logging
 
@@ -21,28 +25,34 @@ class AttendanceCRUD:
         try:
             attendance: Attendance = await db.get(Attendance, attendance_id)
             if not attendance:
-                logger.info(f"attendance with id {attendance_id} is not found")
+                logger.info("attendance with id %s is not found", attendance_id)
                 raise NotFound(f"attendance with id {attendance_id} not found")
 
             schedule: Schedule = await db.get(Schedule, attendance.schedule_id)
 
             if user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != schedule.school_id:
+                if user.school_id != schedule.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to delete attendance with id {attendance_id}, but from another school"
+                        "User with id %s tried to delete attendance with id %s, but from another school",
+                        user.id,
+                        attendance_id,
                     )
                     raise NotAllowed("Cannot delete from other schools")
 
             await db.delete(attendance)
+            await attendance_bitmap.apply_marks(
+                db,
+                [(attendance.student_id, schedule.id, attendance.lesson_date, None)],
+                {schedule.id: schedule.start_time},
+            )
             await db.commit()
-            logger.info(f"attendance with id {attendance_id} was deleted")
+            logger.info("attendance with id %s was deleted", attendance_id)
             return attendance
         except SQLAlchemyError as e:
-            logger.error(f"Error in db: {e}")
+            logger.error("Error in db: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -53,103 +63,131 @@ class AttendanceCRUD:
         teacher_id: int | None = None,
         group_id: int | None = None,
         status: StatusOptions | None = None,
-    ):
+        schedule_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
-            query = select(Attendance)
-
-            # Get user type instance
-            if user.type == UserTypes.teacher:
-                user_type: Teacher = await db.get(Teacher, user.id)
-            elif user.type == UserTypes.student:
-                user_type: Student = await db.get(Student, user.id)
-            elif user.type == UserTypes.principal:
-                user_type: Principal = await db.get(Principal, user.id)
-
             # Non-admin users restricted to their school
             if user.type != UserTypes.admin:
-                if user_type.school_id != school_id:
+                if user.school_id != school_id:
                     logger.warning(
-                        f"User {user.id} from school {user_type.school_id} tried to access data from school {school_id}. Not allowed"
+                        "User %s from school %s tried to access data from school %s. Not allowed",
+                        user.id,
+                        user.school_id,
+                        school_id,
                     )
                     raise NotAllowed("Cannot get attendance from other schools")
 
-                # Get students in the school
-                result = await db.execute(
-                    select(Student).where(Student.school_id == school_id)
-                )
-                students = result.scalars().all()
-                ids = [student.id for student in students]
-                query = query.where(Attendance.student_id.in_(ids))
-            else:
-                # Admin: optional filtering by school
-                result = await db.execute(
-                    select(Student).where(Student.school_id == school_id)
-                )
-                students = result.scalars().all()
-                ids = [student.id for student in students]
-                query = query.where(Attendance.student_id.in_(ids))
+            query = (
+                select(Attendance)
+                .options(*loader_options(Attendance, AttendanceOut.loader_profile))
+                .join(Schedule, Schedule.id == Attendance.schedule_id)
+                .where(Schedule.school_id == school_id)
+            )
 
             if teacher_id is not None:
                 query = query.where(Attendance.marked_by == teacher_id)
 
             if group_id is not None:
-                result = await db.execute(
-                    select(Student).where(
-                        Student.school_id == school_id, Student.group_id == group_id
-                    )
-                )
-                students = result.scalars().all()
-                ids = [student.id for student in students]
-                query = query.where(Attendance.student_id.in_(ids))
+                # students table only, without the joined users row
+                students = Student.__table__
+                query = query.join(
+                    students, students.c.id == Attendance.student_id
+                ).where(students.c.group_id == group_id)
+
+            if schedule_id is not None:
+                query = query.where(Attendance.schedule_id == schedule_id)
+
+            if date_from is not None:
+                query = query.where(Attendance.lesson_date >= date_from)
+
+            if date_to is not None:
+                query = query.where(Attendance.lesson_date <= date_to)
 
             if status is not None:
                 query = query.where(Attendance.status == status)
 
-            result = await db.execute(query)
-            return result.scalars().all()
+            return await paginate(db, query, (Attendance.id,), limit, cursor)
         except SQLAlchemyError as e:
-            logger.error(f"Error in db: {e}")
+            logger.error("Error in db: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
     async def get_attendance_id(db: AsyncSession, user: User, attendance_id: int):
         try:
-            attendance: Attendance = await db.get(Attendance, attendance_id)
+            attendance: Attendance = await get_loaded(
+                db, Attendance, attendance_id, AttendanceOut.loader_profile
+            )
             if not attendance:
                 raise NotFound(f"Attendance {attendance_id} not found")
 
             schedule: Schedule = await db.get(Schedule, attendance.schedule_id)
 
             if user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != schedule.school_id:
+                if user.school_id != schedule.school_id:
                     logger.warning(
-                        f"User {user.id} tried to access attendance {attendance_id}. Not allowed"
+                        "User %s tried to access attendance %s. Not allowed",
+                        user.id,
+                        attendance_id,
                     )
                     raise NotAllowed("Cannot access other schools")
             elif user.type == UserTypes.teacher:
-                teacher: Teacher = await db.get(Teacher, user.id)
-                if attendance.marked_by != teacher.id:
+                if attendance.marked_by != user.id:
                     logger.warning(
-                        f"User {user.id} tried to access attendance {attendance_id}. Not allowed"
+                        "User %s tried to access attendance %s. Not allowed",
+                        user.id,
+                        attendance_id,
                     )
                     raise NotAllowed(
                         "Cannot access attendance from other teachers or schools"
                     )
             elif user.type == UserTypes.student:
-                student: Student = await db.get(Student, user.id)
-                if attendance.student_id != student.id:
+                if attendance.student_id != user.id:
                     raise NotAllowed(
                         "Cannot access attendance for other students or schools"
                     )
 
             return attendance
         except SQLAlchemyError as e:
-            logger.error(f"Error in db: {e}")
+            logger.error("Error in db: %s", e)
+            raise
+        except Exception as e:
+            logger.exception("Unexpected error occurred: %s", e)
+            raise
+
+    @staticmethod
+    async def get_student_summary(
+        db: AsyncSession, user: User, student_id: int, day: date | None = None
+    ) -> dict:
+        try:
+            student: Student | None = await db.get(Student, student_id)
+            if student is None:
+                logger.info("Student with id %s is not found", student_id)
+                raise NotFound(f"Student with id {student_id} not found")
+
+            if user.type == UserTypes.student:
+                if user.id != student_id:
+                    raise NotAllowed("Cannot access attendance for other students")
+            elif user.type != UserTypes.admin:
+                if user.school_id != student.school_id:
+                    logger.warning(
+                        "User %s tried to access attendance of student %s. Not allowed",
+                        user.id,
+                        student_id,
+                    )
+                    raise NotAllowed("Cannot access other schools")
+
+            term = await attendance_bitmap.student_term(db, student_id, day)
+            return {"student_id": student_id, **term.summary()}
+        except SQLAlchemyError as e:
+            logger.error("Error in db: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
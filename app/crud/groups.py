@@ -4,9 +4,14 @@ from sqlalchemy import select
 
 from app.schemas.groups import GroupData
 from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
 from app.exceptions.basic import NotFound, NotAllowed
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.db.versions import bump_school_version
+from app.core.response_cache import named_scopes, response_cache
 from app.db.models.users import User
-from app.db.models.types import Principal
+from app.services.auth import invalidate_principal
+from app.services import attendance_bitmap, grade_summary
 from app.schemas.users import UserTypes
 
 import logging
@@ -19,10 +24,11 @@ class GroupCRUD:
     async def add_group(db: AsyncSession, user: User, data: GroupData):
         try:
             if user.type == UserTypes.principal:
-                principal: Principal | None = await db.get(Principal, user.id)
-                if not principal or principal.school_id != data.school_id:
+                if user.school_id != data.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to create group in school with id {data.school_id}. Not allowed"
+                        "User with id %s tried to create group in school with id %s. Not allowed",
+                        user.id,
+                        data.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
@@ -41,7 +47,7 @@ class GroupCRUD:
             await db.rollback()
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             await db.rollback()
             raise
 
@@ -50,25 +56,40 @@ class GroupCRUD:
         try:
             group: Group | None = await db.get(Group, group_id)
             if not group:
-                logger.info(f"Group with id {group_id} not found")
+                logger.info("Group with id %s not found", group_id)
                 raise NotFound("Group not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal | None = await db.get(Principal, user.id)
-                if not principal or principal.school_id != group.school_id:
+                if user.school_id != group.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to delete group in school with id {group.school_id}. Not allowed"
+                        "User with id %s tried to delete group in school with id %s. Not allowed",
+                        user.id,
+                        group.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
+            # Its lessons, their attendance and grades go with it through ON DELETE CASCADE
+            result = await db.execute(
+                select(Schedule.id, Schedule.start_time).where(
+                    Schedule.group_id == group.id
+                )
+            )
+            for schedule_id, start_time in result.all():
+                await attendance_bitmap.reslot_schedule(db, schedule_id, start_time)
+            await grade_summary.remove_grades(db, Schedule.group_id == group.id)
             await db.delete(group)
+            await bump_school_version(db, group.school_id)
             await db.commit()
+            invalidate_principal()
+            await response_cache.invalidate(
+                *named_scopes([group.school_id], [group.id])
+            )
         except IntegrityError as e:
-            logger.error(f"Integrity error: {e}")
+            logger.error("Integrity error: %s", e)
             await db.rollback()
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             await db.rollback()
             raise
 
@@ -79,52 +100,71 @@ class GroupCRUD:
         try:
             group: Group | None = await db.get(Group, group_id)
             if not group:
-                logger.info(f"Group with id {group_id} not found")
+                logger.info("Group with id %s not found", group_id)
                 raise NotFound("Group not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal | None = await db.get(Principal, user.id)
-                if not principal or principal.school_id != group.school_id:
+                if user.school_id != group.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to update group in school with id {group.school_id}. Not allowed"
+                        "User with id %s tried to update group in school with id %s. Not allowed",
+                        user.id,
+                        group.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
+            previous_school_id = group.school_id
             for key, value in data.model_dump().items():
                 setattr(group, key, value)
 
+            # Schedule and homework responses show the group label
+            await bump_school_version(db, previous_school_id, group.school_id)
             await db.commit()
             await db.refresh(group)
+            await response_cache.invalidate(
+                *named_scopes([previous_school_id, group.school_id], [group.id])
+            )
             return group
         except IntegrityError as e:
-            logger.error(f"Integrity error: {e}")
+            logger.error("Integrity error: %s", e)
             await db.rollback()
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             await db.rollback()
             raise
 
     @staticmethod
-    async def get_groups(db: AsyncSession, user: User, school_id: int):
+    async def get_groups(
+        db: AsyncSession,
+        user: User,
+        school_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
-            result = await db.execute(select(Group).where(Group.school_id == school_id))
-            groups = result.scalars().all()
-            if not groups:
-                logger.info(f"Groups with school id {school_id} not found")
+            groups = await paginate(
+                db,
+                select(Group).where(Group.school_id == school_id),
+                (Group.id,),
+                limit,
+                cursor,
+            )
+            if not groups.items:
+                logger.info("Groups with school id %s not found", school_id)
                 raise NotFound("Groups not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal | None = await db.get(Principal, user.id)
-                if not principal or principal.school_id != school_id:
+                if user.school_id != school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to get groups in school with id {school_id}. Not allowed"
+                        "User with id %s tried to get groups in school with id %s. Not allowed",
+                        user.id,
+                        school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
             return groups
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -132,18 +172,19 @@ class GroupCRUD:
         try:
             group: Group | None = await db.get(Group, group_id)
             if not group:
-                logger.info(f"Group with id {group_id} not found")
+                logger.info("Group with id %s not found", group_id)
                 raise NotFound("Group not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal | None = await db.get(Principal, user.id)
-                if not principal or principal.school_id != group.school_id:
+                if user.school_id != group.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to get group in school with id {group.school_id}. Not allowed"
+                        "User with id %s tried to get group in school with id %s. Not allowed",
+                        user.id,
+                        group.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
             return group
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
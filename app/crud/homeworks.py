@@ -3,13 +3,15 @@ from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from datetime import datetime
 
-from app.schemas.homeworks import HomeworkData, HomeworkDataUpdate
+from app.schemas.homeworks import HomeworkData, HomeworkDataOut, HomeworkDataUpdate
 from app.schemas.users import UserTypes
 from app.db.models.homeworks import Homework
 from app.db.models.groups import Group
-from app.db.models.types import Teacher, Student, Principal
 from app.db.models.users import User
+from app.db.loaders import get_loaded, loader_options, reload
 from app.exceptions.basic import NotAllowed, NotFound
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.core.response_cache import homeworks_scope, response_cache
 
 import logging
 
@@ -21,11 +23,10 @@ class HomeworkCRUD:
     async def add_homework(db: AsyncSession, user: User, data: HomeworkData):
         try:
             group = await db.get(Group, data.group_id)
-            teacher = await db.get(Teacher, user.id)
 
             if group.school_id != data.school_id:
                 raise NotAllowed("Not allowed to give homework to other schools")
-            if teacher.school_id != data.school_id:
+            if user.school_id != data.school_id:
                 raise NotAllowed("Not allowed to give homework to other schools")
 
             homework = Homework()
@@ -41,14 +42,18 @@ class HomeworkCRUD:
 
             db.add(homework)
             await db.commit()
-            await db.refresh(homework)
+            homework = await reload(db, homework, HomeworkDataOut.loader_profile)
+            await response_cache.invalidate(
+                homeworks_scope(homework.school_id),
+                homeworks_scope(homework.school_id, homework.group_id),
+            )
             return homework
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
 
     @staticmethod
@@ -59,22 +64,24 @@ class HomeworkCRUD:
                 raise NotFound(f"Homework with id {homework_id} not found")
 
             if user.type == UserTypes.teacher:
-                teacher = await db.get(Teacher, user.id)
-                if teacher.school_id != homework.school_id:
+                if user.school_id != homework.school_id:
                     raise NotAllowed("Cannot access other schools")
             elif user.type == UserTypes.principal:
-                principal = await db.get(Principal, user.id)
-                if principal.school_id != homework.school_id:
+                if user.school_id != homework.school_id:
                     raise NotAllowed("Cannot access other schools")
 
             await db.delete(homework)
             await db.commit()
+            await response_cache.invalidate(
+                homeworks_scope(homework.school_id),
+                homeworks_scope(homework.school_id, homework.group_id),
+            )
             return homework
         except SQLAlchemyError as e:
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
 
     @staticmethod
@@ -87,13 +94,13 @@ class HomeworkCRUD:
                 raise NotFound("Homework not found")
 
             group = await db.get(Group, data.group_id)
-            teacher = await db.get(Teacher, user.id)
 
             if group.school_id != homework.school_id:
                 raise NotAllowed("Not allowed to give homework in another school")
-            if teacher.school_id != homework.school_id:
+            if user.school_id != homework.school_id:
                 raise NotAllowed("Not allowed to give homework in another school")
 
+            previous_group_id = homework.group_id
             data_dict = data.model_dump(exclude={"due_date"})
             if isinstance(data.due_date, str):
                 parsed_dt = datetime.fromisoformat(data.due_date)
@@ -106,17 +113,22 @@ class HomeworkCRUD:
 
             db.add(homework)
             await db.commit()
-            await db.refresh(homework)
+            homework = await reload(db, homework, HomeworkDataOut.loader_profile)
+            await response_cache.invalidate(
+                homeworks_scope(homework.school_id),
+                homeworks_scope(homework.school_id, previous_group_id),
+                homeworks_scope(homework.school_id, homework.group_id),
+            )
             return homework
         except IntegrityError as e:
-            logger.error(f"Integrity error: {e}")
+            logger.error("Integrity error: %s", e)
             raise
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
 
     @staticmethod
@@ -126,19 +138,20 @@ class HomeworkCRUD:
         school_id: int,
         teacher_id: int | None = None,
         group_id: int | None = None,
-    ):
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
-            stmt = select(Homework)
+            stmt = select(Homework).options(
+                *loader_options(Homework, HomeworkDataOut.loader_profile)
+            )
 
             if user.type == UserTypes.principal:
-                principal = await db.get(Principal, user.id)
-                stmt = stmt.filter(Homework.school_id == principal.school_id)
+                stmt = stmt.filter(Homework.school_id == user.school_id)
             elif user.type == UserTypes.teacher:
-                teacher = await db.get(Teacher, user.id)
-                stmt = stmt.filter(Homework.school_id == teacher.school_id)
+                stmt = stmt.filter(Homework.school_id == user.school_id)
             elif user.type == UserTypes.student:
-                student = await db.get(Student, user.id)
-                stmt = stmt.filter(Homework.school_id == student.school_id)
+                stmt = stmt.filter(Homework.school_id == user.school_id)
             else:
                 stmt = stmt.filter(Homework.school_id == school_id)
 
@@ -147,39 +160,37 @@ class HomeworkCRUD:
             if group_id is not None:
                 stmt = stmt.filter(Homework.group_id == group_id)
 
-            result = await db.execute(stmt)
-            return result.scalars().all()
+            return await paginate(db, stmt, (Homework.id,), limit, cursor)
         except SQLAlchemyError as e:
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
 
     @staticmethod
     async def get_homework_id(db: AsyncSession, user: User, homework_id: int):
         try:
-            homework = await db.get(Homework, homework_id)
+            homework = await get_loaded(
+                db, Homework, homework_id, HomeworkDataOut.loader_profile
+            )
             if not homework:
                 raise NotFound("Homework not found")
 
             if user.type == UserTypes.principal:
-                principal = await db.get(Principal, user.id)
-                if homework.school_id != principal.school_id:
+                if homework.school_id != user.school_id:
                     raise NotAllowed("Cannot access other schools")
             elif user.type == UserTypes.teacher:
-                teacher = await db.get(Teacher, user.id)
-                if homework.school_id != teacher.school_id:
+                if homework.school_id != user.school_id:
                     raise NotAllowed("Cannot access other schools")
             elif user.type == UserTypes.student:
-                student = await db.get(Student, user.id)
-                if homework.school_id != student.school_id:
+                if homework.school_id != user.school_id:
                     raise NotAllowed("Cannot access other schools")
 
             return homework
         except SQLAlchemyError as e:
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
@@ -16,5 +16,5 @@ async def get_invitations(db: AsyncSession, user: User):
         invitations: list[Invitation] = result.scalars().all()
         return invitations
     except Exception as e:
-        logger.exception(f"Unexpected error occured: {e}")
+        logger.exception("Unexpected error occured: %s", e)
         raise
@@ -1,21 +1,41 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
+from sqlalchemy import Date, DateTime, delete, literal
 from datetime import datetime, date, timezone
 from fastapi import Depends
 from typing import Annotated
 
-from app.schemas.schedules import ScheduleData, ScheduleUpdateData, Week
+from app.schemas.schedules import (
+    ScheduleData,
+    ScheduleDataOut,
+    ScheduleUpdateData,
+    Week,
+)
 from app.schemas.users import UserTypes
-from app.exceptions.basic import NotAllowed, NotFound
+from app.schemas.attendance import StatusOptions
+from app.exceptions.basic import (
+    AlreadyExistsError,
+    NoDataError,
+    NotAllowed,
+    NotFound,
+)
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.db.versions import bump_school_version
+from app.core.response_cache import response_cache, schedules_scope
 from app.db.models.types import Student, Teacher, Principal
 from app.db.models.schedules import Schedule
 from app.db.models.attendance import Attendance
+from app.db.models.grades import Grade
 from app.db.models.groups import Group
 from app.db.models.schools import School
 from app.db.models.subjects import Subject
 from app.db.models.users import User
+from app.db.utils import dialect_insert
+from app.db.loaders import get_loaded, loader_options, reload
 from app.services.auth import get_current_user
+from app.services import attendance_bitmap, grade_summary
+from app.services.timetable import describe, find_clashes, slot_taken, snapshot
 
 import logging
 
@@ -24,50 +44,70 @@ logger = logging.getLogger(__name__)
 
 async def create_attendance(
     db: AsyncSession,
-    schedules: list[Schedule],
+    schedule_ids: list[int],
     school_id: int | None = None,
     group_id: int | None = None,
-):
+    lesson_date: date | None = None,
+) -> int:
+    """Generate the missing attendance roll for ``schedule_ids`` on ``lesson_date``.
+
+    The missing (schedule_id, student_id, lesson_date) set is computed and
+    inserted by a single ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``, so
+    the cost no longer grows with one round-trip per student and lesson.
+    Returns the number of attendance rows created.
+    """
+    if not schedule_ids:
+        return 0
     try:
-        today = date.today()
-        attendances = []
-
-        if group_id:
-            stmt = select(Student).filter(Student.group_id == group_id)
-        elif school_id:
-            stmt = select(Student).filter(Student.school_id == school_id)
-        else:
-            return attendances
-
+        lesson_date = lesson_date or date.today()
+        created_at = datetime.now(tz=timezone.utc)
+
+        already_marked = (
+            select(Attendance.id)
+            .where(Attendance.schedule_id == Schedule.id)
+            .where(Attendance.student_id == Student.id)
+            .where(Attendance.lesson_date == lesson_date)
+        )
+        missing = (
+            select(
+                Schedule.id,
+                Student.id,
+                literal(lesson_date, Date),
+                literal(StatusOptions.absent.value),
+                literal(created_at, DateTime),
+            )
+            .join(Student, Student.group_id == Schedule.group_id)
+            .where(Schedule.id.in_(schedule_ids))
+            .where(~already_marked.exists())
+        )
+        if school_id is not None:
+            missing = missing.where(Student.school_id == school_id)
+        if group_id is not None:
+            missing = missing.where(Student.group_id == group_id)
+
+        stmt = (
+            dialect_insert(db, Attendance)
+            .from_select(
+                ["schedule_id", "student_id", "lesson_date", "status", "created_at"],
+                missing,
+            )
+            .on_conflict_do_nothing(
+                index_elements=["schedule_id", "student_id", "lesson_date"]
+            )
+        )
+        # The rows are placeholders, the bitmaps change once they are marked
         result = await db.execute(stmt)
-        students = result.scalars().all()
-
-        for schedule in schedules:
-            for student in students:
-                stmt = (
-                    select(Attendance)
-                    .filter(Attendance.schedule_id == schedule.id)
-                    .filter(Attendance.student_id == student.id)
-                    .filter(Attendance.created_at == today)
-                )
-                existing = await db.execute(stmt)
-                if existing.scalar_one_or_none():
-                    continue
-
-                attendance = Attendance(
-                    schedule_id=schedule.id,
-                    student_id=student.id,
-                    created_at=today,
-                )
-                db.add(attendance)
-                await db.commit()
-                await db.refresh(attendance)
-                attendances.append(attendance)
-
-        return attendances
+        await db.commit()
+        logger.info(
+            "Created %s attendance rows for %s schedules on %s",
+            result.rowcount,
+            len(schedule_ids),
+            lesson_date,
+        )
+        return result.rowcount
     except Exception as e:
         await db.rollback()
-        logger.exception(f"Unexpected error occured: {e}")
+        logger.exception("Unexpected error occured: %s", e)
         raise
 
 
@@ -78,12 +118,12 @@ class ScheduleCRUD:
         data: ScheduleData,
         user: Annotated[User, Depends(get_current_user)],
     ):
+        lesson = None
         try:
             subject = await db.get(Subject, data.subject_id)
             teacher = await db.get(Teacher, data.teacher_id)
             group = await db.get(Group, data.group_id)
             school = await db.get(School, data.school_id)
-            principal = await db.get(Principal, user.id)
 
             if not subject:
                 raise NotFound("Subject not found")
@@ -94,39 +134,61 @@ class ScheduleCRUD:
             if not school:
                 raise NotFound("School not found")
 
-            if (
-                user.type == UserTypes.principal
-                and data.school_id != principal.school_id
-            ):
+            if user.type == UserTypes.principal and data.school_id != user.school_id:
                 logger.warning(
-                    f"Principal with id {principal.id} cannot assign schedule to school {school.id}"
+                    "Principal with id %s cannot assign schedule to school %s",
+                    user.id,
+                    school.id,
                 )
                 raise NotAllowed("Cannot assign schedule to another school")
 
             data_dict = data.model_dump(exclude_unset=True)
             schedule = Schedule(**data_dict, created_at=datetime.now(tz=timezone.utc))
+            clashes = await find_clashes(db, schedule)
+            if clashes:
+                logger.info("Schedule clashes: %s", clashes)
+                raise AlreadyExistsError(describe(clashes[0]))
+            lesson = snapshot(schedule)
             db.add(schedule)
+            await bump_school_version(db, schedule.school_id)
             await db.commit()
-            await db.refresh(schedule)
+            schedule = await reload(db, schedule, ScheduleDataOut.loader_profile)
+            await response_cache.invalidate(
+                schedules_scope(schedule.school_id),
+                schedules_scope(schedule.school_id, schedule.group_id),
+            )
+
+            # Today's rolls were generated by the morning job before this lesson existed
+            if schedule.day_of_week == date.today().strftime("%A").lower():
+                await create_attendance(
+                    db=db, schedule_ids=[schedule.id], school_id=schedule.school_id
+                )
             return schedule
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occured: {e}")
+            # A concurrent request took the slot after the clash check
+            message = await slot_taken(db, e, lesson) if lesson else None
+            if message:
+                logger.info("Schedule slot taken concurrently: %s", message)
+                raise AlreadyExistsError(message) from e
+            logger.error("Integrity error occured: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occured: {e}")
+            logger.exception("Unexpected error occured: %s", e)
             raise
 
     @staticmethod
     async def get_schedule_id(db: AsyncSession, schedule_id: int):
         try:
-            schedule = await db.get(Schedule, schedule_id)
+            schedule = await get_loaded(
+                db, Schedule, schedule_id, ScheduleDataOut.loader_profile
+            )
             if not schedule:
                 raise NotFound("Schedule not found")
             return schedule
         except Exception as e:
-            logger.exception(f"Unexpected error occured: {e}")
+            logger.exception("Unexpected error occured: %s", e)
             raise
 
     @staticmethod
@@ -136,22 +198,20 @@ class ScheduleCRUD:
         school_id: int | None = None,
         group_id: int | None = None,
         teacher_id: int | None = None,
-    ):
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
             day_of_week = date.today().strftime("%A").lower()
-            stmt = select(Schedule).filter(Schedule.day_of_week == day_of_week)
+            stmt = (
+                select(Schedule)
+                .options(*loader_options(Schedule, ScheduleDataOut.loader_profile))
+                .filter(Schedule.day_of_week == day_of_week)
+            )
 
             user_school_id = None
-            match user.type:
-                case UserTypes.principal:
-                    principal = await db.get(Principal, user.id)
-                    user_school_id = principal.school_id
-                case UserTypes.teacher:
-                    teacher = await db.get(Teacher, user.id)
-                    user_school_id = teacher.school_id
-                case UserTypes.student:
-                    student = await db.get(Student, user.id)
-                    user_school_id = student.school_id
+            if user.type != UserTypes.admin:
+                user_school_id = user.school_id
 
             if school_id is not None:
                 if user.type != UserTypes.admin:
@@ -165,19 +225,11 @@ class ScheduleCRUD:
             if teacher_id:
                 stmt = stmt.filter(Schedule.teacher_id == teacher_id)
 
-            result = await db.execute(stmt)
-            schedules = result.scalars().all()
-
-            await create_attendance(
-                db=db,
-                schedules=schedules,
-                school_id=user_school_id or school_id,
-                group_id=group_id,
+            return await paginate(
+                db, stmt, (Schedule.start_time, Schedule.id), limit, cursor
             )
-
-            return schedules
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -188,21 +240,19 @@ class ScheduleCRUD:
         school_id: int | None = None,
         group_id: int | None = None,
         teacher_id: int | None = None,
-    ):
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
-            stmt = select(Schedule).filter(Schedule.day_of_week == day_of_week)
+            stmt = (
+                select(Schedule)
+                .options(*loader_options(Schedule, ScheduleDataOut.loader_profile))
+                .filter(Schedule.day_of_week == day_of_week)
+            )
 
             user_school_id = None
-            match user.type:
-                case UserTypes.principal:
-                    principal = await db.get(Principal, user.id)
-                    user_school_id = principal.school_id
-                case UserTypes.teacher:
-                    teacher = await db.get(Teacher, user.id)
-                    user_school_id = teacher.school_id
-                case UserTypes.student:
-                    student = await db.get(Student, user.id)
-                    user_school_id = student.school_id
+            if user.type != UserTypes.admin:
+                user_school_id = user.school_id
 
             if school_id is not None:
                 if user.type != UserTypes.admin:
@@ -216,19 +266,58 @@ class ScheduleCRUD:
             if teacher_id:
                 stmt = stmt.filter(Schedule.teacher_id == teacher_id)
 
-            result = await db.execute(stmt)
-            schedules = result.scalars().all()
+            return await paginate(
+                db, stmt, (Schedule.start_time, Schedule.id), limit, cursor
+            )
+        except Exception as e:
+            logger.exception("Unexpected error occurred: %s", e)
+            raise
 
-            await create_attendance(
-                db=db,
-                schedules=schedules,
-                school_id=user_school_id or school_id,
-                group_id=group_id,
+    @staticmethod
+    async def get_schedule_week(
+        db: AsyncSession,
+        user: User,
+        school_id: int | None = None,
+        group_id: int | None = None,
+        teacher_id: int | None = None,
+    ) -> dict:
+        """The whole week of a school, group or teacher in one query.
+
+        Subject, teacher and group names are loaded by the same query, lessons
+        come back grouped by day and ordered by ``start_time``.
+        """
+        try:
+            if user.type != UserTypes.admin:
+                if school_id is not None and school_id != user.school_id:
+                    raise NotAllowed(f"{user.type} cannot access other schools")
+                school_id = user.school_id
+            elif school_id is None and group_id is None and teacher_id is None:
+                raise NoDataError("Pass school_id, group_id or teacher_id")
+
+            stmt = (
+                select(Schedule)
+                .options(*loader_options(Schedule, ScheduleDataOut.loader_profile))
+                .order_by(Schedule.start_time, Schedule.id)
             )
+            if school_id is not None:
+                stmt = stmt.where(Schedule.school_id == school_id)
+            if group_id is not None:
+                stmt = stmt.where(Schedule.group_id == group_id)
+            if teacher_id is not None:
+                stmt = stmt.where(Schedule.teacher_id == teacher_id)
 
-            return schedules
+            result = await db.execute(stmt)
+            days = {day: [] for day in Week}
+            for schedule in result.scalars():
+                days[Week(schedule.day_of_week)].append(schedule)
+            return {
+                "school_id": school_id,
+                "group_id": group_id,
+                "teacher_id": teacher_id,
+                "days": days,
+            }
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -239,48 +328,116 @@ class ScheduleCRUD:
                 raise NotFound("Schedule not found")
 
             if user.type == UserTypes.principal:
-                principal = await db.get(Principal, user.id)
-                if schedule.school_id != principal.school_id:
+                if schedule.school_id != user.school_id:
                     raise NotAllowed(
                         "Principal cannot delete schedule from other schools"
                     )
 
+            # Its attendance and grades go with it through ON DELETE CASCADE
+            await attendance_bitmap.reslot_schedule(
+                db, schedule.id, schedule.start_time
+            )
+            await grade_summary.remove_grades(db, Grade.schedule_id == schedule.id)
             await db.delete(schedule)
+            await bump_school_version(db, schedule.school_id)
             await db.commit()
+            await response_cache.invalidate(
+                schedules_scope(schedule.school_id),
+                schedules_scope(schedule.school_id, schedule.group_id),
+            )
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
     async def update_schedule(
         db: AsyncSession, user: User, schedule_id: int, data: ScheduleUpdateData
     ):
+        lesson = None
         try:
             schedule = await db.get(Schedule, schedule_id)
             if not schedule:
                 raise NotFound("Schedule not found")
 
             if user.type == UserTypes.principal:
-                principal = await db.get(Principal, user.id)
-                if schedule.school_id != principal.school_id:
+                if schedule.school_id != user.school_id:
                     raise NotAllowed(
                         "Principal cannot update schedule from other schools"
                     )
 
+            previous_school_id = schedule.school_id
+            previous_group_id = schedule.group_id
+            previous_start_time = schedule.start_time
+            previous_subject_id = schedule.subject_id
+            previous_day = schedule.day_of_week
             data_dict = data.model_dump(exclude_unset=True)
             for key, value in data_dict.items():
                 setattr(schedule, key, value)
 
+            # Checked before the change is flushed into the database
+            with db.no_autoflush:
+                clashes = await find_clashes(db, schedule)
+            if clashes:
+                logger.info("Schedule %s clashes: %s", schedule_id, clashes)
+                raise AlreadyExistsError(describe(clashes[0]))
+            lesson = snapshot(schedule)
+
+            with db.no_autoflush:
+                # Marks keep their lesson_date, only the slot of the day moves
+                if schedule.start_time != previous_start_time:
+                    await attendance_bitmap.reslot_schedule(
+                        db, schedule.id, previous_start_time, schedule.start_time
+                    )
+                await grade_summary.move_grades(
+                    db,
+                    previous_subject_id,
+                    schedule.subject_id,
+                    Grade.schedule_id == schedule.id,
+                )
+
+            today = date.today().strftime("%A").lower()
+            moved = (
+                schedule.day_of_week != previous_day
+                or schedule.group_id != previous_group_id
+            )
+            # Today's placeholder roll belongs to the old day or group, marks stay
+            if moved and previous_day == today:
+                await db.execute(
+                    delete(Attendance).where(
+                        Attendance.schedule_id == schedule.id,
+                        Attendance.lesson_date == date.today(),
+                        ~Attendance.is_marked,
+                    )
+                )
+
             db.add(schedule)
+            await bump_school_version(db, previous_school_id, schedule.school_id)
             await db.commit()
-            await db.refresh(schedule)
+            schedule = await reload(db, schedule, ScheduleDataOut.loader_profile)
+            await response_cache.invalidate(
+                schedules_scope(previous_school_id),
+                schedules_scope(previous_school_id, previous_group_id),
+                schedules_scope(schedule.school_id),
+                schedules_scope(schedule.school_id, schedule.group_id),
+            )
+
+            # Same as a lesson created today, the morning job missed this roll
+            if moved and schedule.day_of_week == today:
+                await create_attendance(
+                    db=db, schedule_ids=[schedule.id], school_id=schedule.school_id
+                )
             return schedule
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occured: {e}")
+            # A concurrent request took the slot after the clash check
+            message = await slot_taken(db, e, lesson) if lesson else None
+            if message:
+                logger.info("Schedule slot taken concurrently: %s", message)
+                raise AlreadyExistsError(message) from e
+            logger.error("Integrity error occured: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occured: {e}")
+            logger.exception("Unexpected error occured: %s", e)
             raise
@@ -7,7 +7,10 @@ from app.schemas.schools import SchoolData, SchoolUpdate
 from app.schemas.users import UserTypes
 from app.exceptions.basic import NotFound, NotAllowed
 from app.db.models.users import User
-from app.db.models.types import Teacher, Student, Principal
+from app.services.auth import invalidate_principal
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.db.versions import bump_school_version
+from app.core.response_cache import SCHOOLS_SCOPE, response_cache
 
 import logging
 
@@ -24,18 +27,19 @@ class SchoolCRUD:
             db.add(school)
             await db.commit()
             await db.refresh(school)
+            await response_cache.invalidate(SCHOOLS_SCOPE)
             return school
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occurred: {e}")
+            logger.error("Integrity error occurred: %s", e)
             raise ValueError(f"This schoolname already exists: {school.name}")
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise RuntimeError("Database error")
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
 
     @staticmethod
@@ -43,37 +47,48 @@ class SchoolCRUD:
         school: School = await db.get(School, school_id)
         if school is None:
             logger.warning(
-                f"User {user.id} ({user.type}) tried to delete non-existent school ID {school_id}"
+                "User %s (%s) tried to delete non-existent school ID %s",
+                user.id,
+                user.type,
+                school_id,
             )
             raise NotFound("No such school")
 
         if user.type == UserTypes.principal:
-            principal: Principal = await db.get(Principal, user.id)
-            if principal.school_id != school_id:
+            if user.school_id != school_id:
                 logger.warning(
-                    f"Principal {user.id} tried to delete school {school_id} not assigned to them"
+                    "Principal %s tried to delete school %s not assigned to them",
+                    user.id,
+                    school_id,
                 )
                 raise NotAllowed("Not allowed to delete this school")
         elif user.type != UserTypes.admin:
             logger.warning(
-                f"User {user.id} ({user.type}) tried to delete school {school_id} without permission"
+                "User %s (%s) tried to delete school %s without permission",
+                user.id,
+                user.type,
+                school_id,
             )
             raise NotAllowed("Only admins or assigned principals can delete schools")
 
         try:
             await db.delete(school)
             await db.commit()
+            invalidate_principal()
+            await response_cache.invalidate(SCHOOLS_SCOPE)
             logger.info(
-                f"School ID {school_id} deleted by user {user.id} ({user.type})"
+                "School ID %s deleted by user %s (%s)", school_id, user.id, user.type
             )
             return None
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error while deleting school {school_id}: {e}")
+            logger.error("DB error while deleting school %s: %s", school_id, e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error while deleting school {school_id}: {e}")
+            logger.exception(
+                "Unexpected error while deleting school %s: %s", school_id, e
+            )
             raise
 
     @staticmethod
@@ -86,20 +101,22 @@ class SchoolCRUD:
         try:
             for key, value in data.model_dump(exclude_unset=True).items():
                 setattr(school, key, value)
+            await bump_school_version(db, school_id)
             await db.commit()
             await db.refresh(school)
+            await response_cache.invalidate(SCHOOLS_SCOPE)
             return school
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occurred: {e}")
+            logger.error("Integrity error occurred: %s", e)
             raise ValueError(f'School name "{school.name}" is already taken')
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"Unexpected error in DB occurred: {e}")
+            logger.error("Unexpected error in DB occurred: %s", e)
             raise RuntimeError("Unexpected error in DB")
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -107,39 +124,42 @@ class SchoolCRUD:
         try:
             school = await db.get(School, school_id)
             if school is None:
-                logger.info(f"School not found id={school_id} by user {user.id}")
+                logger.info("School not found id=%s by user %s", school_id, user.id)
                 raise NotFound("No such school")
 
             if user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != school.id:
+                if user.school_id != school.id:
                     logger.warning(
-                        f"Principal {user.id} tried to access school {school.id}"
+                        "Principal %s tried to access school %s", user.id, school.id
                     )
                     raise NotAllowed("Cannot access this school")
             elif user.type == UserTypes.teacher:
-                teacher: Teacher = await db.get(Teacher, user.id)
-                if teacher.school_id != school.id:
+                if user.school_id != school.id:
                     logger.warning(
-                        f"Teacher {user.id} tried to access school {school.id}"
+                        "Teacher %s tried to access school %s", user.id, school.id
                     )
                     raise NotAllowed("Cannot access this school")
             elif user.type == UserTypes.student:
-                student: Student = await db.get(Student, user.id)
-                if student.school_id != school.id:
+                if user.school_id != school.id:
                     logger.warning(
-                        f"Student {user.id} tried to access school {school.id}"
+                        "Student %s tried to access school %s", user.id, school.id
                     )
                     raise NotAllowed("Cannot access this school")
             return school
         except Exception as e:
-            logger.exception(f"Unexpected error in get_school by user {user.id}: {e}")
+            logger.exception(
+                "Unexpected error in get_school by user %s: %s", user.id, e
+            )
             raise
 
     @staticmethod
     async def get_schools(
-        db: AsyncSession, country: str | None = None, is_active: bool | None = None
-    ) -> list["School"]:
+        db: AsyncSession,
+        country: str | None = None,
+        is_active: bool | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
             stmt = select(School)
 
@@ -148,9 +168,8 @@ class SchoolCRUD:
             if is_active is not None:
                 stmt = stmt.where(School.is_active == is_active)
 
-            result = await db.execute(stmt)
-            return result.scalars().all()
+            return await paginate(db, stmt, (School.id,), limit, cursor)
 
         except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
+            logger.exception("Unexpected error: %s", e)
             raise
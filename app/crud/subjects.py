@@ -2,12 +2,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.future import select
 
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
 from app.db.models.subjects import Subject
 from app.db.models.users import User
-from app.db.models.types import Teacher, Student, Principal
 from app.schemas.subjects import SubjectData, SubjectUpdate
 from app.exceptions.basic import NotFound, NotAllowed
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.db.versions import bump_school_version
+from app.core.response_cache import named_scopes, response_cache, subjects_scope
 from app.schemas.auth import UserTypes
+from app.services import grade_summary
 
 import logging
 
@@ -22,20 +27,22 @@ class SubjectCRUD:
             for key, value in data.model_dump(exclude_unset=True).items():
                 setattr(subject, key, value)
             db.add(subject)
+            await bump_school_version(db, subject.school_id)
             await db.commit()
             await db.refresh(subject)
+            await response_cache.invalidate(subjects_scope(subject.school_id))
             return subject
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occurred: {e}")
+            logger.error("Integrity error occurred: %s", e)
             raise
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"Error in DB: {e}")
+            logger.error("Error in DB: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -43,55 +50,86 @@ class SubjectCRUD:
         try:
             subject: Subject = await db.get(Subject, subject_id)
             if not subject:
-                logger.info(f"Subject with id {subject_id} not found")
+                logger.info("Subject with id %s not found", subject_id)
                 raise NotFound(f"Subject with id {subject_id} not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != subject.school_id:
+                if user.school_id != subject.school_id:
                     logger.warning(
-                        f"User {user.id} tried to delete subject {subject_id} from another school"
+                        "User %s tried to delete subject %s from another school",
+                        user.id,
+                        subject_id,
                     )
                     raise NotAllowed("Cannot delete subjects from other schools")
 
+            # Its lessons keep their grades with subject_id SET NULL
+            await grade_summary.move_grades(
+                db, subject.id, None, Schedule.subject_id == subject.id
+            )
             await db.delete(subject)
+            await bump_school_version(db, subject.school_id)
             await db.commit()
-            logger.info(f"Subject with id {subject_id} was deleted")
+            group_ids = await db.scalars(
+                select(Group.id).where(Group.school_id == subject.school_id)
+            )
+            await response_cache.invalidate(
+                subjects_scope(subject.school_id),
+                *named_scopes([subject.school_id], group_ids),
+            )
+            logger.info("Subject with id %s was deleted", subject_id)
             return True
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
     async def update_subject_data(
-        db: AsyncSession, subject_id: int, data: SubjectUpdate
+        db: AsyncSession, user: User, subject_id: int, data: SubjectUpdate
     ):
         subject: Subject = await db.get(Subject, subject_id)
         if not subject:
-            logger.info(f"Subject with id {subject_id} not found")
+            logger.info("Subject with id %s not found", subject_id)
             raise NotFound("No such subject")
+        if user.type == UserTypes.principal and user.school_id != subject.school_id:
+            logger.warning(
+                "User %s tried to update subject %s from another school",
+                user.id,
+                subject_id,
+            )
+            raise NotAllowed("Cannot update subjects from other schools")
         try:
+            previous_school_id = subject.school_id
             for key, value in data.model_dump(exclude_unset=True).items():
                 setattr(subject, key, value)
+            await bump_school_version(db, previous_school_id, subject.school_id)
             await db.commit()
             await db.refresh(subject)
+            school_ids = [previous_school_id, subject.school_id]
+            group_ids = await db.scalars(
+                select(Group.id).where(Group.school_id.in_(school_ids))
+            )
+            await response_cache.invalidate(
+                subjects_scope(previous_school_id),
+                subjects_scope(subject.school_id),
+                *named_scopes(school_ids, group_ids),
+            )
             return subject
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error occurred: {e}")
+            logger.error("Integrity error occurred: %s", e)
             raise ValueError(f'Subject name "{subject.name}" is already taken')
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"Unexpected DB error occurred: {e}")
+            logger.error("Unexpected DB error occurred: %s", e)
             raise RuntimeError("Unexpected error in DB")
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -102,52 +140,50 @@ class SubjectCRUD:
                 raise NotFound(f"Subject with id {subject_id} not found")
 
             if user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != subject.school_id:
+                if user.school_id != subject.school_id:
                     raise NotAllowed("Cannot access subjects from other schools")
             elif user.type == UserTypes.teacher:
-                teacher: Teacher = await db.get(Teacher, user.id)
-                if teacher.school_id != subject.school_id:
+                if user.school_id != subject.school_id:
                     raise NotAllowed("Cannot access subjects from other schools")
             elif user.type == UserTypes.student:
-                student: Student = await db.get(Student, user.id)
-                if student.school_id != subject.school_id:
+                if user.school_id != subject.school_id:
                     raise NotAllowed("Cannot access subjects from other schools")
 
             return subject
         except SQLAlchemyError as e:
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
     async def get_subjects(
-        db: AsyncSession, user: User, school_id: int, name: str | None = None
-    ):
+        db: AsyncSession,
+        user: User,
+        school_id: int,
+        name: str | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page:
         try:
             if user.type == UserTypes.teacher:
-                teacher: Teacher = await db.get(Teacher, user.id)
-                if teacher.school_id != school_id:
+                if user.school_id != school_id:
                     raise NotAllowed("Cannot get subjects from other schools")
             elif user.type == UserTypes.student:
-                student: Student = await db.get(Student, user.id)
-                if student.school_id != school_id:
+                if user.school_id != school_id:
                     raise NotAllowed("Cannot get subjects from other schools")
             elif user.type == UserTypes.principal:
-                principal: Principal = await db.get(Principal, user.id)
-                if principal.school_id != school_id:
+                if user.school_id != school_id:
                     raise NotAllowed("Cannot get subjects from other schools")
 
             stmt = select(Subject).filter(Subject.school_id == school_id)
             if name:
                 stmt = stmt.filter(Subject.name == name)
-            result = await db.execute(stmt)
-            return result.scalars().all()
+            return await paginate(db, stmt, (Subject.id,), limit, cursor)
         except SQLAlchemyError as e:
-            logger.error(f"DB error: {e}")
+            logger.error("DB error: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
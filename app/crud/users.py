@@ -3,8 +3,13 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.db.models.groups import Group
 from app.db.models.users import User
 from app.exceptions.basic import NotFound
+from app.db.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from app.db.versions import bump_school_version
+from app.core.response_cache import named_scopes, response_cache
+from app.services.auth import invalidate_principal
 
 import logging
 
@@ -14,43 +19,55 @@ logger = logging.getLogger(__name__)
 class UsersCRUD:
     @staticmethod
     async def get_users(
-        db: AsyncSession, page: int, limit: int, username: str | None = None
-    ):
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        username: str | None = None,
+    ) -> Page:
         try:
-            offset = (page - 1) * limit
+            stmt = select(with_polymorphic(User, []))
             if username:
-                result = await db.execute(select(User).where(User.username == username))
-                users = result.scalars().all()
-                if not users:
-                    raise NotFound("User not found")
-            else:
-                stmt = select(with_polymorphic(User, [])).offset(offset).limit(limit)
-                result = await db.execute(stmt)
-                users = result.scalars().all()
+                stmt = stmt.where(User.username == username)
+            users = await paginate(db, stmt, (User.id,), limit, cursor)
+            if username and not users.items:
+                raise NotFound("User not found")
             return users
         except SQLAlchemyError as e:
-            logger.error(f"DB error occurred: {e}")
+            logger.error("DB error occurred: %s", e)
             raise
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
     async def delete_user(db: AsyncSession, user_id: int):
         try:
-            user = await db.get(User, user_id)
+            users = with_polymorphic(User, "*")
+            result = await db.execute(select(users).where(users.id == user_id))
+            user = result.scalar_one_or_none()
             if not user:
                 raise NotFound("User not found")
 
+            # A teacher's grades stay counted, the ORM only nulls their marked_by.
+            # A student's grades cascade together with their summary rows.
             await db.delete(user)
+            # Schedule and homework responses show the teacher's name
+            school_id = getattr(user, "school_id", None)
+            await bump_school_version(db, school_id)
             await db.commit()
-            logger.info(f"User {user.username} is deleted")
+            invalidate_principal(user_id)
+            if school_id is not None:
+                group_ids = await db.scalars(
+                    select(Group.id).where(Group.school_id == school_id)
+                )
+                await response_cache.invalidate(*named_scopes([school_id], group_ids))
+            logger.info("User %s is deleted", user.username)
             return {"message": f"User {user.username} is deleted successfully"}
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"DB error occurred: {e}")
+            logger.error("DB error occurred: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
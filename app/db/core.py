@@ -1,19 +1,73 @@
+from fastapi import Request
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
+from app.core.metrics import instrument_engine
+from app.db.pool import InstrumentedPool
+from app.db.routing import ReplicaRouter
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(url=settings.DB_URL)
+
+def engine_options(url: str) -> dict:
+    """Pool and driver options for ``url`` taken from the settings."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite picks its own pool; queue pool sizing does not apply
+        return {}
+    options = {
+        "poolclass": InstrumentedPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+engine = create_async_engine(url=settings.DB_URL, **engine_options(settings.DB_URL))
+instrument_engine(engine)
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
+ReplicaSessionLocal = None
+if settings.DB_REPLICA_URL:
+    replica_engine = create_async_engine(
+        url=settings.DB_REPLICA_URL, **engine_options(settings.DB_REPLICA_URL)
+    )
+    instrument_engine(replica_engine)
+    ReplicaSessionLocal = sessionmaker(
+        bind=replica_engine, class_=AsyncSession, expire_on_commit=False
+    )
+db_router = ReplicaRouter(
+    primary=AsyncSessionLocal,
+    replica=ReplicaSessionLocal,
+    read_your_writes=settings.DB_REPLICA_READ_YOUR_WRITES,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+)
 Base = declarative_base()
 
 
-async def get_async_db():
-    async with AsyncSessionLocal() as session:
+async def get_async_db(request: Request):
+    session_factory = await db_router.sessionmaker_for(request)
+    async with session_factory() as session:
         yield session
+    db_router.record_write(request)
+
+
+async def get_sessionmaker(request: Request):
+    """Session factory for reads that outlive the request, like streamed bodies.
+
+    Routed like ``get_async_db``, so a lagging replica is not used.
+    """
+    return await db_router.sessionmaker_for(request)
@@ -0,0 +1,59 @@
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.base import NO_VALUE
+from typing import Any
+
+# Loader profiles map dotted relationship paths to a strategy, e.g.
+# {"subject": "joined", "schedule.subject": "joined"}. Response schemas declare
+# the profile they need as ``loader_profile`` and the CRUD layer applies it.
+STRATEGIES = {"joined": joinedload, "selectin": selectinload}
+
+
+def loader_options(model, profile: dict[str, str]) -> list:
+    """Turn a loader profile into loader options for queries on ``model``."""
+    options = []
+    for path, strategy in profile.items():
+        loader, entity = None, model
+        for name in path.split("."):
+            attribute = getattr(entity, name)
+            if loader is None:
+                loader = STRATEGIES[strategy](attribute)
+            else:
+                loader = getattr(loader, f"{strategy}load")(attribute)
+            entity = attribute.property.mapper.class_
+        options.append(loader)
+    return options
+
+
+async def get_loaded(db: AsyncSession, model, ident, profile: dict[str, str]):
+    """``db.get`` with the relationships of ``profile`` loaded in the same query.
+
+    ``populate_existing`` makes an instance already in the identity map load
+    the profile too instead of being returned as is.
+    """
+    return await db.get(
+        model, ident, options=loader_options(model, profile), populate_existing=True
+    )
+
+
+async def reload(db: AsyncSession, obj, profile: dict[str, str]):
+    """Re-read ``obj`` with the relationships of ``profile``, replacing ``db.refresh``."""
+    state = inspect(obj)
+    return await get_loaded(db, state.mapper.class_, state.identity, profile)
+
+
+def loaded(obj, path: str) -> Any:
+    """Follow ``path`` through already loaded attributes, never lazy loading.
+
+    Returns ``None`` when a step was not loaded, so serializing a response
+    whose query skipped the loader profile cannot emit extra queries.
+    """
+    for name in path.split("."):
+        if obj is None:
+            return None
+        value = inspect(obj).attrs[name].loaded_value
+        if value is NO_VALUE:
+            return None
+        obj = value
+    return obj
@@ -4,4 +4,6 @@ from app.db.models.homeworks import Homework
 from app.db.models.schedules import Schedule
 from app.db.models.attendance import Attendance
 from app.db.models.grades import Grade
+from app.db.models.grade_summary import StudentGradeSummary
+from app.db.models.attendance_bitmap import StudentAttendanceBitmap
 from app.db.models.invitations import Invitation
@@ -1,13 +1,26 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, DateTime
-from datetime import datetime, timezone
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import (
+    or_,
+    String,
+    Integer,
+    ForeignKey,
+    DateTime,
+    Date,
+    UniqueConstraint,
+    Index,
+)
+from datetime import datetime, date, timezone
 
 from app.db.core import Base
+from app.db.loaders import loaded
 from app.db.models.types import Student, Teacher
 from app.db.models.schedules import Schedule
 
 
 class Attendance(Base):
+    # On PostgreSQL the table is partitioned by month of lesson_date and its
+    # primary key is (id, lesson_date); see app/db/partitions.py
     __tablename__ = "attendances"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -26,7 +39,42 @@ class Attendance(Base):
         DateTime, default=datetime.now(tz=timezone.utc)
     )
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    lesson_date: Mapped[date] = mapped_column(Date, default=date.today)
 
     student: Mapped["Student"] = relationship("Student", back_populates="attendance")
     schedule: Mapped["Schedule"] = relationship("Schedule", back_populates="attendance")
     teacher: Mapped["Teacher"] = relationship("Teacher", back_populates="attendance")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "schedule_id",
+            "student_id",
+            "lesson_date",
+            name="uniqueconst_schedule_student_date",
+        ),
+        Index("ix_attendances_student_id_lesson_date", "student_id", "lesson_date"),
+        Index("ix_attendances_marked_by", "marked_by"),
+    )
+
+    @hybrid_property
+    def is_marked(self) -> bool:
+        """False for roll rows the roll job created that nobody has marked yet.
+
+        Their "absent" is a placeholder, so statistics leave them out.
+        """
+        return self.marked_by is not None or self.updated_at is not None
+
+    @is_marked.inplace.expression
+    @classmethod
+    def _is_marked_expression(cls):
+        return or_(cls.marked_by.is_not(None), cls.updated_at.is_not(None))
+
+    @property
+    def subject_name(self) -> str | None:
+        subject = loaded(self, "schedule.subject")
+        return subject.name if subject else None
+
+    @property
+    def student_name(self) -> str | None:
+        student = loaded(self, "student")
+        return student.full_name if student else None
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, ForeignKey, DateTime, Date, LargeBinary
+from datetime import date, datetime, timezone
+
+from app.db.core import Base
+
+
+class StudentAttendanceBitmap(Base):
+    """A student's attendance over one term as one bitmap per status.
+
+    Bit ``day * 64 + minute_of_day // 30`` is set in the bitmap of the status
+    the lesson starting at that slot was marked with, see
+    ``app.services.attendance_bitmap``. Bitmaps are little-endian integers.
+    """
+
+    __tablename__ = "student_attendance_bitmaps"
+
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True
+    )
+    term_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    present: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    late: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    excused: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    absent: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=timezone.utc)
+    )
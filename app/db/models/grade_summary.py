@@ -0,0 +1,28 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Float
+from datetime import datetime, timezone
+
+from app.db.core import Base
+
+
+class StudentGradeSummary(Base):
+    """Running totals of a student's grades per subject and grade system.
+
+    Maintained in the same transaction as the grade it summarises, see
+    ``app.services.grade_summary``. ``subject_id`` is 0 for lessons without a
+    subject so the natural key can stay the primary key.
+    """
+
+    __tablename__ = "student_grade_summary"
+
+    student_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True
+    )
+    subject_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    grade_system: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    sum: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_sq: Mapped[float] = mapped_column(Float, default=0.0)
+    last_updated: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=timezone.utc)
+    )
@@ -7,10 +7,12 @@ from sqlalchemy import (
     DateTime,
     Float,
     UniqueConstraint,
+    Index,
 )
 from datetime import datetime, timezone
 
 from app.db.core import Base
+from app.db.loaders import loaded
 from app.db.models.types import Student, Teacher
 from app.db.models.schedules import Schedule
 
@@ -48,4 +50,15 @@ class Grade(Base):
         UniqueConstraint(
             "schedule_id", "student_id", name="uniqueconst_schedule_student"
         ),
+        Index("ix_grades_student_id", "student_id"),
     )
+
+    @property
+    def subject_name(self) -> str | None:
+        subject = loaded(self, "schedule.subject")
+        return subject.name if subject else None
+
+    @property
+    def teacher_name(self) -> str | None:
+        teacher = loaded(self, "teacher")
+        return teacher.full_name if teacher else None
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, Index
 
 from app.db.core import Base
 from app.db.models.schools import School
@@ -24,5 +24,11 @@ class Group(Base):
     )
     students: Mapped[list["Student"]] = relationship("Student", back_populates="group", passive_deletes=True)  # type: ignore
     schedule: Mapped["Schedule"] = relationship(
-        "Schedule", back_populates="group", uselist=False
+        "Schedule", back_populates="group", uselist=False, passive_deletes=True
     )
+
+    __table_args__ = (Index("ix_groups_school_id", "school_id"),)
+
+    @property
+    def label(self) -> str:
+        return f"{self.grade}{self.grade_section}"
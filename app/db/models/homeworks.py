@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, DateTime
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Index
 from datetime import datetime
 
 from app.db.core import Base
+from app.db.loaders import loaded
 from app.db.models.types import Teacher
 from app.db.models.schools import School
 from app.db.models.groups import Group
@@ -33,3 +34,23 @@ class Homework(Base):
     teacher: Mapped["Teacher"] = relationship("Teacher", back_populates="homeworks")
     school: Mapped["School"] = relationship("School", back_populates="homeworks")
     subjects: Mapped["Subject"] = relationship("Subject", back_populates="homeworks")
+
+    __table_args__ = (
+        Index("ix_homeworks_school_id_group_id", "school_id", "group_id"),
+        Index("ix_homeworks_school_id_teacher_id", "school_id", "teacher_id"),
+    )
+
+    @property
+    def subject_name(self) -> str | None:
+        subject = loaded(self, "subjects")
+        return subject.name if subject else None
+
+    @property
+    def teacher_name(self) -> str | None:
+        teacher = loaded(self, "teacher")
+        return teacher.full_name if teacher else None
+
+    @property
+    def group_label(self) -> str | None:
+        group = loaded(self, "group")
+        return group.label if group else None
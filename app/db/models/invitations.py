@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from datetime import datetime, timezone
 
 from app.db.core import Base
@@ -25,3 +25,5 @@ class Invitation(Base):
     invitee: Mapped["User"] = relationship(
         "User", foreign_keys=[invited_user_id], back_populates="invitations_received"
     )
+
+    __table_args__ = (Index("ix_invitations_invited_user_id", "invited_user_id"),)
@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Time
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Time, Index
 from datetime import datetime, time, timezone
 
 from app.db.core import Base
+from app.db.loaders import loaded
 from app.db.models.types import Teacher
 from app.db.models.schools import School
 from app.db.models.groups import Group
@@ -10,6 +11,8 @@ from app.db.models.subjects import Subject
 
 
 class Schedule(Base):
+    # On PostgreSQL exclusion constraints keep lessons of a group or teacher
+    # from overlapping; see app/services/timetable.py
     __tablename__ = "schedules"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -39,6 +42,30 @@ class Schedule(Base):
     subject: Mapped["Subject"] = relationship("Subject", back_populates="schedules")
     teacher: Mapped["Teacher"] = relationship("Teacher", back_populates="schedules")
     attendance: Mapped["Attendance"] = relationship(
-        "Attendance", back_populates="schedule", uselist=False
+        "Attendance", back_populates="schedule", uselist=False, passive_deletes=True
     )
-    grades: Mapped[list["Grade"]] = relationship("Grade", back_populates="schedule")
+    grades: Mapped[list["Grade"]] = relationship(
+        "Grade", back_populates="schedule", passive_deletes=True
+    )
+
+    __table_args__ = (
+        Index("ix_schedules_school_id_day_of_week", "school_id", "day_of_week"),
+        Index("ix_schedules_group_id_day_of_week", "group_id", "day_of_week"),
+        Index("ix_schedules_teacher_id_day_of_week", "teacher_id", "day_of_week"),
+    )
+
+    # Names for responses, read from relationships loaded by a loader profile
+    @property
+    def subject_name(self) -> str | None:
+        subject = loaded(self, "subject")
+        return subject.name if subject else None
+
+    @property
+    def teacher_name(self) -> str | None:
+        teacher = loaded(self, "teacher")
+        return teacher.full_name if teacher else None
+
+    @property
+    def group_label(self) -> str | None:
+        group = loaded(self, "group")
+        return group.label if group else None
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean
+from sqlalchemy import String, Integer, Boolean, DateTime
+from datetime import datetime, timezone
 
 from app.db.core import Base
 
@@ -13,6 +14,11 @@ class School(Base):
     address: Mapped[str] = mapped_column(String)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     grade_system: Mapped[str] = mapped_column(String, nullable=True)
+    # Bumped on every write to the school, its schedules or subjects
+    data_version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    data_updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=timezone.utc)
+    )
 
     principals: Mapped[list["Principal"]] = relationship(
         "Principal", back_populates="school", passive_deletes=True
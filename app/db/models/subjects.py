@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, Index
 
 from app.db.core import Base
 from app.db.models.schools import School
@@ -27,3 +27,5 @@ class Subject(Base):
     schedules: Mapped[list["Schedule"]] = relationship(
         "Schedule", back_populates="subject"
     )
+
+    __table_args__ = (Index("ix_subjects_school_id_name", "school_id", "name"),)
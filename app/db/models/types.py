@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, ForeignKey
+from sqlalchemy import Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from app.db.models.users import User
@@ -35,6 +35,7 @@ class Teacher(User):
     )
     grades: Mapped[list["Grade"]] = relationship("Grade", back_populates="teacher")
 
+    __table_args__ = (Index("ix_teachers_school_id", "school_id"),)
     __mapper_args__ = {"polymorphic_identity": "teacher"}
 
 
@@ -75,7 +76,14 @@ class Student(User):
         "Group", back_populates="students", passive_deletes=True
     )
     attendance: Mapped["Attendance"] = relationship(
-        "Attendance", back_populates="student"
+        "Attendance", back_populates="student", passive_deletes=True
+    )
+    grades: Mapped[list["Grade"]] = relationship(
+        "Grade", back_populates="student", passive_deletes=True
+    )
+
+    __table_args__ = (
+        Index("ix_students_school_id_group_id", "school_id", "group_id"),
+        Index("ix_students_group_id", "group_id"),
     )
-    grades: Mapped[list["Grade"]] = relationship("Grade", back_populates="student")
     __mapper_args__ = {"polymorphic_identity": "student"}
@@ -26,3 +26,7 @@ class User(Base):
     )
 
     __mapper_args__ = {"polymorphic_identity": "admin", "polymorphic_on": type}
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.first_name} {self.last_name}"
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions.basic import InvalidCursor
+
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(values: list) -> str:
+    values = [
+        value.isoformat() if isinstance(value, (date, time)) else value
+        for value in values
+    ]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: tuple) -> list:
+    """Decode a cursor made by ``encode_cursor`` for the given key columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor("Cursor does not match this listing")
+
+    decoded = []
+    for key, value in zip(keys, values):
+        python_type = key.type.python_type
+        try:
+            if python_type in (date, time, datetime):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise TypeError(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor("Cursor does not match this listing")
+        decoded.append(value)
+    return decoded
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: tuple,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page:
+    """Return one page of ``stmt`` ordered by the unique ``keys`` (keyset pagination).
+
+    ``keys`` must end with a unique column, usually the primary key, so that
+    every row has a distinct position and the next page starts right after
+    the last row returned.
+    """
+    if cursor is not None:
+        after = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            stmt = stmt.where(keys[0] > after[0])
+        else:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*after))
+    stmt = stmt.order_by(*keys).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    items = list(result.scalars().all())
+    if len(items) <= limit:
+        return Page(items=items)
+    items = items[:limit]
+    last = items[-1]
+    return Page(
+        items=items,
+        next_cursor=encode_cursor([getattr(last, key.key) for key in keys]),
+    )
@@ -0,0 +1,157 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+
+from app.core.settings import settings
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# On PostgreSQL ``attendances`` is range-partitioned by month of ``lesson_date``
+# (migration d4e7a1c93b52); other databases keep a plain table.
+PARTITIONED_TABLE = "attendances"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+COLUMNS = (
+    "id, status, schedule_id, student_id, marked_by, "
+    "created_at, updated_at, lesson_date"
+)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def months_between(first: date, last: date) -> list[date]:
+    """Month starts from the month of ``first`` to the month of ``last``, inclusive."""
+    months, month = [], month_start(first)
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def is_partitioned(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def create_attendance_partition(db: AsyncSession, month: date) -> None:
+    """Create the partition of ``month``, in the caller's transaction.
+
+    PostgreSQL refuses a new partition while the default one holds rows in its
+    range, so those are detached with the default partition, moved into the
+    new one and the default partition attached again.
+    """
+    name = partition_name(month)
+    bounds = {"start": month, "end": next_month(month)}
+    stranded = await db.scalar(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE lesson_date >= :start AND lesson_date < :end)"
+        ),
+        bounds,
+    )
+    if stranded:
+        await db.execute(
+            text(
+                f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"
+            )
+        )
+    await db.execute(
+        text(
+            f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"
+        )
+    )
+    if stranded:
+        result = await db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE lesson_date >= :start AND lesson_date < :end "
+                f"RETURNING {COLUMNS}) "
+                f"INSERT INTO {PARTITIONED_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+            ),
+            bounds,
+        )
+        await db.execute(
+            text(
+                f"ALTER TABLE {PARTITIONED_TABLE} "
+                f"ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"
+            )
+        )
+        logger.info(
+            "Moved %s attendance rows from %s to %s",
+            result.rowcount,
+            DEFAULT_PARTITION,
+            name,
+        )
+
+
+async def ensure_attendance_partitions(
+    db: AsyncSession,
+    today: date | None = None,
+    months_ahead: int = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD,
+) -> list[str]:
+    """Create the monthly partitions from this month to ``months_ahead`` ahead.
+
+    Rows without a partition land in ``attendances_default``, so a missed
+    run only costs pruning, not inserts. Each month is committed on its own,
+    so a failure keeps the months created before it. Returns the partitions
+    created.
+    """
+    if not is_partitioned(db):
+        return []
+    today = today or date.today()
+    last = month_start(today)
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    created = []
+    for month in months_between(today, last):
+        name = partition_name(month)
+        try:
+            exists = await db.scalar(text("SELECT to_regclass(:name)"), {"name": name})
+            if exists is not None:
+                continue
+            await create_attendance_partition(db, month)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Creating attendance partition %s failed: %s", name, e)
+            raise
+        created.append(name)
+    if created:
+        logger.info("Created attendance partitions %s", created)
+    return created
+
+
+async def drop_attendance_partitions(db: AsyncSession, start: date, end: date) -> int:
+    """Drop the monthly partitions lying entirely in ``[start, end)``.
+
+    Runs in the caller's transaction. Returns the number of rows they held.
+    """
+    if not is_partitioned(db):
+        return 0
+    dropped_rows = 0
+    for month in months_between(start, end):
+        if month < start or next_month(month) > end:
+            continue
+        name = partition_name(month)
+        if await db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is None:
+            continue
+        dropped_rows += await db.scalar(text(f"SELECT count(*) FROM {name}"))
+        await db.execute(
+            text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}")
+        )
+        await db.execute(text(f"DROP TABLE {name}"))
+    return dropped_rows
@@ -0,0 +1,56 @@
+from dataclasses import asdict, dataclass
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+import time
+
+
+@dataclass
+class PoolCounters:
+    checkouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    overflow_events: int = 0
+    timeouts: int = 0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and when it overflows."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters = PoolCounters()
+
+    def _do_get(self):
+        overflow = self._overflow
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeout:
+            self.counters.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.counters.wait_seconds += waited
+            self.counters.max_wait_seconds = max(self.counters.max_wait_seconds, waited)
+        self.counters.checkouts += 1
+        if self._overflow > max(overflow, 0):
+            self.counters.overflow_events += 1
+        return entry
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, InstrumentedPool):
+        counters = asdict(pool.counters)
+        checkouts = counters["checkouts"] or 1
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            avg_wait_ms=round(counters["wait_seconds"] / checkouts * 1000, 3),
+            **counters,
+        )
+    return stats
@@ -0,0 +1,84 @@
+from fastapi import Request
+from sqlalchemy import text
+
+from app.core.cache import TTLCache
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero while the standby has replayed everything it received, otherwise the
+# age of the last replayed transaction.
+POSTGRES_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaRouter:
+    """Chooses the primary or the read replica session factory per request.
+
+    Safe (read-only) requests go to the replica unless the caller wrote
+    something within the last ``read_your_writes`` seconds or the replica
+    lags more than ``max_lag`` seconds behind the primary.
+    """
+
+    def __init__(
+        self,
+        primary,
+        replica=None,
+        read_your_writes: float = 5,
+        max_lag: float = 5,
+        lag_check_interval: float = 1,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.recent_writers = TTLCache(maxsize=100_000, ttl=read_your_writes)
+        self._lag = 0.0
+        self._lag_checked_at = float("-inf")
+
+    @staticmethod
+    def client_key(request: Request) -> str | None:
+        return request.headers.get("authorization")
+
+    async def sessionmaker_for(self, request: Request):
+        if self.replica is None or request.method not in SAFE_METHODS:
+            return self.primary
+        key = self.client_key(request)
+        if key is not None and self.recent_writers.get(key):
+            return self.primary
+        if await self.replica_lag() > self.max_lag:
+            return self.primary
+        return self.replica
+
+    def record_write(self, request: Request) -> None:
+        key = self.client_key(request)
+        if key is not None and request.method not in SAFE_METHODS:
+            self.recent_writers.set(key, True)
+
+    async def replica_lag(self) -> float:
+        now = time.monotonic()
+        if now - self._lag_checked_at < self.lag_check_interval:
+            return self._lag
+        self._lag_checked_at = now
+        try:
+            self._lag = await self.measure_lag()
+        except Exception as e:
+            logger.warning("Replica lag check failed, reading from primary: %s", e)
+            self._lag = float("inf")
+        return self._lag
+
+    async def measure_lag(self) -> float:
+        async with self.replica() as session:
+            conn = await session.connection()
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            result = await session.execute(text(POSTGRES_LAG_SQL))
+            return float(result.scalar() or 0)
@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession, table):
+    """Return an ``INSERT`` construct supporting ``ON CONFLICT`` for the session's backend.
+
+    Production runs on PostgreSQL, the test suite on SQLite; both dialects
+    implement ``on_conflict_do_nothing``/``on_conflict_do_update``.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -0,0 +1,52 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from app.db.models.schools import School
+
+
+class DataVersion(NamedTuple):
+    tag: str
+    updated_at: datetime | None
+
+
+async def bump_school_version(db: AsyncSession, *school_ids: int | None) -> None:
+    """Mark the data of ``school_ids`` as changed, in the caller's transaction."""
+    school_ids = {school_id for school_id in school_ids if school_id is not None}
+    if not school_ids:
+        return
+    await db.execute(
+        update(School)
+        .where(School.id.in_(school_ids))
+        .values(
+            data_version=School.data_version + 1,
+            data_updated_at=datetime.now(tz=timezone.utc),
+        )
+    )
+
+
+async def school_version(db: AsyncSession, school_id: int) -> DataVersion | None:
+    result = await db.execute(
+        select(School.data_version, School.data_updated_at).where(
+            School.id == school_id
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return DataVersion(str(row.data_version), row.data_updated_at)
+
+
+async def schools_version(db: AsyncSession) -> DataVersion:
+    """Version of the school list as a whole; changes with any school write."""
+    result = await db.execute(
+        select(
+            func.count(School.id),
+            func.max(School.id),
+            func.sum(School.data_version),
+            func.max(School.data_updated_at),
+        )
+    )
+    count, max_id, versions, updated_at = result.one()
+    return DataVersion(f"{count}.{max_id or 0}.{versions or 0}", updated_at)
@@ -1,24 +1,50 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
+from dataclasses import dataclass
 from typing import Annotated
 
+from app.schemas.auth import CurrentUser
 from app.schemas.users import UserTypes
-from app.db.models.users import User
 from app.services.auth import get_current_user
 from app.exceptions.auth import RoleNotAllowed
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@dataclass(frozen=True)
+class AuthContext:
+    """Authenticated principal of the current request."""
+
+    user: CurrentUser
+
+    @property
+    def role(self) -> UserTypes:
+        return self.user.type
+
+    @property
+    def school_id(self) -> int | None:
+        # Plain users (admins) have no school
+        return getattr(self.user, "school_id", None)
+
+
+async def get_auth_context(
+    request: Request, user: Annotated[CurrentUser, Depends(get_current_user)]
+) -> AuthContext:
+    """Build the auth context once per request and share it between dependencies."""
+    auth: AuthContext | None = getattr(request.state, "auth", None)
+    if auth is None:
+        auth = AuthContext(user=user)
+        request.state.auth = auth
+    return auth
+
+
 def check_role(required_roles: list[UserTypes] | UserTypes):
-    async def role_checker(user: Annotated[User, Depends(get_current_user)]):
-        if isinstance(required_roles, list):
-            if user.type in required_roles:
-                return user
-        else:
-            if user.type == required_roles:
-                print(required_roles)
-                return user
-        raise RoleNotAllowed(user.type)
+    if not isinstance(required_roles, list):
+        required_roles = [required_roles]
+
+    async def role_checker(auth: Annotated[AuthContext, Depends(get_auth_context)]):
+        if auth.role in required_roles:
+            return auth
+        raise RoleNotAllowed(auth.role)
 
     return role_checker
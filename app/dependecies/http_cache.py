@@ -0,0 +1,53 @@
+from fastapi import Request, Response
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from app.core.settings import settings
+from app.db.versions import DataVersion
+
+
+def cache_headers(scope: str, version: DataVersion) -> dict[str, str]:
+    headers = {
+        "ETag": f'W/"{scope}.{version.tag}"',
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Authorization",
+    }
+    if version.updated_at is not None:
+        updated_at = version.updated_at.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    scope: str,
+    version: DataVersion | None,
+) -> Response | None:
+    """Set the validators of a cacheable response.
+
+    Returns a ``304 Not Modified`` response when the client's copy is still
+    current, so the endpoint can skip the query and the serialization.
+    """
+    if version is None:
+        return None
+    headers = cache_headers(scope, version)
+    response.headers.update(headers)
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return None
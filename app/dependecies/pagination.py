@@ -0,0 +1,21 @@
+from fastapi import Query, Request, Response
+from typing import Annotated
+
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: Annotated[str | None, Query()] = None,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def set_next_link(request: Request, response: Response, page: Page) -> None:
+    """Point the ``Link: rel="next"`` header at the page after ``page``."""
+    if page.next_cursor is not None:
+        url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["Link"] = f'<{url}>; rel="next"'
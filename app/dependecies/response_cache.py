@@ -0,0 +1,65 @@
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.response_cache import response_cache
+from app.dependecies.auth import AuthContext
+
+# Headers already set on the endpoint's response that belong to the cached body
+FORWARDED_HEADERS = ("etag", "last-modified", "cache-control", "vary", "link")
+
+
+def cache_key(request: Request, auth: AuthContext) -> str:
+    """Key a response by role, the caller's school and the full query."""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f"{auth.role}:{auth.school_id}:{request.url.path}?{query}"
+
+
+def _forwarded(response: Response) -> dict[str, str]:
+    return {
+        name: response.headers[name]
+        for name in FORWARDED_HEADERS
+        if name in response.headers
+    }
+
+
+async def cached_response(
+    scope: str, key: str, response: Response
+) -> tuple[Response | None, int | None]:
+    """The cached response, if any, and the generation of ``scope`` it was read under.
+
+    The generation is taken before the endpoint queries anything and goes to
+    ``cache_response``, so a body built from data an invalidation has since
+    replaced is not stored.
+    """
+    generation = await response_cache.generation(scope)
+    if generation is None:
+        return None, None
+    value = await response_cache.get(scope, key, generation)
+    if value is None:
+        return None, generation
+    link, _, body = value.partition(b"\n")
+    headers = _forwarded(response)
+    if link:
+        headers["link"] = link.decode()
+    return (
+        Response(content=body, media_type="application/json", headers=headers),
+        generation,
+    )
+
+
+async def cache_response(
+    scope: str,
+    key: str,
+    response: Response,
+    items: list,
+    adapter: TypeAdapter,
+    generation: int | None,
+) -> Response:
+    """Serialize ``items`` once, store them and return them as the response."""
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    if generation is not None:
+        link = response.headers.get("link", "")
+        await response_cache.set(scope, key, link.encode() + b"\n" + body, generation)
+    return Response(
+        content=body, media_type="application/json", headers=_forwarded(response)
+    )
@@ -18,3 +18,7 @@ class UserDoesNotExist(Exception):
 
 class WrongPassword(Exception):
     pass
+
+
+class HashingBusy(Exception):
+    pass
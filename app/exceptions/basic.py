@@ -12,3 +12,7 @@ class NotAllowed(Exception):
 
 class NotFound(Exception):
     pass
+
+
+class InvalidCursor(Exception):
+    pass
@@ -1,20 +1,118 @@
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
+
+from app.core.settings import settings
+
+import json
 import logging
+import queue
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the ``extra`` fields of the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueues records unformatted.
+
+    ``QueueHandler.prepare`` renders the message on the calling thread; here
+    the arguments travel with the record and are only formatted by the
+    listener thread, off the event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in ``every`` info-or-lower records per call site of ``loggers``.
+
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, every: int, loggers: list[str]):
+        super().__init__()
+        self.every = every
+        self.loggers = tuple(loggers)
+        self.seen: dict[tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every <= 1 or record.levelno > logging.INFO:
+            return True
+        if not any(
+            record.name == name or record.name.startswith(name + ".")
+            for name in self.loggers
+        ):
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.seen.get(site, 0)
+        self.seen[site] = count + 1
+        return count % self.every == 0
+
+
+def parse_levels(levels: str) -> dict[str, str]:
+    return dict(item.strip().split("=", 1) for item in levels.split(",") if "=" in item)
+
+
+def _names(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
 
 
-formatter = logging.Formatter(
-    fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+def setup_logging(stream=None) -> QueueListener:
+    """Route the root logger through a queue to a background listener thread.
 
+    Handlers that touch the disk or the console only run on the listener
+    thread. Returns the started listener; stop it on shutdown to flush it.
+    """
+    if settings.LOG_JSON:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
 
-file_handling = logging.FileHandler("app/logging/E_diary.log")
-file_handling.setFormatter(formatter)
+    handlers = [logging.StreamHandler(stream)]
+    if settings.LOG_FILE:
+        handlers.append(
+            RotatingFileHandler(
+                settings.LOG_FILE,
+                maxBytes=settings.LOG_FILE_MAX_BYTES,
+                backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
 
-stream_handling = logging.StreamHandler()
-stream_handling.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter(settings.LOG_SAMPLE_EVERY, _names(settings.LOG_SAMPLED_LOGGERS))
+    )
 
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(settings.LOG_LEVEL)
+    root_logger.handlers.clear()
+    root_logger.addHandler(queue_handler)
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
 
-root_logger.handlers.clear()
-root_logger.addHandler(file_handling)
-root_logger.addHandler(stream_handling)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
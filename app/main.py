@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from fastapi import status, Request
 from fastapi.responses import JSONResponse
 
@@ -17,10 +18,31 @@ from app.api.v1.endpoints.attendance import attendances_router
 from app.api.v1.endpoints.student import student_router
 from app.api.v1.endpoints.invitations import invitations_router
 from app.api.v1.endpoints.grades import grades_router
+from app.api.v1.endpoints.monitoring import metrics_router, monitoring_router
+from app.api.v1.endpoints.exports import exports_router
 
-from app.logging.logger import *
+from app.core.metrics import MetricsMiddleware
+from app.core.settings import settings
+from app.core.security import hashing_pool
+from app.services.roll_service import RollScheduler
+from app.logging.logger import setup_logging
 
-app = FastAPI()
+log_listener = setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    roll_scheduler = RollScheduler()
+    if settings.ROLL_JOB_ENABLED:
+        roll_scheduler.start()
+    yield
+    await roll_scheduler.stop()
+    hashing_pool.shutdown()
+    log_listener.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -35,6 +57,9 @@ app.include_router(attendances_router)
 app.include_router(student_router)
 app.include_router(invitations_router)
 app.include_router(grades_router)
+app.include_router(exports_router)
+app.include_router(monitoring_router)
+app.include_router(metrics_router)
 
 
 @app.exception_handler(RoleNotAllowed)
@@ -1,5 +1,9 @@
 from pydantic import BaseModel
 from enum import Enum
+from datetime import date, time
+from typing import ClassVar
+
+from app.schemas.schedules import Week
 
 
 class StatusOptions(str, Enum):
@@ -15,6 +19,71 @@ class AttendanceOut(BaseModel):
     schedule_id: int
     marked_by: int | None
     status: StatusOptions
+    subject_name: str | None = None
+    student_name: str | None = None
+
+    loader_profile: ClassVar[dict[str, str]] = {
+        "schedule.subject": "joined",
+        "student": "joined",
+    }
 
     class Config:
         from_attributes = True
+
+
+class AttendanceSummaryOut(BaseModel):
+    student_id: int
+    term_start: date
+    term_end: date
+    lessons: int
+    present: int
+    late: int
+    excused: int
+    absent: int
+    rate: float | None
+    current_streak: int
+    longest_absence_streak: int
+    absences_by_weekday: dict[str, int]
+    absences_by_time: dict[str, int]
+
+
+class AttendanceScope(str, Enum):
+    group = "group"
+    subject = "subject"
+    teacher = "teacher"
+    weekday = "weekday"
+
+
+class AttendanceCounts(BaseModel):
+    lessons: int
+    present: int
+    late: int
+    excused: int
+    absent: int
+    rate: float | None
+
+
+class AttendanceRatesRow(AttendanceCounts):
+    key: int | str | None
+    label: str | None = None
+
+
+class AttendanceRatesOut(BaseModel):
+    by: AttendanceScope
+    overall: AttendanceCounts
+    rows: list[AttendanceRatesRow]
+
+
+class ChronicAbsenteeOut(BaseModel):
+    student_id: int
+    student_name: str
+    group_id: int | None
+    lessons: int
+    absent: int
+    excused: int
+    missed_rate: float
+
+
+class AttendanceHeatmapCell(AttendanceCounts):
+    day_of_week: Week
+    start_time: time
@@ -44,6 +44,18 @@ class PrincipalRegistrationDataOut(RegistrationDataOut):
     school_id: int | None = None
 
 
+class CurrentUser(BaseModel):
+    """Authenticated user as resolved from the access token claims or the database."""
+
+    id: int
+    username: str
+    type: str
+    school_id: int | None = None
+    group_id: int | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
 class LoginData(BaseModel):
     username: str
     password: str
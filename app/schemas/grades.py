@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
+from typing import ClassVar
 
 
 class GradeSystems(str, Enum):
@@ -10,6 +11,31 @@ class GradeSystems(str, Enum):
     five_num_sys = "5numerical"
 
 
+class GradeScope(str, Enum):
+    student = "student"
+    subject = "subject"
+    group = "group"
+    school = "school"
+
+
+class GradeStats(BaseModel):
+    count: int
+    avg: float
+    min: float
+    max: float
+
+
+class GradeAveragesRow(BaseModel):
+    id: int
+    grades: dict[str, GradeStats]
+
+
+class GradeAveragesOut(BaseModel):
+    by: GradeScope
+    overall: dict[str, GradeStats]
+    rows: list[GradeAveragesRow]
+
+
 class AssignGradeData(BaseModel):
     grade_system: GradeSystems | None = None
     value_letter: str | None = None
@@ -29,5 +55,31 @@ class GradeDataOut(BaseModel):
     schedule_id: int
     student_id: int
     marked_by: int | None = None
+    subject_name: str | None = None
+    teacher_name: str | None = None
+
+    loader_profile: ClassVar[dict[str, str]] = {
+        "schedule.subject": "joined",
+        "teacher": "joined",
+    }
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class LessonGradeEntry(BaseModel):
+    student_id: int
+    value_letter: str | None = None
+    value_numeric: float | None = None
+    value_boolean: bool | None = None
+
+
+class LessonGradesData(BaseModel):
+    grade_system: GradeSystems | None = None
+    marked_by: int | None = None
+    grades: list[LessonGradeEntry]
+
+
+class LessonGradeResult(BaseModel):
+    student_id: int
+    grade_id: int | None = None
+    error: str | None = None
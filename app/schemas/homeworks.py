@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import ClassVar
 
 
 class HomeworkData(BaseModel):
@@ -19,6 +20,15 @@ class HomeworkDataOut(BaseModel):
     subject_id: int
     group_id: int
     school_id: int
+    subject_name: str | None = None
+    teacher_name: str | None = None
+    group_label: str | None = None
+
+    loader_profile: ClassVar[dict[str, str]] = {
+        "subjects": "joined",
+        "teacher": "joined",
+        "group": "joined",
+    }
 
 
 class HomeworkDataUpdate(BaseModel):
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from enum import Enum
 from datetime import time
+from typing import ClassVar
 
 
 class Week(str, Enum):
@@ -41,3 +42,36 @@ class ScheduleDataOut(BaseModel):
     school_id: int
     subject_id: int
     teacher_id: int | None
+    subject_name: str | None = None
+    teacher_name: str | None = None
+    group_label: str | None = None
+
+    # Relationships the CRUD layer loads so the names above cost no extra query
+    loader_profile: ClassVar[dict[str, str]] = {
+        "subject": "joined",
+        "teacher": "joined",
+        "group": "joined",
+    }
+
+
+class ScheduleWeekOut(BaseModel):
+    school_id: int | None = None
+    group_id: int | None = None
+    teacher_id: int | None = None
+    days: dict[Week, list[ScheduleDataOut]]
+
+
+class TimetableResource(str, Enum):
+    group = "group"
+    teacher = "teacher"
+
+
+class ScheduleConflictOut(BaseModel):
+    resource: TimetableResource
+    resource_id: int
+    day_of_week: Week
+    # The two clashing lessons, earlier start first
+    schedule_ids: list[int]
+    # Where they overlap
+    start_time: time
+    end_time: time
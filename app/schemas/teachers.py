@@ -1,7 +1,26 @@
 from pydantic import BaseModel
+from datetime import date
 
 from app.schemas.attendance import StatusOptions
 
 
 class MarkPresenceData(BaseModel):
     status: StatusOptions
+    lesson_date: date | None = None
+
+
+class AttendanceMark(BaseModel):
+    student_id: int
+    status: StatusOptions
+
+
+class LessonAttendanceData(BaseModel):
+    lesson_date: date | None = None
+    marks: list[AttendanceMark]
+
+
+class AttendanceMarkResult(BaseModel):
+    student_id: int
+    attendance_id: int | None = None
+    status: StatusOptions | None = None
+    error: str | None = None
@@ -0,0 +1,46 @@
+import argparse
+from datetime import date
+
+from app.db.core import AsyncSessionLocal
+from app.exceptions.basic import AlreadyExistsError
+from app.services import attendance_archive
+
+
+async def main(start_years: list[int] | None, keep: int):
+    if not start_years:
+        # The newest closed year past the ``keep`` kept ones, run yearly
+        last_closed = attendance_archive.academic_year(date.today()) - 1
+        start_years = [last_closed - keep]
+    for start_year in start_years:
+        async with AsyncSessionLocal() as db:
+            try:
+                rows = await attendance_archive.archive_academic_year(db, start_year)
+            except AlreadyExistsError:
+                print(f"{start_year}/{start_year + 1}: already archived")
+                continue
+            print(f"{start_year}/{start_year + 1}: {rows} attendance rows archived")
+    return 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Move the attendance of closed academic years to archive files"
+    )
+    parser.add_argument(
+        "start_years",
+        type=int,
+        nargs="*",
+        help="Years the academic years to archive started in",
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=1,
+        help="Closed years to keep in the database when no year is given",
+    )
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(start_years=args.start_years, keep=args.keep)))
@@ -0,0 +1,25 @@
+import argparse
+
+from app.db.core import AsyncSessionLocal
+from app.services import attendance_bitmap
+
+
+async def main(student_ids: list[int] | None):
+    async with AsyncSessionLocal() as db:
+        rows = await attendance_bitmap.rebuild(db, student_ids=student_ids)
+        print(f"{rows} attendance bitmaps rebuilt")
+        return 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild the student attendance bitmaps from attendances"
+    )
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--student-id", type=int, action="append", dest="student_ids")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(student_ids=args.student_ids)))
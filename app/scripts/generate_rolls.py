@@ -0,0 +1,28 @@
+import argparse
+from datetime import date, timedelta
+
+from app.services.roll_service import generate_rolls
+
+
+async def main(start: date, days: int, school_ids: list[int] | None):
+    for offset in range(days):
+        lesson_date = start + timedelta(days=offset)
+        created = await generate_rolls(lesson_date=lesson_date, school_ids=school_ids)
+        print(
+            f"{lesson_date}: {sum(created.values())} attendance rows created "
+            f"for {len(created)} schools"
+        )
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    parser = argparse.ArgumentParser(
+        description="Pre-generate attendance rolls for upcoming lessons"
+    )
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--school-id", type=int, action="append", dest="school_ids")
+    args = parser.parse_args()
+
+    asyncio.run(main(start=args.date, days=args.days, school_ids=args.school_ids))
@@ -0,0 +1,31 @@
+import argparse
+
+from app.db.core import AsyncSessionLocal
+from app.services import grade_summary
+
+
+async def main(command: str, student_ids: list[int] | None):
+    async with AsyncSessionLocal() as db:
+        if command == "rebuild":
+            rows = await grade_summary.rebuild(db, student_ids=student_ids)
+            print(f"{rows} summary rows rebuilt")
+            return 0
+        drifted = await grade_summary.verify(db, student_ids=student_ids)
+        for student_id, subject_id, grade_system in drifted:
+            print(f"student {student_id} subject {subject_id} {grade_system}: drifted")
+        print(f"{len(drifted)} summary rows drifted")
+        return 1 if drifted else 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild or verify the student grade summary table"
+    )
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--student-id", type=int, action="append", dest="student_ids")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(command=args.command, student_ids=args.student_ids)))
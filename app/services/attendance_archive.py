@@ -0,0 +1,185 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Iterator
+
+from app.core.settings import settings
+from app.db.models.attendance import Attendance
+from app.db.models.schedules import Schedule
+from app.db.partitions import drop_attendance_partitions
+from app.exceptions.basic import AlreadyExistsError, NotAllowed
+
+import gzip
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Attendance rows of a closed academic year are moved to one gzipped NDJSON
+# file per year. School, group and subject are stored with each row so the
+# archive stays readable after the schedules it refers to are gone.
+ARCHIVE_COLUMNS = (
+    "id",
+    "lesson_date",
+    "status",
+    "student_id",
+    "schedule_id",
+    "group_id",
+    "subject_id",
+    "marked_by",
+    "school_id",
+)
+
+CHUNK_SIZE = 1000
+
+
+def academic_year(day: date) -> int:
+    """The year the academic year containing ``day`` started in."""
+    if day.month >= settings.ACADEMIC_YEAR_START_MONTH:
+        return day.year
+    return day.year - 1
+
+
+def academic_year_bounds(start_year: int) -> tuple[date, date]:
+    """``[start, end)`` dates of the academic year starting in ``start_year``."""
+    month = settings.ACADEMIC_YEAR_START_MONTH
+    return date(start_year, month, 1), date(start_year + 1, month, 1)
+
+
+def archive_path(start_year: int, archive_dir: str | None = None) -> str:
+    return os.path.join(
+        archive_dir or settings.ATTENDANCE_ARCHIVE_DIR,
+        f"attendances-{start_year}-{start_year + 1}.ndjson.gz",
+    )
+
+
+async def archive_academic_year(
+    db: AsyncSession,
+    start_year: int,
+    archive_dir: str | None = None,
+    today: date | None = None,
+) -> int:
+    """Move the attendance of a closed academic year into its archive file.
+
+    The file is written and renamed into place before the rows are removed,
+    so a failure leaves the data in the database. Returns the rows archived.
+    """
+    start, end = academic_year_bounds(start_year)
+    if end > (today or date.today()):
+        raise NotAllowed(f"Academic year {start_year}/{start_year + 1} is not closed")
+    path = archive_path(start_year, archive_dir)
+    if os.path.exists(path):
+        raise AlreadyExistsError(f"{path} already exists")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".partial"
+    stmt = (
+        select(
+            Attendance.id,
+            Attendance.lesson_date,
+            Attendance.status,
+            Attendance.student_id,
+            Attendance.schedule_id,
+            Schedule.group_id,
+            Schedule.subject_id,
+            Attendance.marked_by,
+            Schedule.school_id,
+        )
+        .join(Schedule, Schedule.id == Attendance.schedule_id)
+        .where(Attendance.lesson_date >= start, Attendance.lesson_date < end)
+        .order_by(Attendance.id)
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    archived = 0
+    try:
+        with gzip.open(partial, "wt", encoding="utf-8") as archive:
+            result = await db.stream(stmt)
+            async for rows in result.partitions(CHUNK_SIZE):
+                archive.writelines(
+                    json.dumps(dict(zip(ARCHIVE_COLUMNS, row)), default=str) + "\n"
+                    for row in rows
+                )
+                archived += len(rows)
+        os.replace(partial, path)
+    except Exception as e:
+        await db.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        logger.exception("Archiving attendance of %s failed: %s", start_year, e)
+        raise
+
+    try:
+        # Whole months go with their partition; the rest is deleted row by row
+        removed = await drop_attendance_partitions(db, start, end)
+        result = await db.execute(
+            delete(Attendance).where(
+                Attendance.lesson_date >= start, Attendance.lesson_date < end
+            )
+        )
+        removed += result.rowcount
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        os.remove(path)
+        logger.exception("Removing archived attendance of %s failed: %s", start_year, e)
+        raise
+    if removed != archived:
+        logger.warning(
+            "Archived %s attendance rows of %s but removed %s",
+            archived,
+            start_year,
+            removed,
+        )
+    logger.info("Archived %s attendance rows to %s", archived, path)
+    return archived
+
+
+def archived_years(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    archive_dir: str | None = None,
+) -> list[int]:
+    """Academic years with an archive file that overlap ``[date_from, date_to]``."""
+    directory = archive_dir or settings.ATTENDANCE_ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return []
+    years = []
+    for name in os.listdir(directory):
+        if not (name.startswith("attendances-") and name.endswith(".ndjson.gz")):
+            continue
+        start_year = int(name.split("-")[1])
+        start, end = academic_year_bounds(start_year)
+        if date_from is not None and end <= date_from:
+            continue
+        if date_to is not None and start > date_to:
+            continue
+        years.append(start_year)
+    return sorted(years)
+
+
+def read_archived(
+    school_id: int,
+    group_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    archive_dir: str | None = None,
+) -> Iterator[dict]:
+    """Archived attendance rows of a school, oldest year first.
+
+    This reads gzip files, so iterate it off the event loop.
+    """
+    for start_year in archived_years(date_from, date_to, archive_dir):
+        with gzip.open(archive_path(start_year, archive_dir), "rt") as archive:
+            for line in archive:
+                row = json.loads(line)
+                if row["school_id"] != school_id:
+                    continue
+                if group_id is not None and row["group_id"] != group_id:
+                    continue
+                lesson_date = date.fromisoformat(row["lesson_date"])
+                if date_from is not None and lesson_date < date_from:
+                    continue
+                if date_to is not None and lesson_date > date_to:
+                    continue
+                yield row
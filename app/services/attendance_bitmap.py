@@ -0,0 +1,416 @@
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from dataclasses import dataclass
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from typing import Iterable
+
+from app.core.settings import settings
+from app.db.models.attendance import Attendance
+from app.db.models.attendance_bitmap import StudentAttendanceBitmap
+from app.db.models.schedules import Schedule
+from app.db.utils import dialect_insert
+from app.schemas.attendance import StatusOptions
+from app.schemas.schedules import Week
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Each day of a term takes 64 bits: one per 30 minute slot (48 used) padded to
+# a power of two, so per-day questions become shifts and masks over the whole
+# bitmap instead of loops over lessons.
+#
+# Lessons of a student starting within the same slot, like 08:00-08:20 and
+# 08:20-08:40, share one bit. The bit then holds the earliest starting marked
+# lesson of the slot; the others are left out of the bitmaps and logged.
+SLOT_MINUTES = 30
+DAY_BITS = 64
+DAY_BYTES = DAY_BITS // 8
+STATUSES = tuple(status.value for status in StatusOptions)
+
+# (student_id, schedule_id, lesson_date, status); a status of None clears the slot
+Mark = tuple[int, int, date, str | None]
+
+
+def term_bounds(day: date) -> tuple[date, date]:
+    """``[start, end)`` of the term containing ``day``."""
+    starts = sorted(
+        date(year, month, 1)
+        for year in (day.year - 1, day.year, day.year + 1)
+        for month in settings.TERM_START_MONTHS
+    )
+    start = max(s for s in starts if s <= day)
+    return start, min(s for s in starts if s > start)
+
+
+def day_slot(start_time: time) -> int:
+    return (start_time.hour * 60 + start_time.minute) // SLOT_MINUTES
+
+
+def slot(term_start: date, lesson_date: date, start_time: time) -> int:
+    return (lesson_date - term_start).days * DAY_BITS + day_slot(start_time)
+
+
+def _to_int(value: bytes | None) -> int:
+    return int.from_bytes(value or b"", "little")
+
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+@lru_cache(maxsize=64)
+def _day_starts(days: int) -> int:
+    """Bit 0 of every day."""
+    return int.from_bytes((b"\x01" + bytes(DAY_BYTES - 1)) * days, "little")
+
+
+@lru_cache(maxsize=256)
+def _weekday_slots(term_start: date, days: int, weekday: int) -> int:
+    """Every slot of the days of the term falling on ``weekday``."""
+    first = term_start.weekday()
+    return int.from_bytes(
+        b"".join(
+            b"\xff" * DAY_BYTES if (first + day) % 7 == weekday else bytes(DAY_BYTES)
+            for day in range(days)
+        ),
+        "little",
+    )
+
+
+def _days(bits: int, days: int) -> int:
+    """Bit 0 of a day is set when any slot of that day is."""
+    for shift in (1, 2, 4, 8, 16, 32):
+        bits |= bits >> shift
+    return bits & _day_starts(days)
+
+
+@dataclass
+class TermAttendance:
+    term_start: date
+    term_end: date
+    present: int = 0
+    late: int = 0
+    excused: int = 0
+    absent: int = 0
+
+    @classmethod
+    def from_row(cls, row: StudentAttendanceBitmap) -> "TermAttendance":
+        return cls(
+            row.term_start,
+            term_bounds(row.term_start)[1],
+            **{status: _to_int(getattr(row, status)) for status in STATUSES},
+        )
+
+    @property
+    def days(self) -> int:
+        return (self.term_end - self.term_start).days
+
+    @property
+    def recorded(self) -> int:
+        return self.present | self.late | self.excused | self.absent
+
+    def mark(self, position: int, status: str | None) -> None:
+        keep = ~(1 << position)
+        for name in STATUSES:
+            setattr(self, name, getattr(self, name) & keep)
+        if status in STATUSES:
+            setattr(self, status, getattr(self, status) | 1 << position)
+
+    def counts(self) -> dict[str, int]:
+        return {name: getattr(self, name).bit_count() for name in STATUSES}
+
+    def rate(self) -> float | None:
+        """Share of lessons attended, present or late, leaving excused ones out."""
+        expected = (self.recorded & ~self.excused).bit_count()
+        if not expected:
+            return None
+        return (self.present | self.late).bit_count() / expected
+
+    def streaks(self) -> tuple[int, int]:
+        """Current run of attended days and the longest run of days with an absence.
+
+        Only days with a record count, so weekends and holidays do not break
+        a run.
+        """
+        recorded = _days(self.recorded, self.days)
+        absent = _days(self.absent, self.days)
+        # Per day: 0 nothing recorded, 1 attended, 2 absent at least once
+        codes = (recorded + absent).to_bytes(self.days * DAY_BYTES, "little")
+        codes = codes[::DAY_BYTES].replace(b"\x00", b"")
+        current = len(codes) - len(codes.rstrip(b"\x01"))
+        longest_absence = max((len(run) for run in codes.split(b"\x01")), default=0)
+        return current, longest_absence
+
+    def absences_by_weekday(self) -> dict[str, int]:
+        return {
+            day.value: (
+                self.absent & _weekday_slots(self.term_start, self.days, i)
+            ).bit_count()
+            for i, day in enumerate(Week)
+        }
+
+    def absences_by_time(self) -> dict[str, int]:
+        """Absences per lesson start slot of the day, like ``"08:00"``."""
+        counts = {}
+        absent = self.absent
+        day_starts = _day_starts(self.days)
+        for position in range(24 * 60 // SLOT_MINUTES):
+            count = (absent >> position & day_starts).bit_count()
+            if count:
+                minute = position * SLOT_MINUTES
+                counts[f"{minute // 60:02d}:{minute % 60:02d}"] = count
+        return counts
+
+    def summary(self) -> dict:
+        current, longest_absence = self.streaks()
+        return {
+            "term_start": self.term_start,
+            "term_end": self.term_end,
+            "lessons": self.recorded.bit_count(),
+            **self.counts(),
+            "rate": self.rate(),
+            "current_streak": current,
+            "longest_absence_streak": longest_absence,
+            "absences_by_weekday": self.absences_by_weekday(),
+            "absences_by_time": self.absences_by_time(),
+        }
+
+
+async def _slot_neighbours(db: AsyncSession, marks: list[Mark]) -> dict:
+    """Other marked lessons of the marked students and days, by slot of the day.
+
+    Values are ``(start_time, schedule_id, status)``, so ``min()`` picks the
+    lesson a shared slot keeps.
+    """
+    result = await db.execute(
+        select(
+            Attendance.student_id,
+            Attendance.lesson_date,
+            Schedule.start_time,
+            Attendance.schedule_id,
+            Attendance.status,
+        )
+        .join(Schedule, Schedule.id == Attendance.schedule_id)
+        .where(
+            tuple_(Attendance.student_id, Attendance.lesson_date).in_(
+                {(student_id, lesson_date) for student_id, _, lesson_date, _ in marks}
+            ),
+            Attendance.schedule_id.not_in({mark[1] for mark in marks}),
+            Attendance.is_marked,
+        )
+    )
+    neighbours = {}
+    for student_id, lesson_date, start_time, schedule_id, status in result:
+        neighbours.setdefault(
+            (student_id, lesson_date, day_slot(start_time)), []
+        ).append((start_time, schedule_id, status))
+    return neighbours
+
+
+async def apply_marks(
+    db: AsyncSession,
+    marks: Iterable[Mark],
+    start_times: dict[int, time] | None = None,
+) -> None:
+    """Write attendance marks into the bitmaps, in the caller's transaction.
+
+    Missing rows are created first so ``FOR UPDATE`` locks every row that is
+    then rewritten; the rewrite is a single executemany ``UPDATE``. A mark
+    whose slot is shared with another marked lesson writes the status of the
+    earliest of them instead, see the note at the top of the module.
+    """
+    marks = list(marks)
+    if not marks:
+        return
+    if start_times is None:
+        result = await db.execute(
+            select(Schedule.id, Schedule.start_time).where(
+                Schedule.id.in_({mark[1] for mark in marks})
+            )
+        )
+        start_times = dict(result.all())
+    neighbours = await _slot_neighbours(db, marks)
+
+    keys = {
+        (student_id, term_bounds(lesson_date)[0])
+        for student_id, _, lesson_date, _ in marks
+    }
+    await db.execute(
+        dialect_insert(db, StudentAttendanceBitmap)
+        .values(
+            [
+                {
+                    "student_id": student_id,
+                    "term_start": term_start,
+                    **{status: b"" for status in STATUSES},
+                    "updated_at": datetime.now(tz=timezone.utc),
+                }
+                for student_id, term_start in keys
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["student_id", "term_start"])
+    )
+    result = await db.execute(
+        select(StudentAttendanceBitmap)
+        .where(
+            tuple_(
+                StudentAttendanceBitmap.student_id, StudentAttendanceBitmap.term_start
+            ).in_(keys)
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    terms = {
+        (row.student_id, row.term_start): TermAttendance.from_row(row)
+        for row in result.scalars()
+    }
+
+    shared = set()
+    for student_id, schedule_id, lesson_date, status in marks:
+        term = terms[(student_id, term_bounds(lesson_date)[0])]
+        start_time = start_times[schedule_id]
+        others = neighbours.get((student_id, lesson_date, day_slot(start_time)))
+        if others:
+            lessons = list(others)
+            if status is not None:
+                lessons.append((start_time, schedule_id, status))
+            _, kept, status = min(lessons)
+            shared.add((schedule_id, lesson_date, kept))
+        term.mark(slot(term.term_start, lesson_date, start_time), status)
+    for schedule_id, lesson_date, kept in sorted(shared):
+        logger.warning(
+            "Schedule %s shares its attendance slot with another lesson on %s, "
+            "the bitmaps keep schedule %s",
+            schedule_id,
+            lesson_date,
+            kept,
+        )
+
+    now = datetime.now(tz=timezone.utc)
+    await db.execute(
+        update(StudentAttendanceBitmap),
+        [
+            {
+                "student_id": student_id,
+                "term_start": term_start,
+                **{status: _to_bytes(getattr(term, status)) for status in STATUSES},
+                "updated_at": now,
+            }
+            for (student_id, term_start), term in terms.items()
+        ],
+    )
+
+
+async def reslot_schedule(
+    db: AsyncSession,
+    schedule_id: int,
+    old_start: time,
+    new_start: time | None = None,
+) -> None:
+    """Move the marks of a schedule whose start time changes, in the caller's transaction.
+
+    Without ``new_start`` the marks are only cleared, for a schedule about to
+    be deleted along with its attendance.
+    """
+    result = await db.execute(
+        select(Attendance.student_id, Attendance.lesson_date, Attendance.status).where(
+            Attendance.schedule_id == schedule_id, Attendance.is_marked
+        )
+    )
+    rows = result.all()
+    await apply_marks(
+        db,
+        [(student_id, schedule_id, day, None) for student_id, day, _ in rows],
+        {schedule_id: old_start},
+    )
+    if new_start is not None:
+        await apply_marks(
+            db,
+            [
+                (student_id, schedule_id, day, status)
+                for student_id, day, status in rows
+            ],
+            {schedule_id: new_start},
+        )
+
+
+async def student_term(
+    db: AsyncSession, student_id: int, day: date | None = None
+) -> TermAttendance:
+    """The bitmaps of the term containing ``day``, empty if nothing was marked."""
+    start, end = term_bounds(day or date.today())
+    row = await db.get(StudentAttendanceBitmap, (student_id, start))
+    if row is None:
+        return TermAttendance(start, end)
+    return TermAttendance.from_row(row)
+
+
+async def rebuild(db: AsyncSession, student_ids: list[int] | None = None) -> int:
+    """Recompute the bitmaps from ``attendances``, for all or the given students."""
+    try:
+        stmt = delete(StudentAttendanceBitmap)
+        if student_ids is not None:
+            stmt = stmt.where(StudentAttendanceBitmap.student_id.in_(student_ids))
+        await db.execute(stmt)
+
+        query = select(
+            Attendance.student_id,
+            Attendance.lesson_date,
+            Attendance.status,
+            Schedule.start_time,
+        ).join(Schedule, Schedule.id == Attendance.schedule_id)
+        # Placeholder roll rows get their bit once somebody marks them
+        query = query.where(Attendance.is_marked)
+        if student_ids is not None:
+            query = query.where(Attendance.student_id.in_(student_ids))
+        # Lessons sharing a slot come one after the other, earliest first
+        query = query.order_by(
+            Attendance.student_id,
+            Attendance.lesson_date,
+            Schedule.start_time,
+            Attendance.schedule_id,
+        )
+        terms: dict[tuple[int, date], TermAttendance] = {}
+        previous, shared = None, 0
+        result = await db.stream(query.execution_options(yield_per=10_000))
+        async for student_id, lesson_date, status, start_time in result:
+            key = (student_id, lesson_date, day_slot(start_time))
+            if key == previous:
+                shared += 1
+                continue
+            previous = key
+            start, end = term_bounds(lesson_date)
+            term = terms.setdefault((student_id, start), TermAttendance(start, end))
+            term.mark(slot(start, lesson_date, start_time), status)
+
+        now = datetime.now(tz=timezone.utc)
+        if terms:
+            await db.execute(
+                StudentAttendanceBitmap.__table__.insert(),
+                [
+                    {
+                        "student_id": student_id,
+                        "term_start": term_start,
+                        **{
+                            status: _to_bytes(getattr(term, status))
+                            for status in STATUSES
+                        },
+                        "updated_at": now,
+                    }
+                    for (student_id, term_start), term in terms.items()
+                ],
+            )
+        await db.commit()
+        logger.info(
+            "Rebuilt %s attendance bitmaps, %s marks left out of shared slots",
+            len(terms),
+            shared,
+        )
+        return len(terms)
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Unexpected error occurred: %s", e)
+        raise
@@ -0,0 +1,244 @@
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from datetime import date
+
+from app.db.models.attendance import Attendance
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.subjects import Subject
+from app.db.models.types import Student
+from app.db.models.users import User
+from app.schemas.attendance import AttendanceScope, StatusOptions
+from app.schemas.schedules import Week
+from app.schemas.users import UserTypes
+from app.exceptions.basic import NotAllowed, NoDataError
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Everything is counted by the database; only one row per key comes back
+COUNTED_STATUSES = tuple(status.value for status in StatusOptions)
+
+WEEK_ORDER = {day.value: i for i, day in enumerate(Week)}
+
+# Key column, extra columns naming the key and the join needed for them
+SCOPE_COLUMNS = {
+    AttendanceScope.group: (
+        Schedule.group_id,
+        (Group.grade, Group.grade_section),
+        (Group, Group.id == Schedule.group_id),
+    ),
+    AttendanceScope.subject: (
+        Schedule.subject_id,
+        (Subject.name,),
+        (Subject, Subject.id == Schedule.subject_id),
+    ),
+    AttendanceScope.teacher: (
+        Schedule.teacher_id,
+        (User.first_name, User.last_name),
+        (User, User.id == Schedule.teacher_id),
+    ),
+    AttendanceScope.weekday: (Schedule.day_of_week, (), None),
+}
+
+
+def _count_columns():
+    return [func.count().label("lessons")] + [
+        func.count().filter(Attendance.status == status).label(status)
+        for status in COUNTED_STATUSES
+    ]
+
+
+def _counts(values) -> dict:
+    """Status counts of an aggregated row and the share of lessons attended.
+
+    Excused lessons are left out of the rate, late counts as attended.
+    """
+    counts = {name: values[name] for name in ("lessons", *COUNTED_STATUSES)}
+    expected = counts["lessons"] - counts["excused"]
+    counts["rate"] = (
+        (counts["present"] + counts["late"]) / expected if expected else None
+    )
+    return counts
+
+
+def _label(group_by: AttendanceScope, row) -> str | None:
+    match group_by:
+        case AttendanceScope.group if row.grade is not None:
+            return f"{row.grade}{row.grade_section}"
+        case AttendanceScope.subject:
+            return row.name
+        case AttendanceScope.teacher if row.first_name is not None:
+            return f"{row.first_name} {row.last_name}"
+        case AttendanceScope.weekday:
+            return row.key
+    return None
+
+
+def _scoped(
+    stmt,
+    school_id: int,
+    group_id: int | None = None,
+    teacher_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    # Placeholder roll rows and rolls generated ahead are not absences yet
+    stmt = stmt.join(Schedule, Schedule.id == Attendance.schedule_id).where(
+        Schedule.school_id == school_id,
+        Attendance.is_marked,
+        Attendance.lesson_date <= (date_to or date.today()),
+    )
+    if group_id is not None:
+        stmt = stmt.where(Schedule.group_id == group_id)
+    if teacher_id is not None:
+        stmt = stmt.where(Schedule.teacher_id == teacher_id)
+    if date_from is not None:
+        stmt = stmt.where(Attendance.lesson_date >= date_from)
+    return stmt
+
+
+def _check_school(user: User, school_id: int) -> None:
+    if user.type != UserTypes.admin and user.school_id != school_id:
+        logger.warning(
+            "User %s tried to read attendance stats of school %s. Not allowed",
+            user.id,
+            school_id,
+        )
+        raise NotAllowed("Not allowed to access other schools")
+
+
+class AttendanceStatsService:
+    @staticmethod
+    async def rates(
+        db: AsyncSession,
+        user: User,
+        school_id: int,
+        group_by: AttendanceScope,
+        group_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> dict:
+        """Attendance counts and rate per ``group_by`` key, in one query."""
+        _check_school(user, school_id)
+        key, label_columns, join = SCOPE_COLUMNS[group_by]
+        stmt = select(key.label("key"), *label_columns, *_count_columns()).select_from(
+            Attendance
+        )
+        stmt = _scoped(stmt, school_id, group_id, date_from=date_from, date_to=date_to)
+        if join is not None:
+            stmt = stmt.outerjoin(*join)
+        stmt = stmt.group_by(key, *label_columns)
+
+        result = await db.execute(stmt)
+        rows = [
+            {"key": row.key, "label": _label(group_by, row), **_counts(row._mapping)}
+            for row in result
+        ]
+        if not rows:
+            raise NoDataError("No attendance yet")
+        if group_by == AttendanceScope.weekday:
+            rows.sort(key=lambda row: WEEK_ORDER.get(row["key"], len(WEEK_ORDER)))
+
+        totals = {
+            name: sum(row[name] for row in rows)
+            for name in ("lessons", *COUNTED_STATUSES)
+        }
+        return {
+            "by": group_by.value,
+            "overall": _counts(totals),
+            "rows": rows,
+        }
+
+    @staticmethod
+    async def chronic_absentees(
+        db: AsyncSession,
+        user: User,
+        school_id: int,
+        group_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        threshold: float = 0.1,
+        min_lessons: int = 10,
+        limit: int = 100,
+    ) -> list[dict]:
+        """Students who missed at least ``threshold`` of their lessons, worst first.
+
+        Excused lessons count as missed, as usual for chronic absence.
+        """
+        _check_school(user, school_id)
+        students = Student.__table__
+        lessons = func.count()
+        absent = func.count().filter(Attendance.status == StatusOptions.absent.value)
+        excused = func.count().filter(Attendance.status == StatusOptions.excused.value)
+        missed = absent + excused
+        stmt = select(
+            Attendance.student_id,
+            User.first_name,
+            User.last_name,
+            students.c.group_id,
+            lessons.label("lessons"),
+            absent.label("absent"),
+            excused.label("excused"),
+        ).select_from(Attendance)
+        stmt = (
+            _scoped(stmt, school_id, group_id, date_from=date_from, date_to=date_to)
+            .join(User, User.id == Attendance.student_id)
+            .join(students, students.c.id == Attendance.student_id)
+            .group_by(
+                Attendance.student_id,
+                User.first_name,
+                User.last_name,
+                students.c.group_id,
+            )
+            .having(lessons >= min_lessons, missed >= threshold * lessons)
+            .order_by((missed * 1.0 / lessons).desc(), Attendance.student_id)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return [
+            {
+                "student_id": row.student_id,
+                "student_name": f"{row.first_name} {row.last_name}",
+                "group_id": row.group_id,
+                "lessons": row.lessons,
+                "absent": row.absent,
+                "excused": row.excused,
+                "missed_rate": (row.absent + row.excused) / row.lessons,
+            }
+            for row in result
+        ]
+
+    @staticmethod
+    async def heatmap(
+        db: AsyncSession,
+        user: User,
+        school_id: int,
+        group_id: int | None = None,
+        teacher_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[dict]:
+        """Attendance per weekday and lesson start time."""
+        _check_school(user, school_id)
+        stmt = select(
+            Schedule.day_of_week, Schedule.start_time, *_count_columns()
+        ).select_from(Attendance)
+        stmt = _scoped(stmt, school_id, group_id, teacher_id, date_from, date_to)
+        stmt = stmt.group_by(Schedule.day_of_week, Schedule.start_time)
+
+        result = await db.execute(stmt)
+        cells = [
+            {
+                "day_of_week": row.day_of_week,
+                "start_time": row.start_time,
+                **_counts(row._mapping),
+            }
+            for row in result
+        ]
+        cells.sort(
+            key=lambda cell: (WEEK_ORDER[cell["day_of_week"]], cell["start_time"])
+        )
+        return cells
@@ -2,16 +2,23 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import with_polymorphic
 from typing import Annotated
 from jose import jwt
 from jose.exceptions import JWTError
 
-from app.core.security import verify_password, hash_password, create_access_token
+from app.core.cache import TTLCache
+from app.core.security import (
+    verify_password_async,
+    hash_password_async,
+    create_access_token,
+)
 from app.db.models.users import User
 from app.db.models.types import Student, Teacher, Principal
 from app.db.core import get_async_db
 from app.schemas.auth import (
     Token,
+    CurrentUser,
     TeacherRegistrationData,
     StudentRegistrationData,
     PrincipalRegistrationData,
@@ -21,33 +28,112 @@ from app.exceptions.auth import (
     UserExists,
     UserDoesNotExist,
     WrongPassword,
+    HashingBusy,
 )
 from app.core.settings import settings
 
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+
+# Claims of tokens issued before this process started, or before the user's
+# school/group last changed here, may be stale and are verified against the DB.
+# Other workers only learn of a change through the age limit in
+# _principal_from_claims, like their cached principals expire after the TTL.
+_claims_trusted_after = time.time()
+_invalidated_at: dict[int, float] = {}
+
+
+def invalidate_principal(user_id: int | None = None) -> None:
+    """Drop a cached principal, or every principal when ``user_id`` is None.
+
+    Must be called whenever a user is deleted or their school/group changes.
+    """
+    global _claims_trusted_after
+    now = time.time()
+    if user_id is None:
+        principal_cache.clear()
+        _invalidated_at.clear()
+        _claims_trusted_after = now
+    else:
+        principal_cache.pop(user_id)
+        _invalidated_at[user_id] = now
+
+
+def _principal_from_user(user: User) -> CurrentUser:
+    return CurrentUser(
+        id=user.id,
+        username=user.username,
+        type=user.type,
+        school_id=getattr(user, "school_id", None),
+        group_id=getattr(user, "group_id", None),
+    )
+
+
+def _principal_from_claims(payload: dict) -> CurrentUser | None:
+    if "school_id" not in payload or "iat" not in payload:
+        return None
+    issued_at = payload["iat"]
+    if issued_at <= max(_claims_trusted_after, _invalidated_at.get(payload["id"], 0)):
+        return None
+    # Trusted no longer than a cached principal, after that the DB is asked again
+    if issued_at <= time.time() - settings.AUTH_CACHE_TTL:
+        return None
+    return CurrentUser(
+        id=payload["id"],
+        username=payload["username"],
+        type=payload["role"],
+        school_id=payload["school_id"],
+        group_id=payload.get("group_id"),
+    )
+
+
+async def load_principal(db: AsyncSession, user_id: int) -> CurrentUser:
+    """Load a user with its school/group columns in a single query."""
+    users = with_polymorphic(User, "*")
+    result = await db.execute(select(users).where(users.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        logger.info("User with id %s does not exist", user_id)
+        raise UserDoesNotExist("User does not exist")
+    return _principal_from_user(user)
+
 
 async def login_user(db: AsyncSession, user_data: OAuth2PasswordRequestForm) -> Token:
     try:
         username = user_data.username
         password = user_data.password
-        result = await db.execute(select(User).where(User.username == username))
+        users = with_polymorphic(User, "*")
+        result = await db.execute(select(users).where(users.username == username))
         user = result.scalar_one_or_none()
         if user is None:
             raise UserDoesNotExist("User not found")
-        verify = verify_password(password, user.hashed_password)
+        verify = await verify_password_async(password, user.hashed_password)
         if verify:
-            payload = {"id": user.id, "username": user.username, "role": user.type}
+            principal = _principal_from_user(user)
+            payload = {
+                "id": user.id,
+                "username": user.username,
+                "role": user.type,
+                "school_id": principal.school_id,
+                "group_id": principal.group_id,
+            }
             access_token = create_access_token(payload)
             return Token(access_token=access_token, token_type="Bearer")
         else:
             raise WrongPassword("Wrong password")
+    except HashingBusy:
+        logger.warning("Login of %s rejected: hashing pool is full", user_data.username)
+        raise
     except Exception as e:
-        logger.exception(f"Unexpected error occurred: {e}")
+        logger.exception("Unexpected error occurred: %s", e)
         raise
 
 
@@ -63,7 +149,9 @@ async def register_teacher(db: AsyncSession, user_data: TeacherRegistrationData)
             raise RoleNotAllowed("Cannot register as admin. Forbidden")
 
         user_dict = user_data.model_dump()
-        user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
+        user_dict["hashed_password"] = await hash_password_async(
+            user_dict.pop("password")
+        )
         user = Teacher(**user_dict)
 
         db.add(user)
@@ -71,7 +159,7 @@ async def register_teacher(db: AsyncSession, user_data: TeacherRegistrationData)
         await db.refresh(user)
         return user
     except Exception as e:
-        logger.exception(f"Unexpected error occurred: {e}")
+        logger.exception("Unexpected error occurred: %s", e)
         await db.rollback()
         raise
 
@@ -87,7 +175,9 @@ async def register_student(db: AsyncSession, user_data: StudentRegistrationData)
             raise RoleNotAllowed("Cannot register as admin")
 
         user_dict = user_data.model_dump()
-        user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
+        user_dict["hashed_password"] = await hash_password_async(
+            user_dict.pop("password")
+        )
         student = Student(**user_dict)
 
         db.add(student)
@@ -95,7 +185,7 @@ async def register_student(db: AsyncSession, user_data: StudentRegistrationData)
         await db.refresh(student)
         return student
     except Exception as e:
-        logger.exception(f"Unexpected error occurred: {e}")
+        logger.exception("Unexpected error occurred: %s", e)
         await db.rollback()
         raise
 
@@ -112,7 +202,9 @@ async def register_principal(db: AsyncSession, user_data: PrincipalRegistrationD
             raise RoleNotAllowed("Cannot register as admin. Forbidden")
 
         user_dict = user_data.model_dump()
-        user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
+        user_dict["hashed_password"] = await hash_password_async(
+            user_dict.pop("password")
+        )
         principal = Principal(**user_dict)
 
         db.add(principal)
@@ -120,7 +212,7 @@ async def register_principal(db: AsyncSession, user_data: PrincipalRegistrationD
         await db.refresh(principal)
         return principal
     except Exception as e:
-        logger.exception(f"Unexpected error occurred: {e}")
+        logger.exception("Unexpected error occurred: %s", e)
         await db.rollback()
         raise
 
@@ -128,15 +220,15 @@ async def register_principal(db: AsyncSession, user_data: PrincipalRegistrationD
 async def get_current_user(
     db: Annotated[AsyncSession, Depends(get_async_db)],
     token: Annotated[str, Depends(oauth2_scheme)],
-) -> User:
+) -> CurrentUser:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
-        result = await db.execute(select(User).where(User.id == payload.get("id")))
-        user = result.scalar_one_or_none()
+        user_id = payload.get("id")
+        user = principal_cache.get(user_id)
         if user is None:
-            logger.info(f'User with id {payload["id"]} does not exist')
-            raise UserDoesNotExist("User does not exist")
+            user = _principal_from_claims(payload) or await load_principal(db, user_id)
+            principal_cache.set(user_id, user)
         return user
     except JWTError as e:
-        logger.info(f"Invalid token passed: {e}")
+        logger.info("Invalid token passed: %s", e)
         raise
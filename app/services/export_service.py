@@ -0,0 +1,181 @@
+from sqlalchemy import Select, select
+from datetime import date, datetime, time
+from typing import AsyncIterator, Iterator
+from itertools import islice
+
+from app.db.models.attendance import Attendance
+from app.db.models.grades import Grade
+from app.db.models.homeworks import Homework
+from app.db.models.schedules import Schedule
+from app.db.models.users import User
+from app.exceptions.basic import NotAllowed
+from app.schemas.exports import ExportFormat
+from app.schemas.users import UserTypes
+
+import asyncio
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor and written per chunk
+CHUNK_SIZE = 1000
+
+
+def _json_default(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(columns: list[str], rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+class ExportService:
+    @staticmethod
+    def check_school(user: User, school_id: int) -> None:
+        if user.type != UserTypes.admin and user.school_id != school_id:
+            logger.warning(
+                "User %s tried to export data of school %s. Not allowed",
+                user.id,
+                school_id,
+            )
+            raise NotAllowed("Cannot export data of other schools")
+
+    @staticmethod
+    def attendances(
+        user: User,
+        school_id: int,
+        group_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Select:
+        ExportService.check_school(user, school_id)
+        stmt = (
+            select(
+                Attendance.id,
+                Attendance.lesson_date,
+                Attendance.status,
+                Attendance.student_id,
+                Attendance.schedule_id,
+                Schedule.group_id,
+                Schedule.subject_id,
+                Attendance.marked_by,
+            )
+            .join(Schedule, Schedule.id == Attendance.schedule_id)
+            .where(Schedule.school_id == school_id)
+        )
+        if group_id is not None:
+            stmt = stmt.where(Schedule.group_id == group_id)
+        if date_from is not None:
+            stmt = stmt.where(Attendance.lesson_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Attendance.lesson_date <= date_to)
+        return stmt.order_by(Attendance.id)
+
+    @staticmethod
+    def grades(
+        user: User,
+        school_id: int,
+        group_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Select:
+        ExportService.check_school(user, school_id)
+        stmt = (
+            select(
+                Grade.id,
+                Grade.created_at,
+                Grade.grade_system,
+                Grade.value_letter,
+                Grade.value_percent,
+                Grade.value_GPA,
+                Grade.value_passing,
+                Grade.value_5numerical,
+                Grade.student_id,
+                Grade.schedule_id,
+                Schedule.group_id,
+                Schedule.subject_id,
+                Grade.marked_by,
+            )
+            .join(Schedule, Schedule.id == Grade.schedule_id)
+            .where(Schedule.school_id == school_id)
+        )
+        if group_id is not None:
+            stmt = stmt.where(Schedule.group_id == group_id)
+        if date_from is not None:
+            stmt = stmt.where(Grade.created_at >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Grade.created_at < datetime.combine(date_to, time.max))
+        return stmt.order_by(Grade.id)
+
+    @staticmethod
+    def homeworks(
+        user: User,
+        school_id: int,
+        group_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Select:
+        ExportService.check_school(user, school_id)
+        stmt = select(
+            Homework.id,
+            Homework.name,
+            Homework.description,
+            Homework.due_date,
+            Homework.group_id,
+            Homework.subject_id,
+            Homework.teacher_id,
+        ).where(Homework.school_id == school_id)
+        if group_id is not None:
+            stmt = stmt.where(Homework.group_id == group_id)
+        if date_from is not None:
+            stmt = stmt.where(Homework.due_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Homework.due_date < datetime.combine(date_to, time.max))
+        return stmt.order_by(Homework.id)
+
+    @staticmethod
+    async def stream(
+        session_factory,
+        stmt: Select,
+        export_format: ExportFormat,
+        archived: Iterator[dict] | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield ``stmt`` rows encoded in chunks of ``CHUNK_SIZE``.
+
+        Runs in its own session: the response body is sent after the
+        request-scoped session has already been closed. ``archived`` rows,
+        read in a worker thread, are sent before the database rows.
+        """
+        columns = [column.name for column in stmt.selected_columns]
+        if export_format == ExportFormat.csv:
+            yield _encode_csv([columns])
+        if archived is not None:
+            while chunk := await asyncio.to_thread(
+                lambda: list(islice(archived, CHUNK_SIZE))
+            ):
+                rows = [tuple(row[column] for column in columns) for row in chunk]
+                if export_format == ExportFormat.csv:
+                    yield _encode_csv(rows)
+                else:
+                    yield _encode_ndjson(columns, rows)
+        async with session_factory() as session:
+            result = await session.stream(stmt.execution_options(yield_per=CHUNK_SIZE))
+            async for rows in result.partitions(CHUNK_SIZE):
+                if export_format == ExportFormat.csv:
+                    yield _encode_csv(rows)
+                else:
+                    yield _encode_ndjson(columns, rows)
@@ -0,0 +1,251 @@
+from sqlalchemy import Float, Integer, cast, delete, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from datetime import datetime, timezone
+
+from app.db.models.grades import Grade
+from app.db.models.grade_summary import StudentGradeSummary
+from app.db.models.schedules import Schedule
+from app.db.utils import dialect_insert
+from app.schemas.grades import GradeSystems
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Grade systems kept in the summary and the Grade attribute holding their value.
+# Pass/fail is summed as 1/0, letter grades are not numeric and are skipped.
+SUMMARY_VALUES = {
+    GradeSystems.percent_sys: "value_percent",
+    GradeSystems.GPA_sys: "value_GPA",
+    GradeSystems.five_num_sys: "value_5numerical",
+    GradeSystems.pass_fail_sys: "value_passing",
+}
+
+NO_SUBJECT = 0
+
+
+def grade_values(grade: Grade) -> list[tuple[GradeSystems, float]]:
+    return [
+        (system, float(getattr(grade, attr)))
+        for system, attr in SUMMARY_VALUES.items()
+        if getattr(grade, attr) is not None
+    ]
+
+
+def add_deltas(
+    deltas: dict, grade: Grade, subject_id: int | None, sign: int = 1
+) -> dict:
+    """Accumulate the change one grade makes to the running totals into ``deltas``."""
+    for system, value in grade_values(grade):
+        key = (grade.student_id, subject_id or NO_SUBJECT, system.value)
+        count, total, total_sq = deltas.get(key, (0, 0.0, 0.0))
+        deltas[key] = (count + sign, total + sign * value, total_sq + sign * value**2)
+    return deltas
+
+
+async def apply_deltas(db: AsyncSession, deltas: dict) -> None:
+    """Upsert accumulated deltas in one statement, in the caller's transaction.
+
+    The summary therefore commits or rolls back together with the grades.
+    """
+    if not deltas:
+        return
+    now = datetime.now(tz=timezone.utc)
+    stmt = dialect_insert(db, StudentGradeSummary).values(
+        [
+            {
+                "student_id": student_id,
+                "subject_id": subject_id,
+                "grade_system": grade_system,
+                "count": count,
+                "sum": total,
+                "sum_sq": total_sq,
+                "last_updated": now,
+            }
+            for (student_id, subject_id, grade_system), (
+                count,
+                total,
+                total_sq,
+            ) in deltas.items()
+        ]
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["student_id", "subject_id", "grade_system"],
+            set_={
+                "count": StudentGradeSummary.count + stmt.excluded.count,
+                "sum": StudentGradeSummary.sum + stmt.excluded.sum,
+                "sum_sq": StudentGradeSummary.sum_sq + stmt.excluded.sum_sq,
+                "last_updated": stmt.excluded.last_updated,
+            },
+        )
+    )
+
+
+async def apply_grade(
+    db: AsyncSession, grade: Grade, subject_id: int | None, sign: int = 1
+) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) one grade from the running totals."""
+    await apply_deltas(db, add_deltas({}, grade, subject_id, sign))
+
+
+def _grade_columns():
+    return [
+        Grade.student_id,
+        *(getattr(Grade, attr) for attr in SUMMARY_VALUES.values()),
+    ]
+
+
+async def remove_grades(db: AsyncSession, *criteria) -> None:
+    """Take the grades matching ``criteria`` out of the totals, in the caller's transaction.
+
+    For deletes that reach ``grades`` through ``ON DELETE CASCADE``, called
+    before the parent row is deleted.
+    """
+    result = await db.execute(
+        select(Schedule.subject_id, *_grade_columns())
+        .join(Schedule, Schedule.id == Grade.schedule_id)
+        .where(*criteria)
+    )
+    deltas = {}
+    for row in result:
+        add_deltas(deltas, row, row.subject_id, sign=-1)
+    await apply_deltas(db, deltas)
+
+
+async def move_grades(
+    db: AsyncSession, old_subject_id: int | None, new_subject_id: int | None, *criteria
+) -> None:
+    """Move the grades matching ``criteria`` to the totals of another subject."""
+    if (old_subject_id or NO_SUBJECT) == (new_subject_id or NO_SUBJECT):
+        return
+    result = await db.execute(
+        select(*_grade_columns())
+        .join(Schedule, Schedule.id == Grade.schedule_id)
+        .where(*criteria)
+    )
+    deltas = {}
+    for row in result:
+        add_deltas(deltas, row, old_subject_id, sign=-1)
+        add_deltas(deltas, row, new_subject_id)
+    await apply_deltas(db, deltas)
+
+
+async def student_averages(db: AsyncSession, student_id: int) -> dict[str, float]:
+    """Average per grade system over all subjects, read from the summary."""
+    result = await db.execute(
+        select(
+            StudentGradeSummary.grade_system,
+            func.sum(StudentGradeSummary.count),
+            func.sum(StudentGradeSummary.sum),
+        )
+        .where(StudentGradeSummary.student_id == student_id)
+        .group_by(StudentGradeSummary.grade_system)
+    )
+    return {system: total / count for system, count, total in result if count}
+
+
+def _value_column(attr: str):
+    column = getattr(Grade, attr)
+    if attr == "value_passing":
+        column = cast(column, Integer)
+    return cast(column, Float)
+
+
+def _summary_select(student_ids: list[int] | None = None):
+    """One ``SELECT`` per grade system computing the summary rows from ``grades``."""
+    now = datetime.now(tz=timezone.utc)
+    for system, attr in SUMMARY_VALUES.items():
+        value = _value_column(attr)
+        subject_id = func.coalesce(Schedule.subject_id, NO_SUBJECT)
+        stmt = (
+            select(
+                Grade.student_id,
+                subject_id.label("subject_id"),
+                literal(system.value).label("grade_system"),
+                func.count().label("count"),
+                func.sum(value).label("sum"),
+                func.sum(value * value).label("sum_sq"),
+                literal(now).label("last_updated"),
+            )
+            .join(Schedule, Schedule.id == Grade.schedule_id)
+            .where(getattr(Grade, attr).is_not(None))
+            .group_by(Grade.student_id, subject_id)
+        )
+        if student_ids is not None:
+            stmt = stmt.where(Grade.student_id.in_(student_ids))
+        yield stmt
+
+
+async def rebuild(db: AsyncSession, student_ids: list[int] | None = None) -> int:
+    """Recompute the summary from ``grades``, for all or the given students."""
+    try:
+        stmt = delete(StudentGradeSummary)
+        if student_ids is not None:
+            stmt = stmt.where(StudentGradeSummary.student_id.in_(student_ids))
+        await db.execute(stmt)
+
+        columns = [
+            "student_id",
+            "subject_id",
+            "grade_system",
+            "count",
+            "sum",
+            "sum_sq",
+            "last_updated",
+        ]
+        inserted = 0
+        for select_stmt in _summary_select(student_ids):
+            result = await db.execute(
+                StudentGradeSummary.__table__.insert().from_select(columns, select_stmt)
+            )
+            inserted += result.rowcount
+        await db.commit()
+        logger.info("Rebuilt %s grade summary rows", inserted)
+        return inserted
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Unexpected error occurred: %s", e)
+        raise
+
+
+async def verify(
+    db: AsyncSession, student_ids: list[int] | None = None, tolerance: float = 1e-6
+) -> list[tuple]:
+    """Compare the summary with ``grades`` and return the keys that drifted."""
+    expected = {}
+    for stmt in _summary_select(student_ids):
+        for row in await db.execute(stmt):
+            expected[(row.student_id, row.subject_id, row.grade_system)] = (
+                row.count,
+                row.sum,
+                row.sum_sq,
+            )
+    stmt = select(StudentGradeSummary)
+    if student_ids is not None:
+        stmt = stmt.where(StudentGradeSummary.student_id.in_(student_ids))
+    result = await db.execute(stmt)
+    stored = {
+        (row.student_id, row.subject_id, row.grade_system): (
+            row.count,
+            row.sum,
+            row.sum_sq,
+        )
+        for row in result.scalars()
+        if row.count
+    }
+
+    drifted = []
+    for key in expected.keys() | stored.keys():
+        want, have = expected.get(key), stored.get(key)
+        if (
+            want is None
+            or have is None
+            or want[0] != have[0]
+            or any(abs(a - b) > tolerance for a, b in zip(want[1:], have[1:]))
+        ):
+            drifted.append(key)
+    if drifted:
+        logger.warning("%s grade summary rows drifted from grades", len(drifted))
+    return sorted(drifted)
@@ -1,102 +1,178 @@
+from sqlalchemy import Integer, cast, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.db.models.users import User
 from app.db.models.types import Student
 from app.db.models.grades import Grade
+from app.db.models.schedules import Schedule
+from app.schemas.grades import GradeScope, GradeSystems
 from app.schemas.users import UserTypes
-from app.exceptions.auth import RoleNotAllowed
 from app.exceptions.basic import NotAllowed, NotFound, NoDataError
+from app.services.grade_summary import student_averages
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-
-async def sort_grades(student_grades: list[Grade]):
-    grades_percent = ["percent"]
-    grades_GPA = ["GPA"]
-    grades_5numeric = ["5numeric"]
-    grades_passing = ["passing"]
-    grades_letter = ["letter"]
-
-    for student_grade in student_grades:
-        if student_grade.value_percent is not None:
-            grades_percent.append(student_grade.value_percent)
-        elif student_grade.value_GPA is not None:
-            grades_GPA.append(student_grade.value_GPA)
-        elif student_grade.value_5numerical is not None:
-            grades_5numeric.append(student_grade.value_5numerical)
-        elif student_grade.value_passing is not None:
-            grades_passing.append(student_grade.value_passing)
-        elif student_grade.value_letter is not None:
-            grades_letter.append(student_grade.value_letter)
-
-    sorted_grades = []
-    if len(grades_percent) > 1:
-        sorted_grades.append(grades_percent)
-    if len(grades_GPA) > 1:
-        sorted_grades.append(grades_GPA)
-    if len(grades_5numeric) > 1:
-        sorted_grades.append(grades_5numeric)
-    if len(grades_passing) > 1:
-        sorted_grades.append(grades_passing)
-    if len(grades_letter) > 1:
-        sorted_grades.append(grades_letter)
-
-    return sorted_grades
+# Grade systems that can be averaged and the column holding their value.
+# Pass/fail averages to the pass rate; letter grades are not aggregated.
+AGGREGATED_VALUES = {
+    GradeSystems.percent_sys: Grade.value_percent,
+    GradeSystems.GPA_sys: Grade.value_GPA,
+    GradeSystems.five_num_sys: Grade.value_5numerical,
+    GradeSystems.pass_fail_sys: cast(Grade.value_passing, Integer),
+}
+
+# Keys of the student average response. Pass/fail and letter grades are not
+# averaged there, and five-point grades keep their original "5numeric" key.
+STUDENT_AVERAGE_KEYS = {
+    GradeSystems.percent_sys.value: "percent",
+    GradeSystems.GPA_sys.value: "GPA",
+    GradeSystems.five_num_sys.value: "5numeric",
+}
+
+SCOPE_COLUMNS = {
+    GradeScope.student: Grade.student_id,
+    GradeScope.subject: Schedule.subject_id,
+    GradeScope.group: Schedule.group_id,
+    GradeScope.school: Schedule.school_id,
+}
+
+
+def _stats_columns():
+    columns = []
+    for system, value in AGGREGATED_VALUES.items():
+        columns += [
+            func.count(value).label(f"{system.value}_count"),
+            func.avg(value).label(f"{system.value}_avg"),
+            func.min(value).label(f"{system.value}_min"),
+            func.max(value).label(f"{system.value}_max"),
+        ]
+    return columns
+
+
+def _stats_from_row(row) -> dict:
+    stats = {}
+    for system in AGGREGATED_VALUES:
+        count = row._mapping[f"{system.value}_count"]
+        if not count:
+            continue
+        stats[system.value] = {
+            "count": count,
+            "avg": float(row._mapping[f"{system.value}_avg"]),
+            "min": float(row._mapping[f"{system.value}_min"]),
+            "max": float(row._mapping[f"{system.value}_max"]),
+        }
+    return stats
+
+
+def combine_stats(rows: list[dict]) -> dict:
+    """Merge per-key stats into overall stats, weighting averages by count."""
+    overall = {}
+    for stats in rows:
+        for system, item in stats.items():
+            total = overall.setdefault(
+                system, {"count": 0, "sum": 0.0, "min": item["min"], "max": item["max"]}
+            )
+            total["count"] += item["count"]
+            total["sum"] += item["avg"] * item["count"]
+            total["min"] = min(total["min"], item["min"])
+            total["max"] = max(total["max"], item["max"])
+    return {
+        system: {
+            "count": total["count"],
+            "avg": total["sum"] / total["count"],
+            "min": total["min"],
+            "max": total["max"],
+        }
+        for system, total in overall.items()
+    }
 
 
 class GradeService:
-    def __init__(self, grades, student: Student):
-        self.grades = grades
-        self.user = student  # Can possibly use later
-
-    @classmethod
-    async def create(cls, db: AsyncSession, user: User, student_id: int):
-        # get student
-        result = await db.execute(select(Student).where(Student.id == student_id))
-        student: Student | None = result.scalar_one_or_none()
+    @staticmethod
+    async def aggregate(
+        db: AsyncSession,
+        group_by: GradeScope,
+        school_id: int | None = None,
+        group_id: int | None = None,
+        subject_id: int | None = None,
+        student_id: int | None = None,
+    ) -> dict[int, dict]:
+        """COUNT/AVG/MIN/MAX per grade system, grouped by ``group_by``, in one query."""
+        key = SCOPE_COLUMNS[group_by]
+        stmt = (
+            select(key.label("key"), *_stats_columns())
+            .join(Schedule, Schedule.id == Grade.schedule_id)
+            .group_by(key)
+        )
+        if school_id is not None:
+            stmt = stmt.where(Schedule.school_id == school_id)
+        if group_id is not None:
+            stmt = stmt.where(Schedule.group_id == group_id)
+        if subject_id is not None:
+            stmt = stmt.where(Schedule.subject_id == subject_id)
+        if student_id is not None:
+            stmt = stmt.where(Grade.student_id == student_id)
+
+        result = await db.execute(stmt)
+        summary = {}
+        for row in result:
+            stats = _stats_from_row(row)
+            if stats:
+                summary[row.key] = stats
+        return summary
 
+    @staticmethod
+    async def student_average(db: AsyncSession, user: User, student_id: int) -> dict:
+        student: Student | None = await db.get(Student, student_id)
         if not student:
             raise NotFound("Student not found")
 
         if user.type != UserTypes.admin:
             if user.school_id != student.school_id:
                 raise NotAllowed("Not allowed to access other schools")
-
-        if student.type != UserTypes.student:
-            raise RoleNotAllowed(
-                [UserTypes.admin, UserTypes.principal, UserTypes.teacher]
-            )
-
-        # get grades
-        result = await db.execute(select(Grade).where(Grade.student_id == student.id))
-        grades_raw = result.scalars().all()
-
-        grades = await sort_grades(grades_raw)
-
-        return cls(grades=grades, student=student)
-
-    def average(self):
-        summary = {}
-        for grade in self.grades:
-            if grade[0] in ("letter", "passing"):
-                logger.debug(
-                    f'Skipped "{grade}" of student {self.user}. Cannot average booleans or strings'
-                )
-                continue
-
-            grade_type = grade.pop(0)
-            if not grade:
-                logger.debug(
-                    f'Skipped "{grade}" of student {self.user}. Cannot average empty lists'
+        # Grades are personal data, classmates may not read each other's
+        if user.type == UserTypes.student and user.id != student_id:
+            raise NotAllowed("Not allowed to access grades of other students")
+
+        # Running totals kept by TeacherService, no scan over the grade history
+        averages = {
+            STUDENT_AVERAGE_KEYS[system]: average
+            for system, average in (await student_averages(db, student_id)).items()
+            if system in STUDENT_AVERAGE_KEYS
+        }
+        if not averages:
+            raise NoDataError("Student doesn't have grades yet")
+        return averages
+
+    @staticmethod
+    async def averages(
+        db: AsyncSession,
+        user: User,
+        group_by: GradeScope,
+        school_id: int | None = None,
+        group_id: int | None = None,
+    ) -> dict:
+        if user.type != UserTypes.admin:
+            if school_id is not None and user.school_id != school_id:
+                logger.warning(
+                    "User %s tried to read grades of school %s. Not allowed",
+                    user.id,
+                    school_id,
                 )
-                continue
-            else:
-                average = sum(grade) / len(grade)
-            summary[grade_type] = average
+                raise NotAllowed("Not allowed to access other schools")
+            # Groups of other schools simply have no grades in this scope
+            school_id = user.school_id
 
+        summary = await GradeService.aggregate(
+            db, group_by, school_id=school_id, group_id=group_id
+        )
         if not summary:
-            raise NoDataError("Student doesn't have grades yet")
-        return summary
+            raise NoDataError("No grades yet")
+        return {
+            "by": group_by.value,
+            "overall": combine_stats(list(summary.values())),
+            "rows": [{"id": key, "grades": stats} for key, stats in summary.items()],
+        }
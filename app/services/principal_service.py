@@ -3,7 +3,7 @@ from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 from app.db.models.groups import Group
-from app.db.models.types import Teacher, Student, Principal
+from app.db.models.types import Teacher, Student
 from app.db.models.users import User
 from app.db.models.subjects import Subject
 from app.db.models.associations import subject_teacher
@@ -11,6 +11,7 @@ from app.db.models.invitations import Invitation
 from app.exceptions.teachers import TeacherAlreadyAssigned, TeacherNotInTable
 from app.exceptions.students import StudentAlreadyAssigned, StudentNotInTable
 from app.exceptions.basic import NotFound, NotAllowed
+from app.services.auth import invalidate_principal
 
 import logging
 
@@ -25,10 +26,10 @@ class PrincipalService:
         try:
             userside_teacher: User | None = await db.get(User, teacher_id)
             if userside_teacher is None:
-                logger.info(f"Teacher with id {teacher_id} is not found")
+                logger.info("Teacher with id %s is not found", teacher_id)
                 raise NotFound("Teacher not found")
             if userside_teacher.type != "teacher":
-                logger.warning(f"User with id {teacher_id} has type not 'teacher'")
+                logger.warning("User with id %s has type not 'teacher'", teacher_id)
                 raise NotFound(f"This user is {userside_teacher.type}, not teacher")
 
             result = await db.execute(
@@ -52,15 +53,15 @@ class PrincipalService:
 
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error in DB: {e}")
+            logger.error("Integrity error in DB: %s", e)
             raise
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"SQLAlchemy error in DB: {e}")
+            logger.error("SQLAlchemy error in DB: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -70,10 +71,10 @@ class PrincipalService:
         try:
             userside_student: User | None = await db.get(User, student_id)
             if userside_student is None:
-                logger.info(f"Student with id {student_id} is not found")
+                logger.info("Student with id %s is not found", student_id)
                 raise NotFound("Student not found")
             if userside_student.type != "student":
-                logger.warning(f"User with id {student_id} has type not 'student'")
+                logger.warning("User with id %s has type not 'student'", student_id)
                 raise NotFound(f"This user is {userside_student.type}, not student")
 
             result = await db.execute(
@@ -97,15 +98,15 @@ class PrincipalService:
 
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error in DB: {e}")
+            logger.error("Integrity error in DB: %s", e)
             raise
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"SQLAlchemy error in DB: {e}")
+            logger.error("SQLAlchemy error in DB: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -118,7 +119,6 @@ class PrincipalService:
                 raise NotFound("Student not found")
 
             student: Student | None = await db.get(Student, userside_student.id)
-            principal: Principal | None = await db.get(Principal, user.id)
             group: Group | None = await db.get(Group, group_id)
 
             if student is None:
@@ -127,27 +127,28 @@ class PrincipalService:
                 raise StudentAlreadyAssigned(
                     student_id=student.id, group_id=student.group_id
                 )
-            if student.school_id != principal.school_id:
+            if student.school_id != user.school_id:
                 raise NotAllowed("Cannot assign students from other schools")
-            if group.school_id != principal.school_id:
+            if group.school_id != user.school_id:
                 raise NotAllowed("Cannot assign groups from other schools")
 
             student.group_id = group_id
             await db.commit()
+            invalidate_principal(student.id)
             await db.refresh(student)
             return student
 
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"Integrity error in DB: {e}")
+            logger.error("Integrity error in DB: %s", e)
             raise
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"SQLAlchemy error in DB: {e}")
+            logger.error("SQLAlchemy error in DB: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -157,7 +158,6 @@ class PrincipalService:
         try:
             subject: Subject | None = await db.get(Subject, subject_id)
             teacher: User | None = await db.get(User, teacher_id)
-            principal: Principal | None = await db.get(Principal, user.id)
 
             if teacher is None:
                 raise NotFound("User not found")
@@ -165,9 +165,9 @@ class PrincipalService:
                 raise NotFound("User is not teacher")
             if subject is None:
                 raise NotFound("Subject not found")
-            if teacher.school_id != principal.school_id:
+            if teacher.school_id != user.school_id:
                 raise NotAllowed("Cannot assign teachers from other schools")
-            if subject.school_id != principal.school_id:
+            if subject.school_id != user.school_id:
                 raise NotAllowed("Cannot assign subjects from other schools")
 
             await db.execute(
@@ -179,9 +179,9 @@ class PrincipalService:
 
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"SQLAlchemy error in DB: {e}")
+            logger.error("SQLAlchemy error in DB: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
@@ -0,0 +1,140 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from datetime import date, datetime, timedelta
+
+from app.core.settings import settings
+from app.crud.schedules import create_attendance
+from app.db.core import AsyncSessionLocal
+from app.db.partitions import ensure_attendance_partitions
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_school_rolls(
+    db: AsyncSession, school_id: int, lesson_date: date
+) -> int:
+    """Materialise the attendance roll of every lesson one school has on ``lesson_date``."""
+    day_of_week = lesson_date.strftime("%A").lower()
+    result = await db.execute(
+        select(Schedule.id).where(
+            Schedule.school_id == school_id, Schedule.day_of_week == day_of_week
+        )
+    )
+    schedule_ids = result.scalars().all()
+    return await create_attendance(
+        db=db,
+        schedule_ids=schedule_ids,
+        school_id=school_id,
+        lesson_date=lesson_date,
+    )
+
+
+async def generate_rolls(
+    lesson_date: date,
+    school_ids: list[int] | None = None,
+    session_factory=AsyncSessionLocal,
+) -> dict[int, int]:
+    """Generate rolls for ``lesson_date`` in per-school batches.
+
+    Each school runs in its own session and transaction, so a failure in one
+    school is logged and does not stop the others. Returns created rows per school.
+    """
+    if school_ids is None:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(School.id).where(School.is_active.is_(True))
+            )
+            school_ids = result.scalars().all()
+
+    created: dict[int, int] = {}
+    for school_id in school_ids:
+        async with session_factory() as db:
+            try:
+                created[school_id] = await generate_school_rolls(
+                    db=db, school_id=school_id, lesson_date=lesson_date
+                )
+            except Exception as e:
+                logger.error(
+                    "Roll generation failed for school %s on %s: %s",
+                    school_id,
+                    lesson_date,
+                    e,
+                )
+    logger.info(
+        "Generated %s attendance rows for %s schools on %s",
+        sum(created.values()),
+        len(created),
+        lesson_date,
+    )
+    return created
+
+
+class RollScheduler:
+    """Runs :func:`generate_rolls` every day at ``settings.ROLL_JOB_TIME``.
+
+    On start it immediately catches up on today and the configured days ahead,
+    so a restart after the scheduled time does not leave today without rolls.
+    """
+
+    def __init__(
+        self,
+        run_at=settings.ROLL_JOB_TIME,
+        days_ahead: int = settings.ROLL_JOB_DAYS_AHEAD,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.run_at = run_at
+        self.days_ahead = days_ahead
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    def seconds_until_next_run(self, now: datetime | None = None) -> float:
+        now = now or datetime.now()
+        next_run = datetime.combine(now.date(), self.run_at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def run_once(self, today: date | None = None) -> None:
+        today = today or date.today()
+        # Rolls are the first rows of a month; without its partition they land in
+        # the default one, so a failure here is logged and does not stop them
+        async with self.session_factory() as db:
+            try:
+                await ensure_attendance_partitions(db, today=today)
+            except Exception as e:
+                logger.warning(
+                    "Attendance partitions are missing, rolls go to the default "
+                    "partition: %s",
+                    e,
+                )
+        for offset in range(self.days_ahead + 1):
+            await generate_rolls(
+                lesson_date=today + timedelta(days=offset),
+                session_factory=self.session_factory,
+            )
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.exception("Roll scheduler run failed: %s", e)
+            await asyncio.sleep(self.seconds_until_next_run())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -5,6 +5,7 @@ from app.exceptions.basic import NotFound, NotAllowed
 from app.schemas.invitations import Invitation_status
 from app.db.models.users import User
 from app.db.models.invitations import Invitation
+from app.services.auth import invalidate_principal
 
 import logging
 
@@ -17,30 +18,33 @@ class StudentService:
         try:
             invitation: Invitation | None = await db.get(Invitation, invitation_id)
             if invitation is None:
-                logger.info(f"Invitation with id {invitation_id} not found")
+                logger.info("Invitation with id %s not found", invitation_id)
                 raise NotFound("Invitation not found")
 
             if invitation.invited_user_id != user.id:
                 raise NotAllowed("Cannot accept another user's invitation")
 
             logger.info(
-                f"User with id {user.id} accepted invitation sent by user with id {invitation.invited_by_id} "
-                f"to school with id {invitation.school_id}"
+                "User with id %s accepted invitation sent by user with id %s to school with id %s",
+                user.id,
+                invitation.invited_by_id,
+                invitation.school_id,
             )
 
             invitation.status = Invitation_status.accepted
 
             student: Student | None = await db.get(Student, user.id)
             if student is None:
-                logger.info(f"Student with id {user.id} is not found")
+                logger.info("Student with id %s is not found", user.id)
                 raise NotFound("Student not found")
 
             student.school_id = invitation.school_id
             await db.commit()
+            invalidate_principal(user.id)
 
             return {"detail": "Invitation accepted"}
 
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
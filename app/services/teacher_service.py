@@ -1,25 +1,91 @@
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 from app.db.models.schedules import Schedule
+from app.db.models.schools import School
 from app.db.models.types import Student, Teacher
 from app.db.models.attendance import Attendance
+from app.db.utils import dialect_insert
+from app.db.loaders import reload
 from app.db.models.grades import Grade
 from app.exceptions.basic import NoDataError, NotFound, NotAllowed
-from app.schemas.attendance import StatusOptions
-from app.schemas.grades import AssignGradeData, GradeSystems
+from app.schemas.attendance import AttendanceOut, StatusOptions
+from app.schemas.grades import (
+    AssignGradeData,
+    GradeDataOut,
+    GradeSystems,
+    LessonGradesData,
+)
 from app.schemas.invitations import Invitation_status
+from app.schemas.teachers import AttendanceMark
 from app.schemas.users import UserTypes
 from app.db.models.users import User
 from app.db.models.invitations import Invitation
+from app.services.auth import invalidate_principal
+from app.services.grade_summary import add_deltas, apply_deltas, apply_grade
+from app.services import attendance_bitmap
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Accepted range of numeric grades, other systems take any value
+VALUE_RANGES = {
+    GradeSystems.five_num_sys: (1, 5),
+    GradeSystems.percent_sys: (0, 100),
+}
+
+GRADE_VALUE_COLUMNS = (
+    "value_letter",
+    "value_percent",
+    "value_GPA",
+    "value_passing",
+    "value_5numerical",
+)
+
+
+def grade_columns(data: AssignGradeData) -> dict:
+    """Map the submitted grade onto the value column of its grade system."""
+    match (
+        data.grade_system,
+        data.value_numeric,
+        data.value_letter,
+        data.value_boolean,
+    ):
+        case (GradeSystems.five_num_sys, numeric, None, None) if numeric is not None:
+            column = {"value_5numerical": numeric}
+        case (GradeSystems.GPA_sys, numeric, None, None) if numeric is not None:
+            column = {"value_GPA": numeric}
+        case (GradeSystems.percent_sys, numeric, None, None) if numeric is not None:
+            column = {"value_percent": numeric}
+        case (GradeSystems.letter_sys, None, letter, None) if letter is not None:
+            column = {"value_letter": letter}
+        case (GradeSystems.pass_fail_sys, None, None, boolean) if boolean is not None:
+            column = {"value_passing": boolean}
+        case _:
+            raise NoDataError(
+                "Data is not full:\n"
+                f"Grade system:{data.grade_system} \n"
+                f"value_str: {data.value_letter}\n"
+                f"value_num: {data.value_numeric}\n"
+                f"value_bool: {data.value_boolean}"
+            )
+    if data.grade_system in VALUE_RANGES:
+        low, high = VALUE_RANGES[data.grade_system]
+        if not low <= data.value_numeric <= high:
+            raise NoDataError(
+                f"{data.grade_system.value} grades must be between {low} and {high}"
+            )
+    column["grade_system"] = data.grade_system
+    if data.marked_by is not None:
+        column["marked_by"] = data.marked_by
+    return column
+
+
 class TeacherService:
     @staticmethod
     async def mark_presence(
@@ -28,35 +94,41 @@ class TeacherService:
         student_id: int,
         lesson_id: int,
         status: StatusOptions,
+        lesson_date: date | None = None,
     ):
         try:
+            lesson_date = lesson_date or date.today()
             lesson: Schedule | None = await db.get(Schedule, lesson_id)
             student: Student | None = await db.get(Student, student_id)
-            teacher: Teacher | None = await db.get(Teacher, user.id)
 
             if lesson is None:
-                logger.info(f"Schedule with id {lesson_id} is not found")
+                logger.info("Schedule with id %s is not found", lesson_id)
                 raise NotFound("Schedule not found")
             if student is None:
-                logger.info(f"Student with id {student_id} is not found")
+                logger.info("Student with id %s is not found", student_id)
                 raise NotFound("Student not found")
 
-            if teacher.school_id != student.school_id:
+            if user.school_id != student.school_id:
                 logger.warning(
-                    f"User with id {user.id} tried to access school with id {student.school_id}"
+                    "User with id %s tried to access school with id %s",
+                    user.id,
+                    student.school_id,
                 )
                 raise NotAllowed("Cannot access other schools")
-            if teacher.school_id != lesson.school_id:
+            if user.school_id != lesson.school_id:
                 logger.warning(
-                    f"User with id {user.id} tried to access school with id {lesson.school_id}"
+                    "User with id %s tried to access school with id %s",
+                    user.id,
+                    lesson.school_id,
                 )
                 raise NotAllowed("Cannot access other schools")
 
-            # check existing attendance
+            # check existing attendance, one row per lesson date
             result = await db.execute(
                 select(Attendance).where(
                     Attendance.schedule_id == lesson_id,
                     Attendance.student_id == student_id,
+                    Attendance.lesson_date == lesson_date,
                 )
             )
             attendance: Attendance | None = result.scalar_one_or_none()
@@ -67,25 +139,151 @@ class TeacherService:
                 attendance.marked_by = user.id
             else:
                 attendance = Attendance(
-                    status=True,
+                    status=status,
                     student_id=student_id,
-                    marked_by=teacher.id,
+                    marked_by=user.id,
                     schedule_id=lesson_id,
+                    lesson_date=lesson_date,
                     created_at=datetime.now(tz=timezone.utc),
                 )
                 db.add(attendance)
 
+            await attendance_bitmap.apply_marks(
+                db,
+                [(student_id, lesson_id, lesson_date, status.value)],
+                {lesson_id: lesson.start_time},
+            )
             await db.commit()
-            await db.refresh(attendance)
-            return attendance
+            return await reload(db, attendance, AttendanceOut.loader_profile)
 
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"Error in db: {e}")
+            logger.error("Error in db: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
+            raise
+
+    @staticmethod
+    async def mark_lesson_attendance(
+        db: AsyncSession,
+        user: User,
+        schedule_id: int,
+        marks: list[AttendanceMark],
+        lesson_date: date | None = None,
+    ) -> list[dict]:
+        """Mark the attendance of a whole lesson in one transaction.
+
+        The lesson and the members of its group among the submitted students
+        are loaded with one query, all valid rows are written with one upsert.
+        Students outside the lesson's group are reported per row.
+        """
+        try:
+            lesson_date = lesson_date or date.today()
+            student_ids = {mark.student_id for mark in marks}
+            result = await db.execute(
+                select(Schedule.school_id, Schedule.start_time, Student.id)
+                .outerjoin(
+                    Student,
+                    and_(
+                        Student.group_id == Schedule.group_id,
+                        Student.id.in_(student_ids),
+                    ),
+                )
+                .where(Schedule.id == schedule_id)
+            )
+            rows = result.all()
+            if not rows:
+                logger.info("Schedule with id %s is not found", schedule_id)
+                raise NotFound("Schedule not found")
+
+            school_id = rows[0].school_id
+            if user.type != UserTypes.admin and user.school_id != school_id:
+                logger.warning(
+                    "User with id %s tried to access school with id %s",
+                    user.id,
+                    school_id,
+                )
+                raise NotAllowed("Cannot access other schools")
+            members = {row.id for row in rows if row.id is not None}
+
+            # The last mark wins if a student is submitted twice
+            valid = {
+                mark.student_id: mark.status
+                for mark in marks
+                if mark.student_id in members
+            }
+            saved = {}
+            if valid:
+                now = datetime.now(tz=timezone.utc)
+                stmt = dialect_insert(db, Attendance).values(
+                    [
+                        {
+                            "schedule_id": schedule_id,
+                            "student_id": student_id,
+                            "lesson_date": lesson_date,
+                            "status": status.value,
+                            "marked_by": (
+                                user.id if user.type == UserTypes.teacher else None
+                            ),
+                            "created_at": now,
+                            # Marks a row admins write, which have no marked_by
+                            "updated_at": now,
+                        }
+                        for student_id, status in valid.items()
+                    ]
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["schedule_id", "student_id", "lesson_date"],
+                    set_={
+                        "status": stmt.excluded.status,
+                        "marked_by": stmt.excluded.marked_by,
+                        "updated_at": now,
+                    },
+                ).returning(Attendance.student_id, Attendance.id)
+                result = await db.execute(stmt)
+                saved = dict(result.all())
+                await attendance_bitmap.apply_marks(
+                    db,
+                    [
+                        (student_id, schedule_id, lesson_date, status.value)
+                        for student_id, status in valid.items()
+                    ],
+                    {schedule_id: rows[0].start_time},
+                )
+                await db.commit()
+            logger.info(
+                "Marked %s of %s students for schedule %s on %s",
+                len(saved),
+                len(marks),
+                schedule_id,
+                lesson_date,
+            )
+
+            return [
+                (
+                    {
+                        "student_id": mark.student_id,
+                        "attendance_id": saved[mark.student_id],
+                        "status": valid[mark.student_id],
+                    }
+                    if mark.student_id in saved
+                    else {
+                        "student_id": mark.student_id,
+                        "error": "Student is not in this lesson's group",
+                    }
+                )
+                for mark in marks
+            ]
+
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Error in db: %s", e)
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -98,8 +296,11 @@ class TeacherService:
     ):
         try:
             student: Student | None = await db.get(Student, student_id)
-            teacher: Teacher | None = await db.get(Teacher, user.id)
-            lesson: Schedule | None = await db.get(Schedule, schedule_id)
+            # Same lesson lock as assign_lesson_grades, a batch could be
+            # upserting this student's grade right now
+            lesson: Schedule | None = await db.get(
+                Schedule, schedule_id, with_for_update={"key_share": True}
+            )
 
             if student is None:
                 raise NotFound("Student not found")
@@ -107,93 +308,277 @@ class TeacherService:
                 raise NotFound("Schedule not found")
 
             if user.type != UserTypes.admin:
-                if teacher.school_id != student.school_id:
+                if user.school_id != student.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to access school with id {student.school_id}"
+                        "User with id %s tried to access school with id %s",
+                        user.id,
+                        student.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
-                if teacher.school_id != lesson.school_id:
+                if user.school_id != lesson.school_id:
                     logger.warning(
-                        f"User with id {user.id} tried to access school with id {lesson.school_id}"
+                        "User with id %s tried to access school with id %s",
+                        user.id,
+                        lesson.school_id,
                     )
                     raise NotAllowed("Cannot access other schools")
 
-            grade = Grade()
-
-            match (
-                data.grade_system,
-                data.value_numeric,
-                data.value_letter,
-                data.value_boolean,
-            ):
-                case (GradeSystems.five_num_sys, numeric, None, None) if (
-                    numeric is not None
-                ):
-                    data_dict = data.model_dump(
-                        exclude_unset=True,
-                        exclude={"value_boolean", "value_str", "value_numeric"},
-                    )
-                    data_dict.update({"value_5numerical": numeric})
+            grade = Grade(
+                student_id=student_id,
+                schedule_id=schedule_id,
+                **grade_columns(data),
+            )
+            db.add(grade)
+            await db.flush()
+            await apply_grade(db, grade, lesson.subject_id)
+            await db.commit()
+            return await reload(db, grade, GradeDataOut.loader_profile)
 
-                case (GradeSystems.GPA_sys, numeric, None, None) if numeric is not None:
-                    data_dict = data.model_dump(
-                        exclude_unset=True,
-                        exclude={"value_boolean", "value_str", "value_numeric"},
+        except IntegrityError as e:
+            await db.rollback()
+            logger.error("Integrity error occurred: %s", e)
+            raise
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Error in db: %s", e)
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Unexpected error occurred: %s", e)
+            raise
+
+    @staticmethod
+    async def assign_lesson_grades(
+        db: AsyncSession,
+        user: User,
+        schedule_id: int,
+        data: LessonGradesData,
+    ) -> list[dict]:
+        """Grade many students of one lesson with a single upsert.
+
+        Every entry is validated against the school's grade system; invalid
+        entries are reported per row and the rest of the batch is still saved.
+        Re-submitting a student's grade overwrites it.
+        """
+        try:
+            student_ids = {entry.student_id for entry in data.grades}
+            result = await db.execute(
+                select(
+                    Schedule.school_id,
+                    Schedule.subject_id,
+                    School.grade_system,
+                    Student.id,
+                )
+                .join(School, School.id == Schedule.school_id)
+                .outerjoin(
+                    Student,
+                    and_(
+                        Student.group_id == Schedule.group_id,
+                        Student.id.in_(student_ids),
+                    ),
+                )
+                .where(Schedule.id == schedule_id)
+                # Batches for one lesson run one at a time. Row locks on the
+                # previous grades alone would let two batches both count a
+                # grade that does not exist yet
+                .with_for_update(of=Schedule, key_share=True)
+            )
+            rows = result.all()
+            if not rows:
+                logger.info("Schedule with id %s is not found", schedule_id)
+                raise NotFound("Schedule not found")
+
+            lesson = rows[0]
+            if user.type != UserTypes.admin and user.school_id != lesson.school_id:
+                logger.warning(
+                    "User with id %s tried to access school with id %s",
+                    user.id,
+                    lesson.school_id,
+                )
+                raise NotAllowed("Cannot access other schools")
+            if lesson.grade_system is None and data.grade_system is None:
+                raise NoDataError("Grade system is not set")
+            grade_system = GradeSystems(lesson.grade_system or data.grade_system)
+            if data.grade_system is not None and data.grade_system != grade_system:
+                raise NoDataError(f"School uses the {grade_system.value} grade system")
+            members = {row.id for row in rows if row.id is not None}
+
+            errors, values = {}, {}
+            for entry in data.grades:
+                if entry.student_id not in members:
+                    errors[entry.student_id] = "Student is not in this lesson's group"
+                    continue
+                try:
+                    columns = grade_columns(
+                        AssignGradeData(
+                            grade_system=grade_system,
+                            value_letter=entry.value_letter,
+                            value_numeric=entry.value_numeric,
+                            value_boolean=entry.value_boolean,
+                            marked_by=data.marked_by,
+                        )
                     )
-                    data_dict.update({"value_GPA": numeric})
-
-                case (GradeSystems.percent_sys, numeric, None, None) if (
-                    numeric is not None
-                ):
-                    data_dict = data.model_dump(
-                        exclude_unset=True,
-                        exclude={"value_boolean", "value_str", "value_numeric"},
+                except NoDataError as e:
+                    errors[entry.student_id] = str(e).splitlines()[0]
+                    values.pop(entry.student_id, None)
+                    continue
+                # The last entry wins if a student is submitted twice
+                errors.pop(entry.student_id, None)
+                values[entry.student_id] = {
+                    **dict.fromkeys(GRADE_VALUE_COLUMNS),
+                    "marked_by": None,
+                    **columns,
+                    "grade_system": grade_system.value,
+                    "schedule_id": schedule_id,
+                    "student_id": entry.student_id,
+                }
+
+            saved = {}
+            if values:
+                now = datetime.now(tz=timezone.utc)
+                previous = await db.execute(
+                    select(Grade)
+                    .where(
+                        Grade.schedule_id == schedule_id,
+                        Grade.student_id.in_(values),
                     )
-                    data_dict.update({"value_percent": numeric})
-
-                case (GradeSystems.letter_sys, None, letter, None) if (
-                    letter is not None
-                ):
-                    data_dict = data.model_dump(
-                        exclude_unset=True, exclude={"value_boolean", "value_numeric"}
+                    .with_for_update()
+                    .execution_options(populate_existing=True)
+                )
+                deltas = {}
+                for grade in previous.scalars():
+                    add_deltas(deltas, grade, lesson.subject_id, sign=-1)
+                for row in values.values():
+                    add_deltas(
+                        deltas,
+                        Grade(
+                            **{
+                                key: row[key]
+                                for key in ("student_id", *GRADE_VALUE_COLUMNS)
+                            }
+                        ),
+                        lesson.subject_id,
                     )
 
-                case (GradeSystems.pass_fail_sys, None, None, boolean) if (
-                    boolean is not None
-                ):
-                    data_dict = data.model_dump(
-                        exclude_unset=True, exclude={"value_numeric", "value_str"}
-                    )
+                stmt = dialect_insert(db, Grade).values(
+                    [{**row, "created_at": now} for row in values.values()]
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["schedule_id", "student_id"],
+                    set_={
+                        **{
+                            column: stmt.excluded[column]
+                            for column in (
+                                "grade_system",
+                                "marked_by",
+                                *GRADE_VALUE_COLUMNS,
+                            )
+                        },
+                        "updated_at": now,
+                    },
+                ).returning(Grade.student_id, Grade.id)
+                result = await db.execute(stmt)
+                saved = dict(result.all())
+                await apply_deltas(db, deltas)
+                await db.commit()
+            logger.info(
+                "Saved %s of %s grades for schedule %s",
+                len(saved),
+                len(data.grades),
+                schedule_id,
+            )
 
-                case _:
-                    raise NoDataError(
-                        "Data is not full:\n"
-                        f"Grade system:{data.grade_system} \n"
-                        f"value_str: {data.value_letter}\n"
-                        f"value_num: {data.value_numeric}\n"
-                        f"value_bool: {data.value_boolean}"
-                    )
+            return [
+                (
+                    {
+                        "student_id": entry.student_id,
+                        "grade_id": saved[entry.student_id],
+                    }
+                    if entry.student_id in saved
+                    else {
+                        "student_id": entry.student_id,
+                        "error": errors[entry.student_id],
+                    }
+                )
+                for entry in data.grades
+            ]
+
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Error in db: %s", e)
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Unexpected error occurred: %s", e)
+            raise
+
+    @staticmethod
+    async def _get_grade(db: AsyncSession, user: User, grade_id: int):
+        # Locked and read afresh: the old values are taken out of the summary,
+        # so two requests changing the same grade must not both see them
+        result = await db.execute(
+            select(Grade)
+            .where(Grade.id == grade_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        grade: Grade | None = result.scalar_one_or_none()
+        if grade is None:
+            raise NotFound("Grade not found")
+        lesson: Schedule | None = await db.get(Schedule, grade.schedule_id)
+        if user.type != UserTypes.admin and user.school_id != lesson.school_id:
+            logger.warning(
+                "User with id %s tried to access school with id %s",
+                user.id,
+                lesson.school_id,
+            )
+            raise NotAllowed("Cannot access other schools")
+        return grade, lesson
+
+    @staticmethod
+    async def update_grade(
+        db: AsyncSession, user: User, grade_id: int, data: AssignGradeData
+    ):
+        try:
+            grade, lesson = await TeacherService._get_grade(db, user, grade_id)
+            columns = grade_columns(data)
 
-            data_dict.update({"student_id": student_id, "schedule_id": schedule_id})
-            for key, value in data_dict.items():
+            await apply_grade(db, grade, lesson.subject_id, sign=-1)
+            for column in GRADE_VALUE_COLUMNS:
+                setattr(grade, column, None)
+            for key, value in columns.items():
                 setattr(grade, key, value)
+            grade.updated_at = datetime.now(tz=timezone.utc)
+            await apply_grade(db, grade, lesson.subject_id)
 
-            db.add(grade)
             await db.commit()
-            await db.refresh(grade)
-            return grade
+            return await reload(db, grade, GradeDataOut.loader_profile)
 
-        except IntegrityError as e:
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error("Error in db: %s", e)
+            raise
+        except Exception as e:
             await db.rollback()
-            logger.error(f"Integrity error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
+
+    @staticmethod
+    async def delete_grade(db: AsyncSession, user: User, grade_id: int):
+        try:
+            grade, lesson = await TeacherService._get_grade(db, user, grade_id)
+            await apply_grade(db, grade, lesson.subject_id, sign=-1)
+            await db.delete(grade)
+            await db.commit()
+            return {"detail": "Grade deleted"}
+
         except SQLAlchemyError as e:
             await db.rollback()
-            logger.error(f"Error in db: {e}")
+            logger.error("Error in db: %s", e)
             raise
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
 
     @staticmethod
@@ -201,30 +586,33 @@ class TeacherService:
         try:
             invitation: Invitation | None = await db.get(Invitation, invitation_id)
             if invitation is None:
-                logger.info(f"Invitation with id {invitation_id} not found")
+                logger.info("Invitation with id %s not found", invitation_id)
                 raise NotFound("Invitation not found")
 
             if invitation.invited_user_id != user.id:
                 raise NotAllowed("Cannot accept another user's invitation")
 
             logger.info(
-                f"User with id {user.id} accepted invitation sent by user with id {invitation.invited_by_id} "
-                f"to school with id {invitation.school_id}"
+                "User with id %s accepted invitation sent by user with id %s to school with id %s",
+                user.id,
+                invitation.invited_by_id,
+                invitation.school_id,
             )
 
             invitation.status = Invitation_status.accepted
 
             teacher: Teacher | None = await db.get(Teacher, user.id)
             if teacher is None:
-                logger.info(f"Teacher with id {user.id} is not found")
+                logger.info("Teacher with id %s is not found", user.id)
                 raise NotFound("Teacher is not found")
 
             teacher.school_id = invitation.school_id
             await db.commit()
+            invalidate_principal(user.id)
 
             return {"detail": "Invitation accepted"}
 
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             raise
@@ -0,0 +1,188 @@
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from datetime import time
+from types import SimpleNamespace
+
+from app.db.models.schedules import Schedule
+from app.db.models.users import User
+from app.schemas.schedules import TimetableResource, Week
+from app.schemas.users import UserTypes
+from app.exceptions.basic import NoDataError, NotAllowed
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# On PostgreSQL the exclusion constraints of migration f3c9d2a6b874 reject
+# clashes as well, so two concurrent inserts cannot both take a slot; the
+# check here runs first to name the lesson in the way.
+LESSON_COLUMNS = (
+    Schedule.id,
+    Schedule.group_id,
+    Schedule.teacher_id,
+    Schedule.day_of_week,
+    Schedule.start_time,
+    Schedule.end_time,
+)
+
+# The exclusion constraints and the resource whose slot each one keeps free
+SLOT_CONSTRAINTS = {
+    "excl_schedules_group_slot": TimetableResource.group,
+    "excl_schedules_teacher_slot": TimetableResource.teacher,
+}
+
+
+def _conflict(resource: TimetableResource, resource_id: int, first, second) -> dict:
+    return {
+        "resource": resource,
+        "resource_id": resource_id,
+        "day_of_week": first.day_of_week,
+        "schedule_ids": [first.id, second.id],
+        "start_time": max(first.start_time, second.start_time),
+        "end_time": min(first.end_time, second.end_time),
+    }
+
+
+def _owners(lesson):
+    yield TimetableResource.group, lesson.group_id
+    if lesson.teacher_id is not None:
+        yield TimetableResource.teacher, lesson.teacher_id
+
+
+def describe(clash: dict) -> str:
+    """Message for a clash found by ``find_clashes``."""
+    return (
+        f"{clash['resource'].value} {clash['resource_id']} already has "
+        f"schedule {clash['schedule_ids'][0]} on {Week(clash['day_of_week']).value} "
+        f"from {clash['start_time']:%H:%M} to {clash['end_time']:%H:%M}"
+    )
+
+
+async def find_clashes(db: AsyncSession, lesson) -> list[dict]:
+    """Lessons overlapping ``lesson`` for its group or teacher.
+
+    ``lesson`` is anything with the schedule columns; its ``id`` is None for
+    a new lesson and comes second in ``schedule_ids``. The lookup is a range
+    seek on the (group_id, day_of_week) and (teacher_id, day_of_week)
+    indexes, not a scan of the school.
+    """
+    if lesson.start_time >= lesson.end_time:
+        raise NoDataError("start_time must be before end_time")
+    owners = [Schedule.group_id == lesson.group_id]
+    if lesson.teacher_id is not None:
+        owners.append(Schedule.teacher_id == lesson.teacher_id)
+    stmt = select(*LESSON_COLUMNS).where(
+        or_(*owners),
+        Schedule.day_of_week == lesson.day_of_week,
+        Schedule.start_time < lesson.end_time,
+        Schedule.end_time > lesson.start_time,
+        Schedule.ended_at.is_(None),
+    )
+    if lesson.id is not None:
+        stmt = stmt.where(Schedule.id != lesson.id)
+
+    result = await db.execute(stmt.order_by(Schedule.start_time, Schedule.id))
+    clashes = []
+    for other in result:
+        theirs = set(_owners(other))
+        clashes.extend(
+            _conflict(resource, resource_id, other, lesson)
+            for resource, resource_id in _owners(lesson)
+            if (resource, resource_id) in theirs
+        )
+    return clashes
+
+
+def snapshot(lesson) -> SimpleNamespace:
+    """Copy of the schedule columns of ``lesson`` that survives a rollback."""
+    return SimpleNamespace(
+        **{column.key: getattr(lesson, column.key) for column in LESSON_COLUMNS}
+    )
+
+
+async def slot_taken(
+    db: AsyncSession, error: IntegrityError, lesson: SimpleNamespace
+) -> str | None:
+    """Message for a clash only an exclusion constraint caught, else None.
+
+    That is a concurrent request taking the slot between ``find_clashes`` and
+    the commit. Call it after the rollback, so the lesson in the way is
+    visible and can be named like any other clash.
+    """
+    resource = next(
+        (
+            resource
+            for name, resource in SLOT_CONSTRAINTS.items()
+            if name in str(error.orig)
+        ),
+        None,
+    )
+    if resource is None:
+        return None
+    for clash in await find_clashes(db, lesson):
+        if clash["resource"] == resource:
+            return describe(clash)
+    return (
+        f"{resource.value} {getattr(lesson, f'{resource.value}_id')} already has "
+        f"a lesson on {Week(lesson.day_of_week).value} from "
+        f"{lesson.start_time:%H:%M} to {lesson.end_time:%H:%M}"
+    )
+
+
+def find_conflicts(lessons) -> list[dict]:
+    """Every pair of overlapping lessons of a group or teacher, in one pass.
+
+    Lessons are bucketed per group or teacher and day, each bucket is
+    sorted by start and swept once keeping the lessons still running, so
+    the cost is O(n log n) plus the conflicts reported.
+    """
+    buckets: dict[tuple, list] = {}
+    for lesson in lessons:
+        for resource, resource_id in _owners(lesson):
+            key = (resource, resource_id, lesson.day_of_week)
+            buckets.setdefault(key, []).append(lesson)
+
+    conflicts = []
+    for (resource, resource_id, _), bucket in buckets.items():
+        bucket.sort(key=lambda lesson: (lesson.start_time, lesson.id))
+        running = []
+        for lesson in bucket:
+            running = [other for other in running if other.end_time > lesson.start_time]
+            conflicts.extend(
+                _conflict(resource, resource_id, other, lesson) for other in running
+            )
+            running.append(lesson)
+
+    week = {day.value: i for i, day in enumerate(Week)}
+    conflicts.sort(
+        key=lambda conflict: (
+            week[conflict["day_of_week"]],
+            conflict["start_time"],
+            conflict["resource"].value,
+            conflict["schedule_ids"],
+        )
+    )
+    return conflicts
+
+
+async def validate_timetable(
+    db: AsyncSession, user: User, school_id: int
+) -> list[dict]:
+    """All clashes in the timetable of a school, from one query."""
+    if user.type != UserTypes.admin and user.school_id != school_id:
+        logger.warning(
+            "User %s tried to validate the timetable of school %s. Not allowed",
+            user.id,
+            school_id,
+        )
+        raise NotAllowed("Cannot access other schools")
+    result = await db.execute(
+        select(*LESSON_COLUMNS).where(
+            Schedule.school_id == school_id, Schedule.ended_at.is_(None)
+        )
+    )
+    conflicts = find_conflicts(result.all())
+    logger.info("Timetable of school %s has %s conflicts", school_id, len(conflicts))
+    return conflicts
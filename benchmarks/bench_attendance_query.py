@@ -0,0 +1,188 @@
+"""Attendance listing: student-id IN list vs. a single joined query.
+
+Usage:
+    python -m benchmarks.bench_attendance_query [--students 5000] [--limit 500]
+        [--repeat 5] [--db-url sqlite+aiosqlite:///bench_attendance.db]
+
+Seeds one school with ``--students`` students in groups of 25, five lessons
+per group and four weeks of attendance, then times one page of the
+school-wide and the group-filtered listings. Peak memory is measured with
+tracemalloc and covers the Python side only.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time as timer
+import tracemalloc
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.attendance import AttendanceCRUD
+from app.db.core import Base
+from app.db.models.attendance import Attendance
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.types import Student
+from app.schemas.auth import CurrentUser
+
+GROUP_SIZE = 25
+LESSONS_PER_GROUP = 5
+WEEKS = 4
+
+
+async def legacy_get_attendances(
+    db: AsyncSession, school_id: int, group_id: int | None, limit: int
+):
+    """The pre-join implementation, kept here as the baseline."""
+    query = select(Attendance)
+    result = await db.execute(select(Student).where(Student.school_id == school_id))
+    ids = [student.id for student in result.scalars().all()]
+    query = query.where(Attendance.student_id.in_(ids))
+    if group_id is not None:
+        result = await db.execute(
+            select(Student).where(
+                Student.school_id == school_id, Student.group_id == group_id
+            )
+        )
+        ids = [student.id for student in result.scalars().all()]
+        query = query.where(Attendance.student_id.in_(ids))
+    result = await db.execute(query.order_by(Attendance.id).limit(limit + 1))
+    return result.scalars().all()[:limit]
+
+
+async def seed(db: AsyncSession, students: int) -> tuple[int, int]:
+    school = School(name="bench", short_name="B", country="X", address="Y")
+    db.add(school)
+    await db.flush()
+    now = datetime.now(tz=timezone.utc)
+    first_group_id = None
+    for g in range(max(students // GROUP_SIZE, 1)):
+        group = Group(grade=g, grade_section="A", school_id=school.id)
+        db.add(group)
+        await db.flush()
+        first_group_id = first_group_id or group.id
+        members = [
+            Student(
+                username=f"s{g}_{i}",
+                email="s@bench",
+                first_name="S",
+                last_name=str(i),
+                hashed_password="x",
+                school_id=school.id,
+                group_id=group.id,
+            )
+            for i in range(GROUP_SIZE)
+        ]
+        lessons = [
+            Schedule(
+                group_id=group.id,
+                school_id=school.id,
+                day_of_week="monday",
+                start_time=time(8 + i),
+                end_time=time(9 + i),
+            )
+            for i in range(LESSONS_PER_GROUP)
+        ]
+        db.add_all(members + lessons)
+        await db.flush()
+        await db.execute(
+            insert(Attendance),
+            [
+                {
+                    "schedule_id": lesson.id,
+                    "student_id": member.id,
+                    "lesson_date": date(2025, 9, 1) + timedelta(weeks=w),
+                    "status": "present",
+                    "created_at": now,
+                }
+                for lesson in lessons
+                for member in members
+                for w in range(WEEKS)
+            ],
+        )
+    await db.commit()
+    return school.id, first_group_id
+
+
+async def measure(engine, run, repeat: int) -> tuple[float, float, int, int]:
+    statements = parameters = 0
+
+    def count(conn, cursor, statement, params, context, executemany):
+        nonlocal statements, parameters
+        statements += 1
+        parameters += len(params) if params else 0
+
+    timings = []
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    tracemalloc.start()
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        await run()
+        timings.append(timer.perf_counter() - started)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return statistics.median(timings), peak, statements // repeat, parameters // repeat
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get(
+            "BENCH_DB_URL", "sqlite+aiosqlite:///bench_attendance.db"
+        ),
+    )
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        school_id, group_id = await seed(db, args.students)
+
+    admin = CurrentUser(id=0, username="bench", type="admin")
+    print(
+        f"{'listing':>8} {'impl':>7} {'ms':>9} {'peak KiB':>9} "
+        f"{'statements':>11} {'params':>7}"
+    )
+    for listing, group in (("school", None), ("group", group_id)):
+        for impl in ("in-list", "join"):
+            async with Session() as db:
+
+                async def run():
+                    db.expunge_all()
+                    if impl == "in-list":
+                        return await legacy_get_attendances(
+                            db, school_id, group, args.limit
+                        )
+                    return await AttendanceCRUD.get_attendances_id(
+                        db=db,
+                        user=admin,
+                        school_id=school_id,
+                        group_id=group,
+                        limit=args.limit,
+                    )
+
+                elapsed, peak, statements, params = await measure(
+                    engine, run, args.repeat
+                )
+            print(
+                f"{listing:>8} {impl:>7} {elapsed * 1000:>9.1f} {peak / 1024:>9.0f} "
+                f"{statements:>11} {params:>7}"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Attendance roll generation: per-row loop vs. set-based INSERT ... SELECT.
+
+Usage:
+    python -m benchmarks.bench_attendance_rolls [--sizes 1000 10000 100000]
+        [--legacy-max 10000] [--db-url sqlite+aiosqlite:///bench_rolls.db]
+
+Each size is the number of (schedule, student) pairs in the roll. The legacy
+loop issues ~4 statements per pair, so it is skipped above ``--legacy-max``.
+"""
+
+import argparse
+import asyncio
+import os
+import time as timer
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.schedules import create_attendance
+from app.db.core import Base
+from app.db.models.attendance import Attendance
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.types import Student
+
+SIZES = {1_000: (10, 100), 10_000: (20, 500), 100_000: (40, 2_500)}
+
+
+async def legacy_create_attendance(db: AsyncSession, schedules, group_id: int):
+    """The pre-set-based implementation, kept here as the baseline."""
+    today = date.today()
+    result = await db.execute(select(Student).filter(Student.group_id == group_id))
+    students = result.scalars().all()
+    created = 0
+    for schedule in schedules:
+        for student in students:
+            existing = await db.execute(
+                select(Attendance)
+                .filter(Attendance.schedule_id == schedule.id)
+                .filter(Attendance.student_id == student.id)
+                .filter(Attendance.lesson_date == today)
+            )
+            if existing.scalar_one_or_none():
+                continue
+            attendance = Attendance(
+                schedule_id=schedule.id,
+                student_id=student.id,
+                lesson_date=today,
+                created_at=datetime.now(tz=timezone.utc),
+            )
+            db.add(attendance)
+            await db.commit()
+            await db.refresh(attendance)
+            created += 1
+    return created
+
+
+async def seed(db: AsyncSession, lessons: int, students: int):
+    school = School(name="bench", short_name="B", country="X", address="Y")
+    db.add(school)
+    await db.flush()
+    group = Group(grade=1, grade_section="A", school_id=school.id)
+    db.add(group)
+    await db.flush()
+    db.add_all(
+        Student(
+            username=f"s{i}",
+            email=f"s{i}@bench",
+            first_name="S",
+            last_name=str(i),
+            hashed_password="x",
+            school_id=school.id,
+            group_id=group.id,
+        )
+        for i in range(students)
+    )
+    schedules = [
+        Schedule(
+            group_id=group.id,
+            school_id=school.id,
+            day_of_week="monday",
+            start_time=time(8),
+            end_time=time(9),
+        )
+        for _ in range(lessons)
+    ]
+    db.add_all(schedules)
+    await db.commit()
+    return group, schedules
+
+
+async def run_once(db_url: str, size: int, legacy: bool) -> tuple[int, int, float]:
+    lessons, students = SIZES.get(size, (10, max(size // 10, 1)))
+    engine = create_async_engine(db_url)
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        group, schedules = await seed(db, lessons, students)
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        started = timer.perf_counter()
+        if legacy:
+            created = await legacy_create_attendance(db, schedules, group.id)
+        else:
+            created = await create_attendance(
+                db=db,
+                schedule_ids=[schedule.id for schedule in schedules],
+                group_id=group.id,
+            )
+        elapsed = timer.perf_counter() - started
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    await engine.dispose()
+    return created, statements, elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL", "sqlite+aiosqlite:///bench_rolls.db"),
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'impl':>10} {'created':>8} {'statements':>12} {'seconds':>9}")
+    for size in args.sizes:
+        for legacy in (True, False):
+            if legacy and size > args.legacy_max:
+                print(f"{size:>8} {'legacy':>10} {'skipped (--legacy-max)':>31}")
+                continue
+            created, statements, elapsed = await run_once(args.db_url, size, legacy)
+            impl = "legacy" if legacy else "set-based"
+            print(f"{size:>8} {impl:>10} {created:>8} {statements:>12} {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""Attendance statistics: ORM rows aggregated in Python vs. SQL aggregation.
+
+Usage:
+    python -m benchmarks.bench_attendance_stats [--students 2000] [--weeks 36]
+        [--python-weeks 4] [--repeat 3]
+        [--db-url sqlite+aiosqlite:///bench_attendance_stats.db]
+
+Seeds one school with ``--students`` students in groups of 25, each group
+having six lessons a day from Monday to Friday, and ``--weeks`` weeks of
+attendance: a synthetic school year of ~2.2M rows at the defaults. The
+baseline loads the school's ``Attendance`` objects, as exporting the raw
+listing did, and counts them in Python. Over a whole year that needs
+several GiB, so it only covers the first ``--python-weeks`` weeks; the
+``/attendances/stats`` queries are timed over those weeks and over the year.
+Peak memory covers the Python side only.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time as timer
+import tracemalloc
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.core import Base
+from app.db.models.attendance import Attendance
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.types import Student
+from app.schemas.attendance import AttendanceScope
+from app.schemas.auth import CurrentUser
+from app.schemas.schedules import Week
+from app.services.attendance_stats import AttendanceStatsService
+
+GROUP_SIZE = 25
+LESSONS_PER_DAY = 6
+DAYS = list(Week)[:5]
+# Share of each status in the synthetic data; a few students skip a lot
+STATUS_WEIGHTS = {"present": 90, "absent": 5, "late": 3, "excused": 2}
+CHRONIC_SHARE = 0.05
+FIRST_MONDAY = date(2025, 9, 1)
+
+
+async def python_rates(db: AsyncSession, school_id: int, date_to: date) -> dict:
+    """Rates per group from ORM objects, kept here as the baseline."""
+    result = await db.execute(
+        select(Attendance, Schedule.group_id)
+        .join(Schedule, Schedule.id == Attendance.schedule_id)
+        .where(Schedule.school_id == school_id, Attendance.lesson_date <= date_to)
+    )
+    counts: dict[int, Counter] = {}
+    for attendance, group_id in result:
+        counts.setdefault(group_id, Counter())[attendance.status] += 1
+    rates = {}
+    for group_id, counter in counts.items():
+        expected = counter.total() - counter["excused"]
+        rates[group_id] = (counter["present"] + counter["late"]) / expected
+    return rates
+
+
+async def seed(db: AsyncSession, students: int, weeks: int) -> int:
+    school = School(name="bench", short_name="B", country="X", address="Y")
+    db.add(school)
+    await db.flush()
+    rng = random.Random(0)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    now = datetime.now(tz=timezone.utc)
+    for g in range(max(students // GROUP_SIZE, 1)):
+        group = Group(grade=g, grade_section="A", school_id=school.id)
+        db.add(group)
+        await db.flush()
+        members = [
+            Student(
+                username=f"s{g}_{i}",
+                email="s@bench",
+                first_name="S",
+                last_name=str(i),
+                hashed_password="x",
+                school_id=school.id,
+                group_id=group.id,
+            )
+            for i in range(GROUP_SIZE)
+        ]
+        lessons = [
+            Schedule(
+                group_id=group.id,
+                school_id=school.id,
+                day_of_week=day.value,
+                start_time=time(8 + i),
+                end_time=time(9 + i),
+            )
+            for day in DAYS
+            for i in range(LESSONS_PER_DAY)
+        ]
+        db.add_all(members + lessons)
+        await db.flush()
+        chronic = {m.id for m in members if rng.random() < CHRONIC_SHARE}
+        rows = []
+        for w in range(weeks):
+            monday = FIRST_MONDAY + timedelta(weeks=w)
+            for lesson in lessons:
+                lesson_date = monday + timedelta(days=DAYS.index(lesson.day_of_week))
+                picked = rng.choices(statuses, weights, k=len(members))
+                for member, status in zip(members, picked):
+                    if member.id in chronic and rng.random() < 0.3:
+                        status = "absent"
+                    rows.append(
+                        {
+                            "schedule_id": lesson.id,
+                            "student_id": member.id,
+                            "lesson_date": lesson_date,
+                            "status": status,
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                    )
+        await db.execute(insert(Attendance), rows)
+    await db.commit()
+    return school.id
+
+
+async def measure(run, repeat: int) -> tuple[float, float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        result = await run()
+        timings.append(timer.perf_counter() - started)
+    # A separate traced run, tracemalloc slows allocation-heavy code a lot
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = result["rows"] if "rows" in result else result
+    return statistics.median(timings), peak, len(rows)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=2_000)
+    parser.add_argument("--weeks", type=int, default=36)
+    parser.add_argument("--python-weeks", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get(
+            "BENCH_DB_URL", "sqlite+aiosqlite:///bench_attendance_stats.db"
+        ),
+    )
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    started = timer.perf_counter()
+    async with Session() as db:
+        school_id = await seed(db, args.students, args.weeks)
+        rows = await db.scalar(select(Attendance.id).order_by(Attendance.id.desc()))
+    print(f"seeded {rows} attendance rows in {timer.perf_counter() - started:.0f}s")
+
+    admin = CurrentUser(id=0, username="bench", type="admin")
+    prefix = FIRST_MONDAY + timedelta(weeks=args.python_weeks, days=-1)
+    runs = [(f"{args.python_weeks} weeks", prefix), (f"{args.weeks} weeks", None)]
+    print(f"{'query':>22} {'range':>9} {'ms':>9} {'peak KiB':>9} {'rows':>5}")
+    for label, date_to in runs:
+        queries = {
+            "sql rates by group": lambda db: AttendanceStatsService.rates(
+                db, admin, school_id, AttendanceScope.group, date_to=date_to
+            ),
+            "sql rates by weekday": lambda db: AttendanceStatsService.rates(
+                db, admin, school_id, AttendanceScope.weekday, date_to=date_to
+            ),
+            "sql chronic absentees": lambda db: (
+                AttendanceStatsService.chronic_absentees(
+                    db, admin, school_id, date_to=date_to, limit=1000
+                )
+            ),
+            "sql heatmap": lambda db: AttendanceStatsService.heatmap(
+                db, admin, school_id, date_to=date_to
+            ),
+        }
+        if date_to is not None:
+            queries = {
+                "python rates by group": lambda db: python_rates(
+                    db, school_id, date_to
+                ),
+                **queries,
+            }
+        for name, run in queries.items():
+            async with Session() as db:
+
+                async def once():
+                    db.expunge_all()
+                    return await run(db)
+
+                elapsed, peak, count = await measure(once, args.repeat)
+            print(
+                f"{name:>22} {label:>9} {elapsed * 1000:>9.1f} "
+                f"{peak / 1024:>9.0f} {count:>5}"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""Request throughput with synchronous log handlers vs. the queue pipeline.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 2000] [--concurrency 50]
+        [--db-url sqlite+aiosqlite:///bench_logging.db]
+
+Runs the app in-process and fires ``--requests`` lookups of missing schools,
+each of which logs from the CRUD layer. The run is repeated with the old
+setup, a ``FileHandler`` and a ``StreamHandler`` writing on the event loop,
+and with ``setup_logging``, where the loop only enqueues records. Console
+output goes to a file in both runs so the terminal does not skew the result.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time as timer
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.settings import settings
+from app.db.core import Base, get_async_db
+from app.logging.logger import setup_logging
+from app.main import app, log_listener
+from app.schemas.auth import CurrentUser
+from app.services.auth import get_current_user
+
+
+def synchronous_logging(log_dir: str, console) -> list[logging.Handler]:
+    """The handlers the app used before the queue pipeline."""
+    formatter = logging.Formatter(
+        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    handlers = [
+        logging.FileHandler(os.path.join(log_dir, "sync.log")),
+        logging.StreamHandler(console),
+    ]
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root_logger.addHandler(handler)
+    return handlers
+
+
+async def run_once(client: AsyncClient, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(i: int):
+        async with semaphore:
+            await client.get(f"/schools/{1_000_000 + i}/")
+
+    started = timer.perf_counter()
+    await asyncio.gather(*(lookup(i) for i in range(requests)))
+    return timer.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL", "sqlite+aiosqlite:///bench_logging.db"),
+    )
+    args = parser.parse_args()
+    log_listener.stop()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    engine = create_async_engine(args.db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def bench_db():
+        async with Session() as session:
+            yield session
+
+    async def bench_user():
+        return CurrentUser(id=0, username="bench", type="admin")
+
+    app.dependency_overrides[get_async_db] = bench_db
+    app.dependency_overrides[get_current_user] = bench_user
+
+    print(f"{'logging':>8} {'requests':>9} {'seconds':>8} {'req/s':>8} {'drain s':>8}")
+    transport = ASGITransport(app=app)
+    with tempfile.TemporaryDirectory() as log_dir:
+        console = open(os.path.join(log_dir, "console.log"), "w")
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode in ("sync", "queue"):
+                if mode == "sync":
+                    handlers = synchronous_logging(log_dir, console)
+                else:
+                    settings.LOG_FILE = os.path.join(log_dir, "queue.log")
+                    listener = setup_logging(stream=console)
+                elapsed = await run_once(client, args.requests, args.concurrency)
+                # Records still queued when the run ends are written in the background
+                started = timer.perf_counter()
+                if mode == "sync":
+                    for handler in handlers:
+                        handler.close()
+                else:
+                    listener.stop()
+                drain = timer.perf_counter() - started
+                print(
+                    f"{mode:>8} {args.requests:>9} {elapsed:>8.2f} "
+                    f"{args.requests / elapsed:>8.0f} {drain:>8.2f}"
+                )
+        console.close()
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
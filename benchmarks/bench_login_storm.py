@@ -0,0 +1,145 @@
+"""Latency of unrelated endpoints while a burst of logins is being hashed.
+
+Usage:
+    python -m benchmarks.bench_login_storm [--logins 200] [--probes 200]
+        [--db-url sqlite+aiosqlite:///bench_login.db]
+
+Runs the app in-process and fires ``--logins`` concurrent logins while a
+second task keeps requesting a cheap read endpoint. The same run is repeated
+with bcrypt executed inline on the event loop (the old behaviour) and through
+the bounded hashing pool, and the probe latencies are compared.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time as timer
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import security
+from app.core.security import hash_password
+from app.db.core import Base, get_async_db
+from app.db.models.schools import School
+from app.db.models.types import Student
+from app.main import app
+from app.schemas.auth import CurrentUser
+from app.services import auth as auth_service
+from app.services.auth import get_current_user
+
+
+async def inline_verify(plain, hashed) -> bool:
+    return security.verify_password(plain, hashed)
+
+
+async def seed(db: AsyncSession, users: int) -> int:
+    school = School(name="bench", short_name="B", country="X", address="Y")
+    db.add(school)
+    # bcrypt hashes are salted but any of them verifies the same password
+    hashed = hash_password("password")
+    db.add_all(
+        Student(
+            username=f"s{i}",
+            email=f"s{i}@bench",
+            first_name="S",
+            last_name=str(i),
+            hashed_password=hashed,
+        )
+        for i in range(users)
+    )
+    await db.commit()
+    return school.id
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * pct), len(samples) - 1)]
+
+
+async def run_once(client: AsyncClient, school_id: int, logins: int, probes: int):
+    probe_latencies = []
+    storm_done = asyncio.Event()
+
+    async def login(i: int):
+        response = await client.post(
+            "/auth/login/", data={"username": f"s{i}", "password": "password"}
+        )
+        return response.status_code
+
+    async def probe():
+        while len(probe_latencies) < probes and not storm_done.is_set():
+            started = timer.perf_counter()
+            await client.get(f"/schools/{school_id}/")
+            probe_latencies.append(timer.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+    started = timer.perf_counter()
+    probe_task = asyncio.create_task(probe())
+    codes = await asyncio.gather(*(login(i) for i in range(logins)))
+    storm_done.set()
+    await probe_task
+    elapsed = timer.perf_counter() - started
+    return codes, probe_latencies, elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL", "sqlite+aiosqlite:///bench_login.db"),
+    )
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    engine = create_async_engine(args.db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with Session() as db:
+        school_id = await seed(db, args.logins)
+
+    async def bench_db():
+        async with Session() as session:
+            yield session
+
+    async def bench_user():
+        return CurrentUser(id=0, username="bench", type="admin")
+
+    app.dependency_overrides[get_async_db] = bench_db
+    app.dependency_overrides[get_current_user] = bench_user
+
+    print(
+        f"{'hashing':>8} {'logins':>7} {'503s':>5} {'probes':>7} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'seconds':>8}"
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("inline", "pool"):
+            if mode == "inline":
+                auth_service.verify_password_async = inline_verify
+            else:
+                auth_service.verify_password_async = security.verify_password_async
+            codes, latencies, elapsed = await run_once(
+                client, school_id, args.logins, args.probes
+            )
+            latencies = [latency * 1000 for latency in latencies] or [0.0]
+            print(
+                f"{mode:>8} {codes.count(200):>7} {codes.count(503):>5} "
+                f"{len(latencies):>7} {statistics.median(latencies):>8.1f} "
+                f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f} "
+                f"{elapsed:>8.2f}"
+            )
+
+    app.dependency_overrides.clear()
+    security.hashing_pool.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Request throughput across connection pool sizes.
+
+Usage:
+    python -m benchmarks.bench_pool_sizes [--pool-sizes 1 2 5 10 20]
+        [--clients 50] [--requests 2000] [--hold-ms 5]
+        [--db-url sqlite+aiosqlite:///bench_pool.db]
+
+``--clients`` concurrent workers each check out a connection, run a query and
+keep the connection for ``--hold-ms`` (standing in for the rest of a request)
+until ``--requests`` requests have completed. Reported wait times and overflow
+events come from ``InstrumentedPool``.
+"""
+
+import argparse
+import asyncio
+import os
+import time as timer
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.pool import InstrumentedPool, pool_stats
+
+
+async def run_once(db_url: str, pool_size: int, args) -> tuple[float, dict]:
+    engine = create_async_engine(
+        db_url,
+        poolclass=InstrumentedPool,
+        pool_size=pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+    )
+    remaining = args.requests
+    completed = 0
+
+    async def client():
+        nonlocal remaining, completed
+        while remaining > 0:
+            remaining -= 1
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                    await asyncio.sleep(args.hold_ms / 1000)
+                completed += 1
+            except Exception:
+                pass
+
+    started = timer.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = timer.perf_counter() - started
+    stats = pool_stats(engine)
+    await engine.dispose()
+    return completed / elapsed, stats
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL", "sqlite+aiosqlite:///bench_pool.db"),
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'pool':>5} {'req/s':>9} {'avg wait ms':>12} {'max wait ms':>12} "
+        f"{'overflows':>10} {'timeouts':>9}"
+    )
+    for pool_size in args.pool_sizes:
+        throughput, stats = await run_once(args.db_url, pool_size, args)
+        print(
+            f"{pool_size:>5} {throughput:>9.0f} {stats['avg_wait_ms']:>12.2f} "
+            f"{stats['max_wait_seconds'] * 1000:>12.2f} "
+            f"{stats['overflow_events']:>10} {stats['timeouts']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""empty message
+
+Revision ID: 3f1c9a7b2d40
+Revises: e87e708f110b
+Create Date: 2026-10-18 09:12:41.305118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a7b2d40"
+down_revision: Union[str, None] = "e87e708f110b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("attendances", sa.Column("lesson_date", sa.Date(), nullable=True))
+    op.execute("UPDATE attendances SET lesson_date = CAST(created_at AS DATE)")
+    # Rolls used to be generated without a uniqueness guarantee, keep the oldest row
+    op.execute(
+        """
+        DELETE FROM attendances a
+        USING attendances b
+        WHERE a.schedule_id = b.schedule_id
+          AND a.student_id = b.student_id
+          AND a.lesson_date = b.lesson_date
+          AND a.id > b.id
+        """
+    )
+    op.alter_column("attendances", "lesson_date", nullable=False)
+    op.create_unique_constraint(
+        "uniqueconst_schedule_student_date",
+        "attendances",
+        ["schedule_id", "student_id", "lesson_date"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "uniqueconst_schedule_student_date", "attendances", type_="unique"
+    )
+    op.drop_column("attendances", "lesson_date")
@@ -0,0 +1,60 @@
+"""student grade summary
+
+Revision ID: 5b7d2e91c4a8
+Revises: a9e4c02f7b13
+Create Date: 2026-10-18 14:05:22.184730
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7d2e91c4a8"
+down_revision: Union[str, None] = "a9e4c02f7b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "student_grade_summary",
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("subject_id", sa.Integer(), nullable=False),
+        sa.Column("grade_system", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("sum", sa.Float(), nullable=False),
+        sa.Column("sum_sq", sa.Float(), nullable=False),
+        sa.Column("last_updated", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("student_id", "subject_id", "grade_system"),
+    )
+    # Backfill from the existing grade history
+    for system, column in (
+        ("percent", "value_percent"),
+        ("GPA", '"value_GPA"'),
+        ("5numerical", "value_5numerical"),
+        ("pass/fail", "CAST(value_passing AS INTEGER)"),
+    ):
+        op.execute(
+            f"""
+            INSERT INTO student_grade_summary
+                (student_id, subject_id, grade_system, count, sum, sum_sq, last_updated)
+            SELECT g.student_id, COALESCE(s.subject_id, 0), '{system}', COUNT(*),
+                   SUM(CAST({column} AS FLOAT)),
+                   SUM(CAST({column} AS FLOAT) * CAST({column} AS FLOAT)),
+                   now()
+            FROM grades g JOIN schedules s ON s.id = g.schedule_id
+            WHERE {column} IS NOT NULL
+            GROUP BY g.student_id, COALESCE(s.subject_id, 0)
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("student_grade_summary")
@@ -0,0 +1,63 @@
+"""empty message
+
+Revision ID: a9e4c02f7b13
+Revises: 3f1c9a7b2d40
+Create Date: 2026-10-18 11:47:03.582914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a9e4c02f7b13"
+down_revision: Union[str, None] = "3f1c9a7b2d40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_schedules_school_id_day_of_week", "schedules", ["school_id", "day_of_week"]),
+    ("ix_schedules_group_id_day_of_week", "schedules", ["group_id", "day_of_week"]),
+    ("ix_schedules_teacher_id_day_of_week", "schedules", ["teacher_id", "day_of_week"]),
+    (
+        "ix_attendances_student_id_lesson_date",
+        "attendances",
+        ["student_id", "lesson_date"],
+    ),
+    ("ix_attendances_marked_by", "attendances", ["marked_by"]),
+    ("ix_grades_student_id", "grades", ["student_id"]),
+    ("ix_homeworks_school_id_group_id", "homeworks", ["school_id", "group_id"]),
+    ("ix_homeworks_school_id_teacher_id", "homeworks", ["school_id", "teacher_id"]),
+    ("ix_invitations_invited_user_id", "invitations", ["invited_user_id"]),
+    ("ix_subjects_school_id_name", "subjects", ["school_id", "name"]),
+    ("ix_groups_school_id", "groups", ["school_id"]),
+    ("ix_teachers_school_id", "teachers", ["school_id"]),
+    ("ix_students_school_id_group_id", "students", ["school_id", "group_id"]),
+    ("ix_students_group_id", "students", ["group_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,42 @@
+"""school data versions
+
+Revision ID: c81f4a2d9e63
+Revises: 5b7d2e91c4a8
+Create Date: 2026-10-18 15:32:10.447913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f4a2d9e63"
+down_revision: Union[str, None] = "5b7d2e91c4a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "schools",
+        sa.Column("data_version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "schools",
+        sa.Column(
+            "data_updated_at",
+            sa.DateTime(),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("schools", "data_updated_at")
+    op.drop_column("schools", "data_version")
@@ -0,0 +1,135 @@
+"""partition attendances by month
+
+Revision ID: d4e7a1c93b52
+Revises: c81f4a2d9e63
+Create Date: 2026-10-18 18:04:51.203174
+
+"""
+
+from typing import Sequence, Union
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e7a1c93b52"
+down_revision: Union[str, None] = "c81f4a2d9e63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('attendances_id_seq'),
+    status VARCHAR NOT NULL,
+    schedule_id INTEGER NOT NULL REFERENCES schedules (id) ON DELETE CASCADE,
+    student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+    marked_by INTEGER REFERENCES teachers (id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    lesson_date DATE NOT NULL"""
+
+COPY = (
+    "id, status, schedule_id, student_id, marked_by, "
+    "created_at, updated_at, lesson_date"
+)
+
+
+def _next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def _rename_old(suffix: str) -> None:
+    old = f"attendances_{suffix}"
+    op.execute(f"ALTER TABLE attendances RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT attendances_pkey TO {old}_pkey")
+    op.execute(
+        f"ALTER TABLE {old} RENAME CONSTRAINT "
+        f"uniqueconst_schedule_student_date TO {old}_schedule_student_date"
+    )
+    op.execute(
+        "ALTER INDEX ix_attendances_student_id_lesson_date "
+        f"RENAME TO ix_{old}_student_id_lesson_date"
+    )
+    op.execute(f"ALTER INDEX ix_attendances_marked_by RENAME TO ix_{old}_marked_by")
+
+
+def _create_indexes() -> None:
+    op.execute(
+        "CREATE INDEX ix_attendances_student_id_lesson_date "
+        "ON attendances (student_id, lesson_date)"
+    )
+    op.execute("CREATE INDEX ix_attendances_marked_by ON attendances (marked_by)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only PostgreSQL partitions; the partition key has to be in every unique
+    # constraint, which the (schedule_id, student_id, lesson_date) one already is
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rename_old("unpartitioned")
+    op.execute(
+        f"""
+        CREATE TABLE attendances ({COLUMNS},
+            CONSTRAINT attendances_pkey PRIMARY KEY (id, lesson_date),
+            CONSTRAINT uniqueconst_schedule_student_date
+                UNIQUE (schedule_id, student_id, lesson_date)
+        ) PARTITION BY RANGE (lesson_date)
+        """
+    )
+    _create_indexes()
+    op.execute("CREATE TABLE attendances_default PARTITION OF attendances DEFAULT")
+
+    first = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(lesson_date) FROM attendances_unpartitioned"))
+        .scalar()
+    )
+    today = date.today()
+    month = (first or today).replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE attendances_y{month.year}m{month.month:02d} "
+            f"PARTITION OF attendances "
+            f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        )
+        month = _next_month(month)
+
+    op.execute(
+        f"INSERT INTO attendances ({COPY}) "
+        f"SELECT {COPY} FROM attendances_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE attendances_id_seq OWNED BY attendances.id")
+    op.execute("DROP TABLE attendances_unpartitioned")
+    op.execute("ANALYZE attendances")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rename_old("partitioned")
+    op.execute(
+        f"""
+        CREATE TABLE attendances ({COLUMNS},
+            CONSTRAINT attendances_pkey PRIMARY KEY (id),
+            CONSTRAINT uniqueconst_schedule_student_date
+                UNIQUE (schedule_id, student_id, lesson_date)
+        )
+        """
+    )
+    _create_indexes()
+    op.execute(
+        f"INSERT INTO attendances ({COPY}) SELECT {COPY} FROM attendances_partitioned"
+    )
+    op.execute("ALTER SEQUENCE attendances_id_seq OWNED BY attendances.id")
+    # Drops the monthly and default partitions with it
+    op.execute("DROP TABLE attendances_partitioned")
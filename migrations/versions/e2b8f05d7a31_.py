@@ -0,0 +1,42 @@
+"""student attendance bitmaps
+
+Revision ID: e2b8f05d7a31
+Revises: d4e7a1c93b52
+Create Date: 2026-10-18 19:12:40.518206
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b8f05d7a31"
+down_revision: Union[str, None] = "d4e7a1c93b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "student_attendance_bitmaps",
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("term_start", sa.Date(), nullable=False),
+        sa.Column("present", sa.LargeBinary(), nullable=False),
+        sa.Column("late", sa.LargeBinary(), nullable=False),
+        sa.Column("excused", sa.LargeBinary(), nullable=False),
+        sa.Column("absent", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("student_id", "term_start"),
+    )
+    # The bitmaps are built in Python, backfill them with
+    # python -m app.scripts.attendance_bitmaps rebuild
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("student_attendance_bitmaps")
@@ -0,0 +1,76 @@
+"""exclude overlapping lessons per group and teacher
+
+Revision ID: f3c9d2a6b874
+Revises: e2b8f05d7a31
+Create Date: 2026-10-18 20:41:07.392615
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9d2a6b874"
+down_revision: Union[str, None] = "e2b8f05d7a31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Lesson times as a range on a fixed day, so GiST can test overlap with &&
+SLOT = "tsrange(DATE '2000-01-01' + start_time, DATE '2000-01-01' + end_time)"
+
+CONSTRAINTS = {
+    "excl_schedules_group_slot": "group_id",
+    "excl_schedules_teacher_slot": "teacher_id",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Other databases rely on the check in app/services/timetable.py
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    clashes = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                """
+                SELECT count(*) FROM schedules a JOIN schedules b
+                  ON a.id < b.id AND a.day_of_week = b.day_of_week
+                 AND a.start_time < b.end_time AND b.start_time < a.end_time
+                 AND (a.group_id = b.group_id OR a.teacher_id = b.teacher_id)
+                WHERE a.ended_at IS NULL AND b.ended_at IS NULL
+                """
+            )
+        )
+        .scalar()
+    )
+    if clashes:
+        raise RuntimeError(
+            f"{clashes} pairs of lessons overlap, list them with "
+            "GET /schedules/conflicts/?school_id=... and fix them first"
+        )
+
+    op.create_check_constraint(
+        "ck_schedules_start_before_end", "schedules", "start_time < end_time"
+    )
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    for name, column in CONSTRAINTS.items():
+        op.execute(
+            f"""
+            ALTER TABLE schedules ADD CONSTRAINT {name} EXCLUDE USING gist (
+                {column} WITH =, day_of_week WITH =, ({SLOT}) WITH &&
+            ) WHERE ({column} IS NOT NULL AND ended_at IS NULL)
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name in CONSTRAINTS:
+        op.drop_constraint(name, "schedules")
+    op.drop_constraint("ck_schedules_start_before_end", "schedules")
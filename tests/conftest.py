@@ -1,14 +1,23 @@
 import pytest
+from datetime import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from httpx import AsyncClient, ASGITransport
 
-from app.db.core import Base, get_async_db
+from app.db.core import Base, get_async_db, get_sessionmaker
 from app.main import app
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.types import Student
 from app.db.models.users import User
 from app.services.auth import get_current_user
+from app.core.metrics import instrument_engine
+from app.core.response_cache import MemoryBackend, response_cache
 
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
 engine = create_async_engine(TEST_DB_URL, future=True)
+instrument_engine(engine)
 TestingSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
 )
@@ -59,6 +68,9 @@ async def override_get_db():
 def setup_dependency_overrides():
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_async_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: TestingSessionLocal
+    # Tests share one database, a fresh cache keeps them independent
+    response_cache.configure(MemoryBackend(maxsize=1000, ttl=60))
     yield
     app.dependency_overrides.clear()
 
@@ -84,3 +96,55 @@ async def test_user(db_session):
     await db_session.commit()
     await db_session.refresh(user)
     return user
+
+
+class QueryCounter:
+    def __init__(self, table: str | None = None):
+        self.table = table
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, *args):
+        if self.table is None or f"FROM {self.table}" in statement:
+            self.count += 1
+
+
+async def seed_lessons(db_session, name: str, students_count: int):
+    school = School(name=name, short_name="RS", country="Norway", address="Fjord 1")
+    db_session.add(school)
+    await db_session.flush()
+    group = Group(grade=5, grade_section="A", school_id=school.id)
+    other_group = Group(grade=6, grade_section="B", school_id=school.id)
+    db_session.add_all([group, other_group])
+    await db_session.flush()
+    for i in range(students_count):
+        db_session.add(
+            Student(
+                username=f"{name}_student_{i}",
+                email=f"{name}_{i}@example.com",
+                first_name="Roll",
+                last_name=str(i),
+                hashed_password="x",
+                school_id=school.id,
+                group_id=group.id,
+            )
+        )
+    schedules = [
+        Schedule(
+            group_id=gr.id,
+            school_id=school.id,
+            day_of_week="monday",
+            start_time=time(8 + hour),
+            end_time=time(9 + hour),
+        )
+        for hour, gr in enumerate([group, group, other_group])
+    ]
+    db_session.add_all(schedules)
+    await db_session.commit()
+    return school, schedules
@@ -0,0 +1,86 @@
+import json
+import pytest
+from datetime import date
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.core.settings import settings
+from app.crud.schedules import create_attendance
+from app.db.models.attendance import Attendance
+from app.db.partitions import months_between, partition_name
+from app.exceptions.basic import AlreadyExistsError, NotAllowed
+from app.services.attendance_archive import (
+    academic_year,
+    archive_academic_year,
+    archived_years,
+)
+from tests.conftest import seed_lessons
+
+# A year no other test writes attendance for
+ARCHIVED_DAY = date(2019, 10, 7)
+LIVE_DAY = date(2025, 9, 1)
+
+
+@pytest.fixture
+async def archived_school(db_session, request, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ATTENDANCE_ARCHIVE_DIR", str(tmp_path))
+    school, schedules = await seed_lessons(db_session, request.node.name, 3)
+    for day in (ARCHIVED_DAY, LIVE_DAY):
+        await create_attendance(
+            db=db_session,
+            schedule_ids=[schedule.id for schedule in schedules],
+            school_id=school.id,
+            lesson_date=day,
+        )
+    archived = await archive_academic_year(db_session, academic_year(ARCHIVED_DAY))
+    return school, archived
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_monthly_partitions():
+    months = months_between(date(2025, 11, 15), date(2026, 2, 1))
+    assert [partition_name(month) for month in months] == [
+        "attendances_y2025m11",
+        "attendances_y2025m12",
+        "attendances_y2026m01",
+        "attendances_y2026m02",
+    ]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_archive_moves_closed_year_out_of_db(db_session, archived_school):
+    school, archived = archived_school
+    # 2 lessons of the populated group x 3 students
+    assert archived == 6
+    assert archived_years() == [2019]
+    remaining = await db_session.scalar(
+        select(func.count())
+        .select_from(Attendance)
+        .where(Attendance.lesson_date == ARCHIVED_DAY)
+    )
+    assert remaining == 0
+
+    with pytest.raises(AlreadyExistsError):
+        await archive_academic_year(db_session, 2019)
+    with pytest.raises(NotAllowed):
+        await archive_academic_year(db_session, 2025, today=date(2026, 1, 1))
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_export_reads_through_archive(client: AsyncClient, archived_school):
+    school, _ = archived_school
+    response = await client.get(
+        "/exports/attendances/", params={"school_id": school.id}
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["lesson_date"] for row in rows] == [ARCHIVED_DAY.isoformat()] * 6 + [
+        LIVE_DAY.isoformat()
+    ] * 6
+    assert set(rows[0]) == set(rows[-1])
+
+    response = await client.get(
+        "/exports/attendances/",
+        params={"school_id": school.id, "date_from": "2020-01-01", "format": "csv"},
+    )
+    assert len(response.text.splitlines()) == 1 + 6
@@ -0,0 +1,288 @@
+import pytest
+from datetime import date, time
+from sqlalchemy import delete, select
+
+from app.crud.schedules import ScheduleCRUD, create_attendance
+from app.db.models.attendance import Attendance
+from app.db.models.attendance_bitmap import StudentAttendanceBitmap
+from app.db.models.schedules import Schedule
+from app.db.models.types import Student, Teacher
+from app.schemas.attendance import StatusOptions
+from app.schemas.schedules import ScheduleUpdateData
+from app.services import attendance_bitmap
+from app.services.attendance_bitmap import TermAttendance, slot, term_bounds
+from app.services.teacher_service import TeacherService
+from tests.conftest import QueryCounter, override_get_current_user, seed_lessons
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_term_attendance_bit_arithmetic():
+    start, end = term_bounds(date(2025, 10, 15))
+    assert (start, end) == (date(2025, 9, 1), date(2026, 2, 1))
+    assert term_bounds(date(2026, 1, 31)) == (start, end)
+    assert term_bounds(date(2026, 2, 1)) == (end, date(2026, 9, 1))
+
+    term = TermAttendance(start, end)
+    monday, tuesday = date(2025, 9, 1), date(2025, 9, 2)
+    term.mark(slot(start, monday, time(8)), "absent")
+    term.mark(slot(start, monday, time(9, 45)), "present")
+    term.mark(slot(start, tuesday, time(8)), "absent")
+    term.mark(slot(start, date(2025, 9, 8), time(8)), "excused")
+    term.mark(slot(start, date(2025, 9, 9), time(8)), "late")
+    term.mark(slot(start, date(2025, 9, 10), time(8)), "present")
+    # Marking a slot again replaces its status
+    term.mark(slot(start, date(2025, 9, 10), time(8)), "absent")
+    term.mark(slot(start, date(2025, 9, 10), time(8)), "present")
+
+    assert term.counts() == {"absent": 2, "present": 2, "excused": 1, "late": 1}
+    assert term.rate() == 3 / 5
+    # 1 and 2 Sep had absences, 8 Sep excused counts as attended
+    assert term.streaks() == (3, 2)
+    assert term.absences_by_weekday()["monday"] == 1
+    assert term.absences_by_weekday()["tuesday"] == 1
+    assert term.absences_by_time() == {"08:00": 2}
+
+    term.mark(slot(start, monday, time(8)), None)
+    assert term.counts()["absent"] == 1
+    assert TermAttendance(start, end).summary()["rate"] is None
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_bitmaps_follow_attendance_marks(client, db_session):
+    school, schedules = await seed_lessons(db_session, "bitmap school", 3)
+    result = await db_session.execute(
+        select(Student.id).where(Student.school_id == school.id).order_by(Student.id)
+    )
+    first, *others = result.scalars().all()
+
+    async def mark(schedule, lesson_date, status):
+        response = await client.post(
+            f"/teachers/lessons/{schedule.id}/attendance/",
+            json={
+                "lesson_date": lesson_date,
+                "marks": [{"student_id": first, "status": status}]
+                + [{"student_id": i, "status": "present"} for i in others],
+            },
+        )
+        assert response.status_code == 200
+
+    await mark(schedules[0], "2025-09-01", "absent")
+    await mark(schedules[1], "2025-09-01", "present")
+    await mark(schedules[0], "2025-09-08", "absent")
+    await mark(schedules[0], "2025-09-15", "present")
+    await mark(schedules[0], "2025-09-15", "late")
+    # A generated roll starts everybody absent, but nobody marked it yet
+    await create_attendance(
+        db_session, [schedules[1].id], lesson_date=date(2025, 9, 22)
+    )
+
+    url = f"/attendances/students/{first}/summary"
+    with QueryCounter(table="attendances") as counter:
+        response = await client.get(url, params={"day": "2025-10-01"})
+    assert response.status_code == 200
+    # Served from the bitmaps alone
+    assert counter.count == 0
+    summary = response.json()
+    assert summary["term_start"] == "2025-09-01"
+    assert (summary["lessons"], summary["present"], summary["late"]) == (4, 1, 1)
+    assert summary["absent"] == 2
+    assert summary["rate"] == 2 / 4
+    assert summary["current_streak"] == 1
+    assert summary["longest_absence_streak"] == 2
+    assert summary["absences_by_weekday"]["monday"] == 2
+    assert summary["absences_by_time"] == {"08:00": 2}
+
+    rows = await db_session.execute(
+        select(StudentAttendanceBitmap)
+        .where(StudentAttendanceBitmap.student_id.in_([first, *others]))
+        .order_by(StudentAttendanceBitmap.student_id)
+        .execution_options(populate_existing=True)
+    )
+    built = [(row.present, row.late, row.excused, row.absent) for row in rows.scalars()]
+    assert await attendance_bitmap.rebuild(db_session, [first, *others]) == 3
+    rows = await db_session.execute(
+        select(StudentAttendanceBitmap)
+        .where(StudentAttendanceBitmap.student_id.in_([first, *others]))
+        .order_by(StudentAttendanceBitmap.student_id)
+        .execution_options(populate_existing=True)
+    )
+    assert [
+        (row.present, row.late, row.excused, row.absent) for row in rows.scalars()
+    ] == built
+
+    attendance_id = await db_session.scalar(
+        select(Attendance.id).where(
+            Attendance.student_id == first, Attendance.lesson_date == date(2025, 9, 15)
+        )
+    )
+    response = await client.delete(f"/attendances/{attendance_id}")
+    assert response.status_code == 200
+    summary = (await client.get(url, params={"day": "2025-10-01"})).json()
+    assert (summary["lessons"], summary["late"]) == (3, 0)
+
+    response = await client.get("/attendances/students/999999/summary")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_mark_presence_marks_one_lesson_date(client, db_session):
+    school, schedules = await seed_lessons(db_session, "presence school", 1)
+    teacher = Teacher(
+        username="presence_teacher",
+        email="presence_teacher@example.com",
+        first_name="Pres",
+        last_name="Ence",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add(teacher)
+    await db_session.commit()
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.school_id == school.id)
+    )
+    lesson = schedules[0]
+    for day in (date(2025, 9, 1), date(2025, 9, 8)):
+        await create_attendance(db_session, [lesson.id], lesson_date=day)
+
+    attendance = await TeacherService.mark_presence(
+        db_session,
+        teacher,
+        student_id,
+        lesson.id,
+        StatusOptions.present,
+        date(2025, 9, 8),
+    )
+    assert attendance.lesson_date == date(2025, 9, 8)
+    rows = await db_session.execute(
+        select(Attendance.lesson_date, Attendance.status)
+        .where(Attendance.schedule_id == lesson.id)
+        .order_by(Attendance.lesson_date)
+        .execution_options(populate_existing=True)
+    )
+    assert rows.all() == [(date(2025, 9, 1), "absent"), (date(2025, 9, 8), "present")]
+    # Today's lesson has no row yet and gets its own
+    today = await TeacherService.mark_presence(
+        db_session, teacher, student_id, lesson.id, StatusOptions.late
+    )
+    assert today.lesson_date == date.today()
+    assert today.id != attendance.id
+
+    term = await attendance_bitmap.student_term(
+        db_session, student_id, date(2025, 9, 8)
+    )
+    # The placeholder of 1 Sep was never marked
+    assert term.counts() == {"absent": 0, "present": 1, "excused": 0, "late": 0}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_schedule_changes_move_bitmap_marks(client, db_session):
+    school, schedules = await seed_lessons(db_session, "reslot school", 1)
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.school_id == school.id)
+    )
+    lesson = schedules[0]
+    response = await client.post(
+        f"/teachers/lessons/{lesson.id}/attendance/",
+        json={
+            "lesson_date": "2025-09-01",
+            "marks": [{"student_id": student_id, "status": "absent"}],
+        },
+    )
+    assert response.status_code == 200
+    day = date(2025, 9, 1)
+
+    admin = await override_get_current_user()
+    await ScheduleCRUD.update_schedule(
+        db_session,
+        admin,
+        lesson.id,
+        ScheduleUpdateData(start_time=time(12), end_time=time(12, 45)),
+    )
+    term = await attendance_bitmap.student_term(db_session, student_id, day)
+    assert term.absences_by_time() == {"12:00": 1}
+
+    # Deleting the attendance afterwards clears the moved bit
+    attendance_id = await db_session.scalar(
+        select(Attendance.id).where(Attendance.schedule_id == lesson.id)
+    )
+    response = await client.delete(f"/attendances/{attendance_id}")
+    assert response.status_code == 200
+    term = await attendance_bitmap.student_term(db_session, student_id, day)
+    assert term.recorded == 0
+
+    response = await client.post(
+        f"/teachers/lessons/{schedules[1].id}/attendance/",
+        json={
+            "lesson_date": "2025-09-01",
+            "marks": [{"student_id": student_id, "status": "late"}],
+        },
+    )
+    await ScheduleCRUD.delete_schedule(db_session, admin, schedules[1].id)
+    term = await attendance_bitmap.student_term(db_session, student_id, day)
+    assert term.recorded == 0
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_lessons_sharing_a_slot(client, db_session, caplog):
+    school, schedules = await seed_lessons(db_session, "shared slot school", 1)
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.school_id == school.id)
+    )
+    first = schedules[0]
+    first.end_time = time(8, 20)
+    second = Schedule(
+        group_id=first.group_id,
+        school_id=school.id,
+        day_of_week="monday",
+        start_time=time(8, 20),
+        end_time=time(8, 40),
+    )
+    db_session.add(second)
+    await db_session.commit()
+    day = date(2025, 9, 1)
+
+    async def mark(schedule, status):
+        response = await client.post(
+            f"/teachers/lessons/{schedule.id}/attendance/",
+            json={
+                "lesson_date": day.isoformat(),
+                "marks": [{"student_id": student_id, "status": status}],
+            },
+        )
+        assert response.status_code == 200
+
+    async def counts():
+        term = await attendance_bitmap.student_term(db_session, student_id, day)
+        return {status: count for status, count in term.counts().items() if count}
+
+    await mark(first, "absent")
+    await mark(second, "present")
+    # The slot keeps the earlier lesson, the later one is only logged
+    assert await counts() == {"absent": 1}
+    assert f"the bitmaps keep schedule {first.id}" in caplog.text
+    await mark(first, "late")
+    assert await counts() == {"late": 1}
+    assert await attendance_bitmap.rebuild(db_session, [student_id]) == 1
+    assert await counts() == {"late": 1}
+
+    # Without the earlier mark the slot goes to the later lesson
+    attendance_id = await db_session.scalar(
+        select(Attendance.id).where(
+            Attendance.schedule_id == first.id, Attendance.student_id == student_id
+        )
+    )
+    response = await client.delete(f"/attendances/{attendance_id}")
+    assert response.status_code == 200
+    assert await counts() == {"present": 1}
+    await mark(first, "absent")
+    assert await counts() == {"absent": 1}
+
+    # Removing the later lesson leaves the earlier one's mark alone
+    admin = await override_get_current_user()
+    await ScheduleCRUD.delete_schedule(db_session, admin, second.id)
+    assert await counts() == {"absent": 1}
+    # Foreign keys are off in the test database, nothing cascaded
+    await db_session.execute(
+        delete(Attendance).where(Attendance.schedule_id == second.id)
+    )
+    await db_session.commit()
@@ -0,0 +1,224 @@
+import logging
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy import select, func
+
+from app.crud.attendance import AttendanceCRUD
+from app.crud.schedules import ScheduleCRUD, create_attendance
+from app.db.models.attendance import Attendance
+from app.db.models.types import Student
+from app.schemas.auth import CurrentUser
+from app.schemas.schedules import ScheduleUpdateData
+from app.services import roll_service
+from app.services.roll_service import RollScheduler, generate_rolls
+from tests.conftest import (
+    QueryCounter,
+    TestingSessionLocal,
+    override_get_current_user,
+    seed_lessons,
+)
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_create_attendance_inserts_missing_roll_once(db_session):
+    school, schedules = await seed_lessons(db_session, "roll school", 4)
+    schedule_ids = [schedule.id for schedule in schedules]
+    lesson_date = date(2025, 9, 1)
+
+    created = await create_attendance(
+        db=db_session,
+        schedule_ids=schedule_ids,
+        school_id=school.id,
+        lesson_date=lesson_date,
+    )
+    # the other group's lesson has no students, so only 2 lessons x 4 students
+    assert created == 8
+
+    created_again = await create_attendance(
+        db=db_session,
+        schedule_ids=schedule_ids,
+        school_id=school.id,
+        lesson_date=lesson_date,
+    )
+    assert created_again == 0
+
+    result = await db_session.execute(
+        select(func.count(Attendance.id)).where(
+            Attendance.schedule_id.in_(schedule_ids)
+        )
+    )
+    assert result.scalar_one() == 8
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_create_attendance_without_schedules(db_session):
+    assert await create_attendance(db=db_session, schedule_ids=[]) == 0
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_generate_rolls_per_school(db_session):
+    school, schedules = await seed_lessons(db_session, "job school", 3)
+
+    # 2025-09-01 is a monday, 2025-09-02 has no lessons
+    created = await generate_rolls(
+        lesson_date=date(2025, 9, 1),
+        school_ids=[school.id],
+        session_factory=TestingSessionLocal,
+    )
+    assert created == {school.id: 6}
+
+    created = await generate_rolls(
+        lesson_date=date(2025, 9, 2),
+        school_ids=[school.id],
+        session_factory=TestingSessionLocal,
+    )
+    assert created == {school.id: 0}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_roll_job_logs_partition_failure(db_session, monkeypatch, caplog):
+    school, schedules = await seed_lessons(db_session, "partition school", 3)
+
+    async def fail(db, today):
+        raise RuntimeError("no partition")
+
+    monkeypatch.setattr(roll_service, "ensure_attendance_partitions", fail)
+    caplog.set_level(logging.WARNING, logger="app.services.roll_service")
+    scheduler = RollScheduler(days_ahead=0, session_factory=TestingSessionLocal)
+    await scheduler.run_once(today=date(2025, 9, 8))
+
+    assert "no partition" in caplog.text
+    # Rolls are generated regardless
+    count = await db_session.scalar(
+        select(func.count())
+        .select_from(Attendance)
+        .where(
+            Attendance.schedule_id.in_([s.id for s in schedules]),
+            Attendance.lesson_date == date(2025, 9, 8),
+        )
+    )
+    assert count == 6
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_get_attendances_filters(db_session):
+    school, schedules = await seed_lessons(db_session, "filter school", 3)
+    for day in (date(2025, 9, 1), date(2025, 9, 8)):
+        await create_attendance(
+            db=db_session,
+            schedule_ids=[schedule.id for schedule in schedules],
+            school_id=school.id,
+            lesson_date=day,
+        )
+    admin = CurrentUser(id=1, username="admin", type="admin")
+
+    page = await AttendanceCRUD.get_attendances_id(
+        db=db_session, user=admin, school_id=school.id
+    )
+    assert len(page.items) == 12
+
+    page = await AttendanceCRUD.get_attendances_id(
+        db=db_session,
+        user=admin,
+        school_id=school.id,
+        group_id=schedules[0].group_id,
+        schedule_id=schedules[0].id,
+        date_from=date(2025, 9, 2),
+    )
+    assert len(page.items) == 3
+    assert {attendance.lesson_date for attendance in page.items} == {date(2025, 9, 8)}
+
+    page = await AttendanceCRUD.get_attendances_id(
+        db=db_session, user=admin, school_id=school.id + 1000
+    )
+    assert page.items == []
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_mark_lesson_attendance_batch(client, db_session):
+    school, schedules = await seed_lessons(db_session, "batch school", 30)
+    result = await db_session.execute(
+        select(Student.id).where(Student.school_id == school.id).order_by(Student.id)
+    )
+    student_ids = result.scalars().all()
+    url = f"/teachers/lessons/{schedules[0].id}/attendance/"
+    payload = {
+        "lesson_date": "2025-09-01",
+        "marks": [{"student_id": i, "status": "present"} for i in student_ids]
+        + [{"student_id": 10**6, "status": "late"}],
+    }
+
+    with QueryCounter() as counter:
+        response = await client.post(url, json=payload)
+    assert response.status_code == 200
+    # one SELECT for the lesson and its members, one upsert, and four
+    # statements for the bitmaps whatever the number of students
+    assert counter.count == 6
+    results = response.json()
+    assert [row["student_id"] for row in results] == student_ids + [10**6]
+    assert all(row["attendance_id"] for row in results[:-1])
+    assert results[-1]["error"] and results[-1]["attendance_id"] is None
+
+    payload["marks"] = [{"student_id": student_ids[0], "status": "excused"}]
+    response = await client.post(url, json=payload)
+    assert response.json()[0]["attendance_id"] == results[0]["attendance_id"]
+    rows = await db_session.execute(
+        select(Attendance.status, func.count())
+        .where(Attendance.schedule_id == schedules[0].id)
+        .group_by(Attendance.status)
+    )
+    assert dict(rows.all()) == {"present": 29, "excused": 1}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_update_schedule_moves_todays_roll(db_session):
+    school, schedules = await seed_lessons(db_session, "moved school", 3)
+    admin = await override_get_current_user()
+    today = date.today().strftime("%A").lower()
+    other_day = "sunday" if today != "sunday" else "saturday"
+    lesson = schedules[0]
+    lesson.day_of_week = other_day
+    await db_session.commit()
+
+    async def todays_roll():
+        result = await db_session.execute(
+            select(Attendance.student_id, Attendance.status)
+            .where(
+                Attendance.schedule_id == lesson.id,
+                Attendance.lesson_date == date.today(),
+            )
+            .order_by(Attendance.student_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.all()
+
+    await ScheduleCRUD.update_schedule(
+        db_session, admin, lesson.id, ScheduleUpdateData(day_of_week=today)
+    )
+    roll = await todays_roll()
+    assert [status for _, status in roll] == ["absent"] * 3
+
+    marked = await db_session.scalar(
+        select(Attendance).where(
+            Attendance.schedule_id == lesson.id,
+            Attendance.student_id == roll[0][0],
+        )
+    )
+    marked.status = "present"
+    marked.updated_at = datetime.now(tz=timezone.utc)
+    await db_session.commit()
+
+    # Moving it away drops the placeholders but keeps what was marked
+    await ScheduleCRUD.update_schedule(
+        db_session, admin, lesson.id, ScheduleUpdateData(day_of_week=other_day)
+    )
+    assert await todays_roll() == [(roll[0][0], "present")]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_mark_lesson_attendance_unknown_lesson(client):
+    response = await client.post(
+        "/teachers/lessons/999999/attendance/",
+        json={"marks": [{"student_id": 1, "status": "present"}]},
+    )
+    assert response.status_code == 404
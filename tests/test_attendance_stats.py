@@ -0,0 +1,156 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import insert, select
+
+from app.crud.schedules import create_attendance
+from app.db.models.attendance import Attendance
+from app.db.models.subjects import Subject
+from app.db.models.types import Student, Teacher
+from tests.conftest import QueryCounter, seed_lessons
+
+WEEKS = 10
+
+
+async def seed_term(db_session):
+    """Four students over ten Mondays of two lessons, one with subject and teacher.
+
+    Student 0 misses every 08:00 lesson, student 1 is excused from two and
+    student 3 is late once; everything else is present. Unmarked rolls are
+    added for a past and a future day, and must not count.
+    """
+    school, schedules = await seed_lessons(db_session, "stats school", 4)
+    subject = Subject(name="Maths", school_id=school.id)
+    teacher = Teacher(
+        username="stats_teacher",
+        email="stats_teacher@example.com",
+        first_name="Ada",
+        last_name="Lovelace",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add_all([subject, teacher])
+    await db_session.flush()
+    schedules[0].subject_id = subject.id
+    schedules[0].teacher_id = teacher.id
+
+    result = await db_session.execute(
+        select(Student.id).where(Student.school_id == school.id).order_by(Student.id)
+    )
+    students = result.scalars().all()
+
+    def status(student: int, lesson: int, week: int) -> str:
+        if student == 0 and lesson == 0:
+            return "absent"
+        if student == 1 and lesson == 0 and week < 2:
+            return "excused"
+        if student == 3 and lesson == 1 and week == 0:
+            return "late"
+        return "present"
+
+    now = datetime.now(tz=timezone.utc)
+    await db_session.execute(
+        insert(Attendance),
+        [
+            {
+                "schedule_id": schedules[lesson].id,
+                "student_id": student_id,
+                "lesson_date": date(2025, 9, 1) + timedelta(weeks=week),
+                "status": status(i, lesson, week),
+                "marked_by": teacher.id,
+                "created_at": now,
+            }
+            for i, student_id in enumerate(students)
+            for lesson in (0, 1)
+            for week in range(WEEKS)
+        ],
+    )
+    # Nobody marked these yet: a roll from the roll job and one for next week
+    await create_attendance(
+        db_session,
+        [schedules[0].id],
+        lesson_date=date(2025, 9, 1) + timedelta(weeks=WEEKS),
+    )
+    await create_attendance(
+        db_session, [schedules[1].id], lesson_date=date.today() + timedelta(days=7)
+    )
+    await db_session.commit()
+    return school, schedules, subject, teacher, students
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_attendance_stats(client, db_session):
+    school, schedules, subject, teacher, students = await seed_term(db_session)
+    params = {"school_id": school.id}
+
+    with QueryCounter() as counter:
+        response = await client.get("/attendances/stats/", params=params)
+    assert response.status_code == 200
+    assert counter.count == 1
+    rates = response.json()
+    assert rates["by"] == "group"
+    assert rates["overall"] == {
+        "lessons": 80,
+        "absent": 10,
+        "present": 67,
+        "excused": 2,
+        "late": 1,
+        "rate": 68 / 78,
+    }
+    [row] = rates["rows"]
+    assert (row["key"], row["label"]) == (schedules[0].group_id, "5A")
+
+    response = await client.get(
+        "/attendances/stats/", params={**params, "by": "subject"}
+    )
+    rows = {row["key"]: row for row in response.json()["rows"]}
+    assert rows[subject.id]["label"] == "Maths"
+    assert rows[subject.id]["rate"] == 28 / 38
+    assert rows[None]["lessons"] == 40
+
+    response = await client.get(
+        "/attendances/stats/", params={**params, "by": "teacher"}
+    )
+    rows = {row["key"]: row for row in response.json()["rows"]}
+    assert rows[teacher.id]["label"] == "Ada Lovelace"
+    assert rows[teacher.id]["absent"] == 10
+
+    response = await client.get(
+        "/attendances/stats/",
+        params={**params, "by": "weekday", "date_from": "2025-09-08"},
+    )
+    [row] = response.json()["rows"]
+    assert (row["key"], row["lessons"]) == ("monday", 72)
+
+    response = await client.get("/attendances/stats/chronic/", params=params)
+    assert response.status_code == 200
+    absentees = response.json()
+    assert [row["student_id"] for row in absentees] == students[:2]
+    assert absentees[0]["missed_rate"] == 0.5
+    assert absentees[0]["student_name"] == "Roll 0"
+    assert absentees[1]["excused"] == 2
+    response = await client.get(
+        "/attendances/stats/chronic/", params={**params, "threshold": 0.2}
+    )
+    assert [row["student_id"] for row in response.json()] == students[:1]
+    response = await client.get(
+        "/attendances/stats/chronic/", params={**params, "min_lessons": 21}
+    )
+    assert response.json() == []
+
+    response = await client.get("/attendances/stats/heatmap/", params=params)
+    assert response.status_code == 200
+    cells = response.json()
+    assert [(cell["day_of_week"], cell["start_time"]) for cell in cells] == [
+        ("monday", "08:00:00"),
+        ("monday", "09:00:00"),
+    ]
+    assert (cells[0]["absent"], cells[1]["late"]) == (10, 1)
+    response = await client.get(
+        "/attendances/stats/heatmap/", params={**params, "teacher_id": teacher.id}
+    )
+    assert len(response.json()) == 1
+
+    response = await client.get(
+        "/attendances/stats/", params={"school_id": school.id + 1000}
+    )
+    assert response.status_code == 404
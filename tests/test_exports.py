@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date
+from httpx import AsyncClient
+
+from app.crud.schedules import create_attendance
+from app.main import app
+from app.schemas.auth import CurrentUser
+from app.schemas.exports import ExportFormat
+from app.services import export_service
+from app.services.auth import get_current_user
+from app.services.export_service import ExportService
+from tests.conftest import TestingSessionLocal, seed_lessons
+
+
+@pytest.fixture
+async def export_school(db_session, request):
+    school, schedules = await seed_lessons(db_session, request.node.name, 3)
+    for day in (date(2025, 9, 1), date(2025, 9, 8)):
+        await create_attendance(
+            db=db_session,
+            schedule_ids=[schedule.id for schedule in schedules],
+            school_id=school.id,
+            lesson_date=day,
+        )
+    return school
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_export_attendances_ndjson(client: AsyncClient, export_school):
+    response = await client.get(
+        "/exports/attendances/", params={"school_id": export_school.id}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    # 2 lessons of the populated group x 3 students x 2 dates
+    assert len(rows) == 12
+    assert rows[0]["lesson_date"] == "2025-09-01"
+
+    response = await client.get(
+        "/exports/attendances/",
+        params={"school_id": export_school.id, "date_from": "2025-09-02"},
+    )
+    assert len(response.text.splitlines()) == 6
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_export_attendances_csv(client: AsyncClient, export_school):
+    response = await client.get(
+        "/exports/attendances/",
+        params={"school_id": export_school.id, "format": "csv"},
+    )
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 12
+    assert {row["status"] for row in rows} == {"absent"}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_export_other_school_forbidden(client: AsyncClient, export_school):
+    async def principal():
+        return CurrentUser(
+            id=1, username="p", type="principal", school_id=export_school.id + 1
+        )
+
+    app.dependency_overrides[get_current_user] = principal
+    response = await client.get(
+        "/exports/grades/", params={"school_id": export_school.id}
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_export_streams_in_chunks(export_school, monkeypatch):
+    monkeypatch.setattr(export_service, "CHUNK_SIZE", 5)
+    admin = CurrentUser(id=1, username="admin", type="admin")
+    stmt = ExportService.attendances(user=admin, school_id=export_school.id)
+    chunks = [
+        chunk
+        async for chunk in ExportService.stream(
+            TestingSessionLocal, stmt, ExportFormat.ndjson
+        )
+    ]
+    assert [chunk.count(b"\n") for chunk in chunks] == [5, 5, 2]
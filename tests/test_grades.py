@@ -0,0 +1,295 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert, select, text, update
+
+from app.crud.groups import GroupCRUD
+from app.crud.schedules import ScheduleCRUD
+from app.crud.subjects import SubjectCRUD
+from app.crud.users import UsersCRUD
+from app.db.models.grades import Grade
+from app.db.models.schedules import Schedule
+from app.db.models.subjects import Subject
+from app.db.models.types import Student, Teacher
+from app.main import app
+from app.schemas.auth import CurrentUser
+from app.schemas.schedules import ScheduleUpdateData
+from app.services import grade_summary
+from app.services.auth import get_current_user
+from tests.conftest import QueryCounter, override_get_current_user, seed_lessons
+
+STUDENTS = 30
+
+
+@pytest.fixture
+async def graded_group(db_session, request):
+    school, schedules = await seed_lessons(db_session, request.node.name, STUDENTS)
+    result = await db_session.execute(
+        select(Student.id)
+        .where(Student.group_id == schedules[0].group_id)
+        .order_by(Student.id)
+    )
+    student_ids = result.scalars().all()
+    # Student i gets (i % 5) + 1 in the first lesson and a 5 in the second
+    await db_session.execute(
+        insert(Grade),
+        [
+            {
+                "grade_system": "5numerical",
+                "value_5numerical": value,
+                "schedule_id": schedule.id,
+                "student_id": student_id,
+            }
+            for i, student_id in enumerate(student_ids)
+            for schedule, value in ((schedules[0], i % 5 + 1), (schedules[1], 5))
+        ],
+    )
+    await db_session.commit()
+    await grade_summary.rebuild(db_session, student_ids=student_ids)
+    return school, schedules[0].group_id, student_ids
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_group_averages_single_query(client: AsyncClient, graded_group):
+    school, group_id, student_ids = graded_group
+
+    with QueryCounter(table="grades") as counter:
+        response = await client.get(f"/grades/groups/{group_id}/averages/")
+    assert response.status_code == 200
+    assert counter.count == 1
+
+    body = response.json()
+    assert body["by"] == "student"
+    assert len(body["rows"]) == STUDENTS
+    first = next(row for row in body["rows"] if row["id"] == student_ids[0])
+    assert first["grades"]["5numerical"] == {
+        "count": 2,
+        "avg": 3.0,
+        "min": 1.0,
+        "max": 5.0,
+    }
+    overall = body["overall"]["5numerical"]
+    assert overall["count"] == STUDENTS * 2
+    assert overall["avg"] == pytest.approx(4.0)
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_school_averages_by_group(client: AsyncClient, graded_group):
+    school, group_id, _ = graded_group
+
+    response = await client.get(f"/grades/schools/{school.id}/averages/")
+    assert response.status_code == 200
+    rows = response.json()["rows"]
+    assert [row["id"] for row in rows] == [group_id]
+    assert rows[0]["grades"]["5numerical"]["avg"] == pytest.approx(4.0)
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_student_average(client: AsyncClient, graded_group):
+    _, _, student_ids = graded_group
+
+    with QueryCounter(table="grades") as counter:
+        response = await client.get(f"/grades/students/{student_ids[1]}/average/")
+    assert response.status_code == 200
+    assert counter.count == 0
+    assert response.json() == {"5numeric": 3.5}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_averages_other_school_forbidden(client: AsyncClient, graded_group):
+    school, _, _ = graded_group
+
+    async def teacher():
+        return CurrentUser(id=1, username="t", type="teacher", school_id=school.id + 1)
+
+    app.dependency_overrides[get_current_user] = teacher
+    response = await client.get(f"/grades/schools/{school.id}/averages/")
+    assert response.status_code == 403
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_summary_follows_grade_changes(client: AsyncClient, db_session, request):
+    _, schedules = await seed_lessons(db_session, request.node.name, 1)
+    result = await db_session.execute(
+        select(Student.id).where(Student.username == f"{request.node.name}_student_0")
+    )
+    student_id = result.scalar_one()
+
+    grades = []
+    for schedule, value in zip(schedules[:2], (4, 2)):
+        response = await client.post(
+            f"/teachers/schedules/{schedule.id}/students/{student_id}/",
+            json={"grade_system": "5numerical", "value_numeric": value},
+        )
+        assert response.status_code == 200
+        grades.append(response.json()["id"])
+    response = await client.post(
+        f"/teachers/schedules/{schedules[2].id}/students/{student_id}/",
+        json={"grade_system": "pass/fail", "value_boolean": True},
+    )
+    assert response.status_code == 200
+    # Pass/fail grades are summarised but not part of the student average
+    average = f"/grades/students/{student_id}/average/"
+    assert (await client.get(average)).json() == {"5numeric": 3.0}
+
+    response = await client.patch(
+        f"/teachers/grades/{grades[1]}/",
+        json={"grade_system": "percent", "value_numeric": 80},
+    )
+    assert response.status_code == 200
+    assert (await client.get(average)).json() == {"5numeric": 4.0, "percent": 80.0}
+
+    response = await client.delete(f"/teachers/grades/{grades[0]}/")
+    assert response.status_code == 200
+    assert (await client.get(average)).json() == {"percent": 80.0}
+    assert await grade_summary.verify(db_session, student_ids=[student_id]) == []
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_grade_deleted_twice_is_subtracted_once(
+    client: AsyncClient, db_session, request
+):
+    _, schedules = await seed_lessons(db_session, request.node.name, 1)
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.username == f"{request.node.name}_student_0")
+    )
+    grade_ids = []
+    for schedule, value in zip(schedules[:2], (4, 2)):
+        response = await client.post(
+            f"/teachers/schedules/{schedule.id}/students/{student_id}/",
+            json={"grade_system": "5numerical", "value_numeric": value},
+        )
+        grade_ids.append(response.json()["id"])
+
+    # On PostgreSQL the second delete waits for the first one's row lock and
+    # then finds nothing to take out of the summary
+    response = await client.delete(f"/teachers/grades/{grade_ids[0]}/")
+    assert response.status_code == 200
+    response = await client.delete(f"/teachers/grades/{grade_ids[0]}/")
+    assert response.status_code == 404
+    average = f"/grades/students/{student_id}/average/"
+    assert (await client.get(average)).json() == {"5numeric": 2.0}
+    assert await grade_summary.verify(db_session, student_ids=[student_id]) == []
+
+
+@pytest.fixture
+async def foreign_keys(db_session):
+    """SQLite only runs ON DELETE actions with foreign keys switched on."""
+    await db_session.execute(text("PRAGMA foreign_keys=ON"))
+    yield
+    await db_session.execute(text("PRAGMA foreign_keys=OFF"))
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_summary_follows_cascading_deletes(
+    client: AsyncClient, db_session, graded_group, foreign_keys
+):
+    school, group_id, student_ids = graded_group
+    admin = await override_get_current_user()
+    schedules = (
+        (
+            await db_session.execute(
+                select(Schedule)
+                .where(Schedule.group_id == group_id)
+                .order_by(Schedule.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    subject = Subject(name="Cascade", school_id=school.id)
+    teacher = Teacher(
+        username=f"cascade_teacher_{school.id}",
+        email="cascade_teacher@example.com",
+        first_name="Cas",
+        last_name="Cade",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add_all([subject, teacher])
+    await db_session.commit()
+
+    async def drift():
+        return await grade_summary.verify(db_session, student_ids=student_ids)
+
+    await ScheduleCRUD.update_schedule(
+        db_session, admin, schedules[0].id, ScheduleUpdateData(subject_id=subject.id)
+    )
+    assert await drift() == []
+    await SubjectCRUD.delete_subject(db_session, admin, subject.id)
+    assert await drift() == []
+
+    await db_session.execute(
+        update(Grade)
+        .where(Grade.student_id == student_ids[0])
+        .values(marked_by=teacher.id)
+    )
+    await db_session.commit()
+    await UsersCRUD.delete_user(db_session, teacher.id)
+    assert await drift() == []
+    await UsersCRUD.delete_user(db_session, student_ids[2])
+    assert await drift() == []
+    assert await grade_summary.student_averages(db_session, student_ids[2]) == {}
+
+    response = await client.delete(f"/schedules/{schedules[1].id}/")
+    assert response.status_code == 204
+    assert await drift() == []
+    averages = await grade_summary.student_averages(db_session, student_ids[1])
+    assert averages == {"5numerical": 2.0}
+
+    await GroupCRUD.delete_group(db_session, admin, group_id)
+    assert await drift() == []
+    assert await grade_summary.student_averages(db_session, student_ids[1]) == {}
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_verify_reports_drift(db_session, graded_group):
+    _, _, student_ids = graded_group
+    assert await grade_summary.verify(db_session, student_ids=student_ids) == []
+
+    await db_session.execute(delete(Grade).where(Grade.student_id == student_ids[0]))
+    await db_session.commit()
+    drifted = await grade_summary.verify(db_session, student_ids=student_ids)
+    assert {key[0] for key in drifted} == {student_ids[0]}
+
+    await grade_summary.rebuild(db_session, student_ids=student_ids)
+    assert await grade_summary.verify(db_session, student_ids=student_ids) == []
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_assign_lesson_grades_batch(client: AsyncClient, db_session, request):
+    school, schedules = await seed_lessons(db_session, request.node.name, 30)
+    school.grade_system = "5numerical"
+    await db_session.commit()
+    result = await db_session.execute(
+        select(Student.id).where(Student.school_id == school.id).order_by(Student.id)
+    )
+    student_ids = result.scalars().all()
+    url = f"/teachers/lessons/{schedules[0].id}/grades/"
+    entries = [{"student_id": i, "value_numeric": 4} for i in student_ids[:-1]]
+    entries.append({"student_id": student_ids[-1], "value_numeric": 7})
+    entries.append({"student_id": 10**6, "value_numeric": 5})
+
+    with QueryCounter() as counter:
+        response = await client.post(url, json={"grades": entries})
+    assert response.status_code == 200
+    # lesson and members, previous grades, grade upsert, summary upsert
+    assert counter.count == 4
+    results = response.json()
+    assert all(row["grade_id"] for row in results[:29])
+    assert "between 1 and 5" in results[29]["error"]
+    assert results[30]["error"] and results[30]["grade_id"] is None
+
+    # Re-submitting overwrites instead of hitting the unique constraint
+    response = await client.post(
+        url, json={"grades": [{"student_id": student_ids[0], "value_numeric": 2}]}
+    )
+    assert response.json()[0]["grade_id"] == results[0]["grade_id"]
+    average = await client.get(f"/grades/students/{student_ids[0]}/average/")
+    assert average.json() == {"5numeric": 2.0}
+    assert await grade_summary.verify(db_session, student_ids=student_ids) == []
+
+    response = await client.post(
+        url,
+        json={"grade_system": "percent", "grades": [entries[0]]},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import pytest
+from httpx import AsyncClient
+
+from app.core.security import HashingPool, hashing_pool
+from app.exceptions.auth import HashingBusy
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_hashing_pool_rejects_when_full():
+    pool = HashingPool(workers=1, max_pending=2)
+    release = threading.Event()
+    try:
+        first = asyncio.create_task(pool.run(release.wait))
+        second = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0)
+        assert pool.stats()["running"] == 1
+        assert pool.stats()["queued"] == 1
+
+        with pytest.raises(HashingBusy):
+            await pool.run(release.wait)
+        assert pool.stats()["rejected"] == 1
+
+        release.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert pool.stats()["completed"] == 2
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_auth_returns_503_when_hashing_saturated(
+    client: AsyncClient, monkeypatch
+):
+    user_data = {
+        "username": "busy_student",
+        "first_name": "B",
+        "last_name": "S",
+        "email": "busy_student@example.com",
+        "password": "password123",
+    }
+    response = await client.post("/auth/register/students/", json=user_data)
+    assert response.status_code == 201
+
+    monkeypatch.setattr(hashing_pool, "max_pending", 0)
+    response = await client.post(
+        "/auth/login/",
+        data={"username": "busy_student", "password": "password123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    user_data["username"] = "busy_student_2"
+    response = await client.post("/auth/register/students/", json=user_data)
+    assert response.status_code == 503
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_hashing_stats_endpoint(client: AsyncClient):
+    response = await client.get("/monitoring/hashing/")
+    assert response.status_code == 200
+    assert response.json()["workers"] == hashing_pool.workers
@@ -0,0 +1,115 @@
+import pytest
+from httpx import AsyncClient
+
+from app.db.models.groups import Group
+from app.db.models.schools import School
+from app.db.models.subjects import Subject
+from app.db.models.types import Teacher
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+async def cached_school(db_session, request):
+    school = School(name=request.node.name, short_name="HC", country="X", address="Y")
+    db_session.add(school)
+    await db_session.flush()
+    db_session.add(Subject(name=f"{request.node.name} math", school_id=school.id))
+    await db_session.commit()
+    return school
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_school_not_modified(client: AsyncClient, cached_school):
+    url = f"/schools/{cached_school.id}/"
+    response = await client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "must-revalidate" in response.headers["cache-control"]
+
+    # Only the version lookup runs, the school itself is neither loaded nor serialized
+    with QueryCounter() as counter:
+        response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert counter.count == 1
+
+    response = await client.get(
+        url, headers={"If-Modified-Since": response.headers["last-modified"]}
+    )
+    assert response.status_code == 304
+
+    response = await client.patch(url, json={"address": "Z"})
+    assert response.status_code == 200
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_subject_writes_bump_version(client: AsyncClient, cached_school):
+    params = {"school_id": cached_school.id}
+    response = await client.get("/subjects/", params=params)
+    assert len(response.json()) == 1
+    etag = response.headers["etag"]
+
+    headers = {"If-None-Match": etag}
+    response = await client.get("/subjects/", params=params, headers=headers)
+    assert response.status_code == 304
+
+    response = await client.post(
+        "/subjects/", json={"name": "physics", "school_id": cached_school.id}
+    )
+    assert response.status_code == 201
+    response = await client.get("/subjects/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_schedules_not_modified(client: AsyncClient, cached_school):
+    params = {"school_id": cached_school.id, "day_of_week": "monday"}
+    response = await client.get("/schedules/", params=params)
+    assert response.status_code == 200
+    headers = {"If-None-Match": response.headers["etag"]}
+
+    response = await client.get("/schedules/", params=params, headers=headers)
+    assert response.status_code == 304
+    params["day_of_week"] = "tuesday"
+    response = await client.get("/schedules/", params=params, headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_group_and_teacher_changes_bump_version(
+    client: AsyncClient, db_session, cached_school
+):
+    group = Group(grade=7, grade_section="A", school_id=cached_school.id)
+    teacher = Teacher(
+        username=f"hc_teacher_{cached_school.id}",
+        email="hc_teacher@example.com",
+        first_name="Http",
+        last_name="Cache",
+        hashed_password="x",
+        school_id=cached_school.id,
+    )
+    db_session.add_all([group, teacher])
+    await db_session.commit()
+    params = {"school_id": cached_school.id, "day_of_week": "monday"}
+
+    async def etag():
+        response = await client.get("/schedules/", params=params)
+        return response.headers["etag"]
+
+    before = await etag()
+    response = await client.patch(
+        f"/groups/{group.id}/",
+        json={"grade": 7, "grade_section": "B", "school_id": cached_school.id},
+    )
+    assert response.status_code == 200
+    renamed = await etag()
+    assert renamed != before
+
+    response = await client.delete(f"/users/delete/{teacher.id}/")
+    assert response.status_code == 204
+    assert await etag() != renamed
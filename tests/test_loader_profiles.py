@@ -0,0 +1,137 @@
+import pytest
+from datetime import date, datetime, time, timezone
+from httpx import AsyncClient
+
+from app.db.models.attendance import Attendance
+from app.db.models.groups import Group
+from app.db.models.homeworks import Homework
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.subjects import Subject
+from app.db.models.types import Student, Teacher
+from tests.conftest import QueryCounter
+
+LESSONS = 6
+
+
+@pytest.fixture
+async def school_day(db_session, request):
+    """A school where every lesson has its own subject, teacher and student."""
+    name = request.node.name
+    school = School(name=name, short_name="LP", country="X", address="Y")
+    db_session.add(school)
+    await db_session.flush()
+    group = Group(grade=9, grade_section="B", school_id=school.id)
+    db_session.add(group)
+    await db_session.flush()
+    for i in range(LESSONS):
+        subject = Subject(name=f"{name} subject {i}", school_id=school.id)
+        teacher = Teacher(
+            username=f"{name}_teacher_{i}",
+            email=f"{name}_{i}@example.com",
+            first_name="Teacher",
+            last_name=str(i),
+            hashed_password="x",
+            school_id=school.id,
+        )
+        student = Student(
+            username=f"{name}_student_{i}",
+            email=f"{name}_s{i}@example.com",
+            first_name="Student",
+            last_name=str(i),
+            hashed_password="x",
+            school_id=school.id,
+            group_id=group.id,
+        )
+        db_session.add_all([subject, teacher, student])
+        await db_session.flush()
+        schedule = Schedule(
+            group_id=group.id,
+            school_id=school.id,
+            subject_id=subject.id,
+            teacher_id=teacher.id,
+            day_of_week="monday",
+            start_time=time(8 + i),
+            end_time=time(9 + i),
+        )
+        db_session.add(schedule)
+        await db_session.flush()
+        db_session.add_all(
+            [
+                Homework(
+                    name=f"hw {i}",
+                    due_date=datetime.now(tz=timezone.utc),
+                    subject_id=subject.id,
+                    group_id=group.id,
+                    school_id=school.id,
+                    teacher_id=teacher.id,
+                ),
+                Attendance(
+                    schedule_id=schedule.id,
+                    student_id=student.id,
+                    lesson_date=date(2025, 9, 1),
+                    status="present",
+                ),
+            ]
+        )
+    await db_session.commit()
+    # Serialization must not rely on objects left in the identity map
+    db_session.expunge_all()
+    return school, group
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+@pytest.mark.parametrize(
+    "path, params, queries, names",
+    [
+        (
+            "/schedules/",
+            {"day_of_week": "monday"},
+            2,
+            {"subject_name", "teacher_name", "group_label"},
+        ),
+        ("/homeworks/", {}, 1, {"subject_name", "teacher_name", "group_label"}),
+        ("/attendances/", {}, 1, {"subject_name", "student_name"}),
+    ],
+)
+async def test_listing_loads_names_in_fixed_queries(
+    client: AsyncClient, school_day, path, params, queries, names
+):
+    school, group = school_day
+    params = {**params, "school_id": school.id}
+
+    with QueryCounter() as counter:
+        response = await client.get(path, params=params)
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items) == LESSONS
+    # One query per page however many subjects, teachers or students it names
+    assert counter.count == queries
+    for item in items:
+        assert all(item[name] is not None for name in names)
+    if "group_label" in names:
+        assert items[0]["group_label"] == "9B"
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_detail_loads_names_in_one_query(client: AsyncClient, school_day):
+    school, group = school_day
+    listing = await client.get(
+        "/attendances/", params={"school_id": school.id, "limit": 1}
+    )
+    attendance = listing.json()[0]
+    schedules = await client.get(
+        "/schedules/", params={"school_id": school.id, "day_of_week": "monday"}
+    )
+    schedule = schedules.json()[0]
+
+    with QueryCounter() as counter:
+        response = await client.get(f"/attendances/{attendance['id']}")
+    assert counter.count == 1
+    assert response.json()["student_name"] == attendance["student_name"]
+
+    with QueryCounter() as counter:
+        response = await client.get(f"/schedules/{schedule['id']}/")
+    assert counter.count == 1
+    assert response.json()["teacher_name"] == schedule["teacher_name"]
+    assert response.json()["subject_name"] == schedule["subject_name"]
@@ -0,0 +1,52 @@
+import json
+import logging
+import queue
+
+from app.logging.logger import JsonFormatter, LazyQueueHandler, SamplingFilter
+
+
+def make_record(name="app.crud.schools", level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord(name, level, "schools.py", lineno, "id=%s", (5,), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(make_record(school_id=5))
+    entry = json.loads(line)
+    assert entry["message"] == "id=5"
+    assert entry["logger"] == "app.crud.schools"
+    assert entry["level"] == "INFO"
+    assert entry["school_id"] == 5
+
+
+def test_sampling_keeps_one_per_call_site():
+    sampler = SamplingFilter(every=3, loggers=["app.crud"])
+    kept = [sampler.filter(make_record()) for _ in range(6)]
+    assert kept == [True, False, False, True, False, False]
+    # Other call sites, warnings and loggers outside the list are not sampled
+    assert sampler.filter(make_record(lineno=11))
+    assert all(sampler.filter(make_record(level=logging.WARNING)) for _ in range(3))
+    assert all(sampler.filter(make_record(name="app.db.core")) for _ in range(3))
+
+
+def test_queue_handler_defers_formatting():
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    records = queue.SimpleQueue()
+    logger = logging.getLogger("tests.lazy")
+    handler = LazyQueueHandler(records)
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("value %s", Expensive())
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    assert Expensive.formatted == 0
+    assert records.get_nowait().getMessage() == "value expensive"
@@ -0,0 +1,83 @@
+import logging
+import pytest
+from httpx import AsyncClient
+
+from app.core.metrics import metrics_registry
+from app.core.settings import settings
+from app.db.models.schools import School
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    metrics_registry.reset()
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_server_timing_counts_statements(client: AsyncClient, db_session):
+    school = School(name="metrics school", short_name="MS", country="X", address="Y")
+    db_session.add(school)
+    await db_session.commit()
+
+    response = await client.get(f"/schools/{school.id}/")
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="2 statements"' in timing
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_metrics_are_grouped_by_route_template(
+    client: AsyncClient, db_session, caplog
+):
+    caplog.set_level(logging.INFO, logger="app.core.metrics")
+    school = School(name="metrics route", short_name="MR", country="X", address="Y")
+    db_session.add(school)
+    await db_session.commit()
+
+    await client.get(f"/schools/{school.id}/")
+    await client.get("/schools/999999/")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    route = 'method="GET",route="/schools/{school_id}/"'
+    assert f'http_requests_total{{{route},status="200"}} 1' in body
+    assert f'http_requests_total{{{route},status="404"}} 1' in body
+    assert f"http_request_duration_seconds_count{{{route}}} 2" in body
+    assert f'http_request_db_statements_bucket{{{route},le="+Inf"}} 2' in body
+    assert f"http_request_db_slowest_statement_seconds{{{route}}} " in body
+    assert "/schools/999999/" not in body
+    # SQL text is logged, never exported as a label
+    assert "SELECT" not in body
+    assert any(
+        "/schools/{school_id}/" in record.getMessage()
+        and "SELECT" in record.getMessage()
+        for record in caplog.records
+    )
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_metrics_are_off_by_default(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 404
+    assert "server-timing" not in response.headers
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_metrics_token_is_required_when_set(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 401
+    response = await client.get(
+        "/metrics", headers={"Authorization": "Bearer wrong-token"}
+    )
+    assert response.status_code == 401
+    response = await client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape-token"}
+    )
+    assert response.status_code == 200
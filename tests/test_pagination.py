@@ -0,0 +1,64 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+
+from app.db.models.schedules import Schedule
+from app.db.pagination import decode_cursor, encode_cursor
+from app.exceptions.basic import InvalidCursor
+
+
+def next_link(response) -> str | None:
+    link = response.headers.get("Link")
+    if link is None:
+        return None
+    assert link.endswith('>; rel="next"')
+    return link[1 : -len('>; rel="next"')]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_schools_keyset_pages(client: AsyncClient):
+    for i in range(5):
+        response = await client.post(
+            "/schools/",
+            json={
+                "name": f"paged {i}",
+                "short_name": "P",
+                "country": "X",
+                "address": "Y",
+            },
+        )
+        assert response.status_code == 201
+
+    response = await client.get("/schools/", params={"limit": 500})
+    everything = [school["id"] for school in response.json()]
+    assert next_link(response) is None
+
+    seen = []
+    url = "/schools/?limit=2"
+    while url is not None:
+        response = await client.get(url)
+        assert response.status_code == 200
+        page = response.json()
+        assert 0 < len(page) <= 2
+        seen += [school["id"] for school in page]
+        url = next_link(response)
+    assert seen == sorted(everything)
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_invalid_cursor(client: AsyncClient):
+    response = await client.get("/schools/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+    # A schedules cursor does not fit the schools listing
+    cursor = encode_cursor([time(8, 30), 1])
+    response = await client.get("/schools/", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_cursor_round_trip():
+    keys = (Schedule.start_time, Schedule.id)
+    cursor = encode_cursor([time(8, 30), 42])
+    assert decode_cursor(cursor, keys) == [time(8, 30), 42]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(["08:30:00", "42"]), keys)
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.core import engine_options
+from app.db.pool import InstrumentedPool, pool_stats
+
+
+def test_engine_options():
+    assert engine_options("sqlite+aiosqlite:///:memory:") == {}
+
+    options = engine_options("postgresql+asyncpg://u:p@db/d")
+    assert options["poolclass"] is InstrumentedPool
+    assert options["pool_pre_ping"] is True
+    assert set(options["connect_args"]) == {
+        "statement_cache_size",
+        "prepared_statement_cache_size",
+    }
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_instrumented_pool_counts_overflow_and_timeouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            assert pool_stats(engine)["checked_out"] == 2
+            with pytest.raises(PoolTimeout):
+                async with engine.connect():
+                    pass
+
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 2
+        assert stats["overflow_events"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["max_wait_seconds"] >= 0.05
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_pool_stats_endpoint(client):
+    response = await client.get("/monitoring/pool/")
+    assert response.status_code == 200
+    assert "status" in response.json()
@@ -0,0 +1,152 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+from app.core.settings import settings
+from app.db.models.groups import Group
+from app.db.models.schools import School
+from app.db.models.types import Principal, Teacher
+from app.main import app
+from app.services import auth
+from app.services.auth import get_current_user, invalidate_principal
+from tests.conftest import QueryCounter
+
+
+async def make_teacher(db_session, username: str) -> Teacher:
+    school = School(
+        name=f"{username} school", short_name="cs", country="X", address="Y"
+    )
+    db_session.add(school)
+    await db_session.flush()
+    teacher = Teacher(
+        username=username,
+        email=f"{username}@example.com",
+        first_name="T",
+        last_name="T",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add(teacher)
+    await db_session.commit()
+    return teacher
+
+
+def token_for(teacher: Teacher, **claims) -> str:
+    payload = {
+        "id": teacher.id,
+        "username": teacher.username,
+        "role": teacher.type,
+        "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=5),
+    }
+    payload.update(claims)
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_principal_loaded_once_then_cached(db_session):
+    teacher = await make_teacher(db_session, "cached_teacher")
+    # A token without school claims (e.g. issued by an older release)
+    token = token_for(teacher)
+    invalidate_principal(teacher.id)
+
+    with QueryCounter() as counter:
+        user = await get_current_user(db=db_session, token=token)
+    assert counter.count == 1
+    assert user.school_id == teacher.school_id
+
+    with QueryCounter() as counter:
+        again = await get_current_user(db=db_session, token=token)
+    assert counter.count == 0
+    assert again == user
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_principal_from_claims_until_invalidated(db_session):
+    teacher = await make_teacher(db_session, "claims_teacher")
+    invalidate_principal(teacher.id)
+    token = token_for(
+        teacher,
+        school_id=teacher.school_id,
+        group_id=None,
+        iat=datetime.now(tz=timezone.utc) + timedelta(seconds=5),
+    )
+
+    with QueryCounter() as counter:
+        user = await get_current_user(db=db_session, token=token)
+    assert counter.count == 0
+    assert user.school_id == teacher.school_id
+
+    # The claims predate the invalidation, so the DB is consulted again
+    teacher.school_id = None
+    await db_session.commit()
+    invalidate_principal(teacher.id)
+
+    stale = token_for(
+        teacher,
+        school_id=999,
+        iat=datetime.now(tz=timezone.utc) - timedelta(seconds=5),
+    )
+    with QueryCounter() as counter:
+        user = await get_current_user(db=db_session, token=stale)
+    assert counter.count == 1
+    assert user.school_id is None
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_old_claims_are_verified(db_session, monkeypatch):
+    teacher = await make_teacher(db_session, "old_claims_teacher")
+    teacher.school_id = None
+    await db_session.commit()
+    # Moved by another worker: this process saw neither a restart nor the
+    # invalidation, only the age of the claims tells them apart
+    invalidate_principal(teacher.id)
+    monkeypatch.setattr(auth, "_claims_trusted_after", 0)
+    monkeypatch.setattr(auth, "_invalidated_at", {})
+    now = datetime.now(tz=timezone.utc)
+    fresh = token_for(teacher, school_id=999, iat=now)
+    stale = token_for(
+        teacher,
+        school_id=999,
+        iat=now - timedelta(seconds=settings.AUTH_CACHE_TTL + 5),
+    )
+
+    with QueryCounter() as counter:
+        user = await get_current_user(db=db_session, token=stale)
+    assert counter.count == 1
+    assert user.school_id is None
+
+    auth.principal_cache.pop(teacher.id)
+    with QueryCounter() as counter:
+        user = await get_current_user(db=db_session, token=fresh)
+    assert counter.count == 0
+    assert user.school_id == 999
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_one_user_query_per_request(client, db_session):
+    school = School(name="context school", short_name="cs", country="X", address="Y")
+    db_session.add(school)
+    await db_session.flush()
+    db_session.add(Group(grade=1, grade_section="A", school_id=school.id))
+    principal = Principal(
+        username="context_principal",
+        email="context_principal@example.com",
+        first_name="P",
+        last_name="P",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add(principal)
+    await db_session.commit()
+
+    app.dependency_overrides.pop(get_current_user)
+    invalidate_principal(principal.id)
+    headers = {"Authorization": f"Bearer {token_for(principal)}"}
+
+    # check_role and the endpoint share one AuthContext
+    with QueryCounter(table="users") as counter:
+        response = await client.get(f"/groups/schools/{school.id}/", headers=headers)
+    assert response.status_code == 200
+    assert [group["grade_section"] for group in response.json()] == ["A"]
+    assert counter.count == 1
@@ -0,0 +1,291 @@
+"""EXPLAIN regression harness.
+
+Seeds a synthetic school into a dedicated database, runs the CRUD read paths
+while capturing every SQL statement they issue, and fails when the plan of
+any of them falls back to a full scan of a large table. Point
+``EXPLAIN_DB_URL`` at a PostgreSQL database to check real planner output.
+"""
+
+import os
+import re
+import pytest
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.crud.attendance import AttendanceCRUD
+from app.crud.groups import GroupCRUD
+from app.crud.homeworks import HomeworkCRUD
+from app.crud.invitations import get_invitations
+from app.crud.schedules import ScheduleCRUD, create_attendance
+from app.crud.subjects import SubjectCRUD
+from app.db.core import Base
+from app.db.models.attendance import Attendance
+from app.db.models.grades import Grade
+from app.db.models.groups import Group
+from app.db.models.homeworks import Homework
+from app.db.models.invitations import Invitation
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.subjects import Subject
+from app.db.models.types import Principal, Student, Teacher
+from app.schemas.schedules import Week
+from app.services.roll_service import generate_school_rolls
+
+EXPLAIN_DB_URL = os.environ.get("EXPLAIN_DB_URL", "sqlite+aiosqlite://")
+
+# Tables that grow with the number of students/lessons and must never be scanned
+LARGE_TABLES = {
+    "attendances",
+    "grades",
+    "homeworks",
+    "invitations",
+    "schedules",
+    "students",
+}
+
+SCHOOLS = 3
+GROUPS_PER_SCHOOL = 10
+STUDENTS_PER_GROUP = 25
+LESSONS_PER_GROUP = 30
+DAYS = 10
+
+
+@pytest.fixture
+async def plan_db():
+    if EXPLAIN_DB_URL.startswith("sqlite"):
+        engine = create_async_engine(EXPLAIN_DB_URL, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(EXPLAIN_DB_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield engine, session, await seed(session)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+async def seed(db: AsyncSession) -> dict:
+    days = list(Week)[:5]
+    first_schedule_ids = []
+    for s in range(SCHOOLS):
+        school = School(name=f"plan {s}", short_name="P", country="X", address="Y")
+        db.add(school)
+        await db.flush()
+        principal = Principal(
+            username=f"principal_{s}",
+            email="p@x",
+            first_name="P",
+            last_name="P",
+            hashed_password="x",
+            school_id=school.id,
+        )
+        teacher = Teacher(
+            username=f"teacher_{s}",
+            email="t@x",
+            first_name="T",
+            last_name="T",
+            hashed_password="x",
+            school_id=school.id,
+        )
+        subject = Subject(name="Math", school_id=school.id)
+        db.add_all([principal, teacher, subject])
+        await db.flush()
+
+        for g in range(GROUPS_PER_SCHOOL):
+            group = Group(grade=g, grade_section="A", school_id=school.id)
+            db.add(group)
+            await db.flush()
+            students = [
+                Student(
+                    username=f"student_{s}_{g}_{i}",
+                    email="s@x",
+                    first_name="S",
+                    last_name="S",
+                    hashed_password="x",
+                    school_id=school.id,
+                    group_id=group.id,
+                )
+                for i in range(STUDENTS_PER_GROUP)
+            ]
+            db.add_all(students)
+            schedules = [
+                Schedule(
+                    group_id=group.id,
+                    school_id=school.id,
+                    subject_id=subject.id,
+                    teacher_id=teacher.id,
+                    day_of_week=days[i % len(days)],
+                    start_time=time(8 + i // len(days)),
+                    end_time=time(9 + i // len(days)),
+                )
+                for i in range(LESSONS_PER_GROUP)
+            ]
+            db.add_all(schedules)
+            await db.flush()
+            first_schedule_ids.append(schedules[0].id)
+
+            now = datetime.now(tz=timezone.utc)
+            await db.execute(
+                insert(Attendance),
+                [
+                    {
+                        "schedule_id": schedule.id,
+                        "student_id": student.id,
+                        "lesson_date": date(2025, 9, 1) + timedelta(days=d),
+                        "status": "present",
+                        "created_at": now,
+                    }
+                    for schedule in schedules
+                    for student in students
+                    for d in range(0, DAYS * 7, 7)
+                ],
+            )
+            await db.execute(
+                insert(Grade),
+                [
+                    {
+                        "grade_system": "5numerical",
+                        "value_5numerical": 5,
+                        "schedule_id": schedule.id,
+                        "student_id": student.id,
+                        "created_at": now,
+                    }
+                    for schedule in schedules
+                    for student in students
+                ],
+            )
+            db.add(
+                Homework(
+                    name="hw",
+                    due_date=now,
+                    subject_id=subject.id,
+                    group_id=group.id,
+                    school_id=school.id,
+                    teacher_id=teacher.id,
+                )
+            )
+            db.add(
+                Invitation(
+                    invited_by_id=principal.id,
+                    invited_user_id=students[0].id,
+                    school_id=school.id,
+                )
+            )
+        await db.commit()
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("ANALYZE"))
+    return {
+        "school": school,
+        "principal": principal,
+        "teacher": teacher,
+        "group": group,
+        "student": students[0],
+        "schedule_id": first_schedule_ids[-1],
+    }
+
+
+class StatementRecorder:
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements: list[tuple[str, object]] = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        # INSERT ... SELECT is planned like a query, plain VALUES inserts are not
+        sql = statement.lstrip().upper()
+        if sql.startswith("SELECT") or (sql.startswith("INSERT") and "SELECT" in sql):
+            self.statements.append((statement, parameters))
+
+
+async def full_scans(db: AsyncSession, statement: str, parameters) -> list[str]:
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = "\n".join(row[0] for row in result)
+        return [
+            table
+            for table in re.findall(r"Seq Scan on (\w+)", plan)
+            if table in LARGE_TABLES
+        ]
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    scans = []
+    for row in result:
+        match = re.fullmatch(r"SCAN (\w+)(?: AS \w+)?", row[-1])
+        if match and match.group(1) in LARGE_TABLES:
+            scans.append(match.group(1))
+    return scans
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_crud_queries_use_indexes(plan_db):
+    engine, db, seeded = plan_db
+    principal, teacher = seeded["principal"], seeded["teacher"]
+    school_id = seeded["school"].id
+    group_id = seeded["group"].id
+
+    read_paths = {
+        "schedules by day": lambda: ScheduleCRUD.get_schedule_day_of_week(
+            db=db, user=principal, day_of_week=Week.monday, group_id=group_id
+        ),
+        "schedules by teacher": lambda: ScheduleCRUD.get_schedule_day_of_week(
+            db=db, user=principal, day_of_week=Week.monday, teacher_id=teacher.id
+        ),
+        "attendances": lambda: AttendanceCRUD.get_attendances_id(
+            db=db, user=principal, school_id=school_id, group_id=group_id
+        ),
+        "attendances by date": lambda: AttendanceCRUD.get_attendances_id(
+            db=db,
+            user=principal,
+            school_id=school_id,
+            date_from=date(2025, 9, 8),
+            date_to=date(2025, 9, 15),
+        ),
+        "attendances by lesson": lambda: AttendanceCRUD.get_attendances_id(
+            db=db,
+            user=principal,
+            school_id=school_id,
+            schedule_id=seeded["schedule_id"],
+        ),
+        "homeworks": lambda: HomeworkCRUD.get_homeworks_id(
+            db=db, user=principal, school_id=school_id, group_id=group_id
+        ),
+        "subjects": lambda: SubjectCRUD.get_subjects(
+            db=db, user=principal, school_id=school_id, name="Math"
+        ),
+        "groups": lambda: GroupCRUD.get_groups(
+            db=db, user=principal, school_id=school_id
+        ),
+        "invitations": lambda: get_invitations(db=db, user=seeded["student"]),
+        "roll generation": lambda: create_attendance(
+            db=db,
+            schedule_ids=[seeded["schedule_id"]],
+            school_id=school_id,
+            lesson_date=date(2025, 12, 1),
+        ),
+        "roll job": lambda: generate_school_rolls(
+            db=db, school_id=school_id, lesson_date=date(2025, 12, 1)
+        ),
+    }
+
+    regressions = {}
+    for name, run in read_paths.items():
+        with StatementRecorder(engine) as recorder:
+            await run()
+        assert recorder.statements, f"{name} issued no SELECT"
+        for statement, parameters in recorder.statements:
+            scans = await full_scans(db, statement, parameters)
+            if scans:
+                regressions.setdefault(name, []).append((scans, statement))
+
+    assert not regressions, f"Sequential scans on large tables: {regressions}"
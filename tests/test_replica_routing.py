@@ -0,0 +1,88 @@
+import pytest
+from fastapi import Request
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import core
+from app.db.core import Base, get_async_db, get_sessionmaker
+from app.db.routing import ReplicaRouter
+from app.main import app
+
+
+@pytest.fixture
+async def replica_router(tmp_path, monkeypatch):
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}")
+        for name in ("primary.db", "replica.db")
+    ]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    primary, replica = (
+        async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        for engine in engines
+    )
+    router = ReplicaRouter(primary=primary, replica=replica, read_your_writes=60)
+    monkeypatch.setattr(core, "db_router", router)
+    app.dependency_overrides.pop(get_async_db)
+    yield router
+    for engine in engines:
+        await engine.dispose()
+
+
+async def create_school(client: AsyncClient, name: str, token: str) -> int:
+    response = await client.post(
+        "/schools/",
+        json={"name": name, "short_name": "rs", "country": "X", "address": "Y"},
+        headers={"Authorization": token},
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_reads_go_to_replica_except_after_own_write(
+    client: AsyncClient, replica_router
+):
+    school_id = await create_school(client, "replica school", "Bearer writer")
+
+    # The writer reads its own write from the primary...
+    response = await client.get(
+        f"/schools/{school_id}/", headers={"Authorization": "Bearer writer"}
+    )
+    assert response.status_code == 200
+
+    # ...everyone else reads the (not yet replicated) replica
+    response = await client.get(
+        f"/schools/{school_id}/", headers={"Authorization": "Bearer reader"}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_lagging_replica_falls_back_to_primary(
+    client: AsyncClient, replica_router, monkeypatch
+):
+    school_id = await create_school(client, "lagging school", "Bearer writer")
+
+    async def lagging():
+        return replica_router.max_lag + 1
+
+    monkeypatch.setattr(replica_router, "measure_lag", lagging)
+    response = await client.get(
+        f"/schools/{school_id}/", headers={"Authorization": "Bearer reader"}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_streaming_sessionmaker_checks_lag(replica_router, monkeypatch):
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    assert await get_sessionmaker(request) is replica_router.replica
+
+    async def unreachable():
+        raise ConnectionError("replica down")
+
+    monkeypatch.setattr(replica_router, "measure_lag", unreachable)
+    monkeypatch.setattr(replica_router, "_lag_checked_at", float("-inf"))
+    assert await get_sessionmaker(request) is replica_router.primary
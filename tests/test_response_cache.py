@@ -0,0 +1,221 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+
+from app.core.response_cache import (
+    MemoryBackend,
+    RedisBackend,
+    ResponseCache,
+    response_cache,
+)
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.subjects import Subject
+from app.db.models.types import Teacher
+from tests.conftest import QueryCounter
+
+
+class FakeRedis:
+    """The handful of redis.asyncio commands RedisBackend uses."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.counters: dict[str, int] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def get(self, name):
+        return self.counters.get(name)
+
+    async def incr(self, name):
+        self.counters[name] = self.counters.get(name, 0) + 1
+        return self.counters[name]
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    async def expire(self, name, ttl):
+        self.ttls[name] = ttl
+
+    async def delete(self, *names):
+        for name in names:
+            self.hashes.pop(name, None)
+
+    async def info(self, section):
+        return {"evicted_keys": 0}
+
+
+class BrokenBackend:
+    async def generation(self, scope):
+        raise ConnectionError("down")
+
+    async def get(self, scope, key, generation):
+        raise ConnectionError("down")
+
+    async def set(self, scope, key, value, generation):
+        raise ConnectionError("down")
+
+
+@pytest.fixture
+async def subjects_school(db_session, request):
+    school = School(name=request.node.name, short_name="RC", country="X", address="Y")
+    db_session.add(school)
+    await db_session.flush()
+    db_session.add(Subject(name=f"{request.node.name} art", school_id=school.id))
+    await db_session.commit()
+    return school
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_subjects_cached_until_write(
+    client: AsyncClient, subjects_school, backend
+):
+    if backend == "redis":
+        response_cache.configure(RedisBackend(FakeRedis(), ttl=60))
+    params = {"school_id": subjects_school.id}
+
+    first = await client.get("/subjects/", params=params)
+    assert first.status_code == 200
+    with QueryCounter(table="subjects") as counter:
+        second = await client.get("/subjects/", params=params)
+    assert counter.count == 0
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+
+    response = await client.post(
+        "/subjects/", json={"name": "music", "school_id": subjects_school.id}
+    )
+    assert response.status_code == 201
+    third = await client.get("/subjects/", params=params)
+    assert len(third.json()) == 2
+
+    stats = await response_cache.stats()
+    assert stats["backend"] == backend
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["invalidations"] == 1
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_renames_drop_cached_schedules(
+    client: AsyncClient, db_session, subjects_school, backend
+):
+    if backend == "redis":
+        response_cache.configure(RedisBackend(FakeRedis(), ttl=60))
+    school_id = subjects_school.id
+    group = Group(grade=3, grade_section="A", school_id=school_id)
+    subject = Subject(name=f"rename {backend}", school_id=school_id)
+    teacher = Teacher(
+        username=f"rename_teacher_{backend}",
+        email="rename@example.com",
+        first_name="Old",
+        last_name="Name",
+        hashed_password="x",
+        school_id=school_id,
+    )
+    db_session.add_all([group, subject, teacher])
+    await db_session.flush()
+    db_session.add(
+        Schedule(
+            group_id=group.id,
+            school_id=school_id,
+            subject_id=subject.id,
+            teacher_id=teacher.id,
+            day_of_week="monday",
+            start_time=time(8),
+            end_time=time(9),
+        )
+    )
+    await db_session.commit()
+
+    async def lesson(**params):
+        response = await client.get(
+            "/schedules/",
+            params={"school_id": school_id, "day_of_week": "monday", **params},
+        )
+        assert response.status_code == 200
+        return response.json()[0]
+
+    for params in ({}, {"group_id": group.id}):
+        assert (await lesson(**params))["subject_name"] == f"rename {backend}"
+
+    response = await client.patch(
+        f"/subjects/{subject.id}/", json={"name": f"renamed {backend}"}
+    )
+    assert response.status_code == 200
+    for params in ({}, {"group_id": group.id}):
+        assert (await lesson(**params))["subject_name"] == f"renamed {backend}"
+
+    response = await client.patch(
+        f"/groups/{group.id}/",
+        json={"grade": 3, "grade_section": "B", "school_id": school_id},
+    )
+    assert response.status_code == 200
+    for params in ({}, {"group_id": group.id}):
+        assert (await lesson(**params))["group_label"] == "3B"
+
+    response = await client.delete(f"/users/delete/{teacher.id}/")
+    assert response.status_code == 204
+    for params in ({}, {"group_id": group.id}):
+        assert (await lesson(**params))["teacher_name"] is None
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_cached_page_keeps_link(client: AsyncClient, subjects_school):
+    params = {"school_id": subjects_school.id, "limit": 1}
+    await client.post(
+        "/subjects/", json={"name": "drama", "school_id": subjects_school.id}
+    )
+    first = await client.get("/subjects/", params=params)
+    second = await client.get("/subjects/", params=params)
+    assert second.headers["link"] == first.headers["link"]
+    assert (await response_cache.stats())["hits"] == 1
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_memory_backend_scopes_and_evictions():
+    cache = ResponseCache(MemoryBackend(maxsize=2, ttl=60))
+    await cache.set("a", "k", b"1")
+    await cache.set("b", "k", b"2")
+    await cache.invalidate("a")
+    assert await cache.get("a", "k") is None
+    assert await cache.get("b", "k") == b"2"
+
+    await cache.set("c", "k", b"3")
+    await cache.set("d", "k", b"4")
+    stats = await cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["size"] == 2
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_write_after_invalidation_is_dropped(backend):
+    if backend == "redis":
+        cache = ResponseCache(RedisBackend(FakeRedis(), ttl=60))
+    else:
+        cache = ResponseCache(MemoryBackend(maxsize=10, ttl=60))
+    # A request reads the generation, then a write invalidates the scope
+    # while it is still querying
+    generation = await cache.generation("a")
+    await cache.invalidate("a")
+    await cache.set("a", "k", b"stale", generation)
+    assert await cache.get("a", "k") is None
+
+    generation = await cache.generation("a")
+    await cache.set("a", "k", b"fresh", generation)
+    assert await cache.get("a", "k") == b"fresh"
+    await cache.invalidate("a")
+    assert await cache.get("a", "k") is None
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_backend_failure_is_a_miss():
+    cache = ResponseCache(BrokenBackend())
+    assert await cache.get("a", "k") is None
+    await cache.set("a", "k", b"1")
+    assert cache.errors == 2
@@ -0,0 +1,309 @@
+import pytest
+import random
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from types import SimpleNamespace
+
+from app.db.models.groups import Group
+from app.db.models.schedules import Schedule
+from app.db.models.schools import School
+from app.db.models.subjects import Subject
+from app.crud import schedules as schedules_crud
+from app.db.models.types import Teacher
+from app.services.timetable import find_conflicts
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+async def timetable(db_session, request):
+    name = request.node.name
+    school = School(name=name, short_name="TT", country="X", address="Y")
+    db_session.add(school)
+    await db_session.flush()
+    group = Group(grade=7, grade_section="C", school_id=school.id)
+    subject = Subject(name=f"{name} history", school_id=school.id)
+    teacher = Teacher(
+        username=f"{name}_teacher",
+        email=f"{name}@example.com",
+        first_name="Ada",
+        last_name="Lovelace",
+        hashed_password="x",
+        school_id=school.id,
+    )
+    db_session.add_all([group, subject, teacher])
+    await db_session.flush()
+    for day, hour in (("tuesday", 10), ("monday", 11), ("monday", 8), ("friday", 9)):
+        db_session.add(
+            Schedule(
+                group_id=group.id,
+                school_id=school.id,
+                subject_id=subject.id,
+                teacher_id=teacher.id if day != "friday" else None,
+                day_of_week=day,
+                start_time=time(hour),
+                end_time=time(hour + 1),
+            )
+        )
+    await db_session.commit()
+    return school, group, subject
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_schedule_week_one_query(client: AsyncClient, timetable):
+    school, group, subject = timetable
+
+    with QueryCounter(table="schedules") as counter:
+        response = await client.get("/schedules/week/", params={"group_id": group.id})
+    assert response.status_code == 200
+    assert counter.count == 1
+
+    days = response.json()["days"]
+    assert list(days) == [
+        "monday",
+        "tuesday",
+        "wednesday",
+        "thursday",
+        "friday",
+        "saturday",
+        "sunday",
+    ]
+    assert [lesson["start_time"] for lesson in days["monday"]] == [
+        "08:00:00",
+        "11:00:00",
+    ]
+    assert days["monday"][0]["subject_name"] == subject.name
+    assert days["monday"][0]["teacher_name"] == "Ada Lovelace"
+    assert days["friday"][0]["teacher_name"] is None
+    assert days["wednesday"] == []
+
+    with QueryCounter(table="schedules") as counter:
+        cached = await client.get("/schedules/week/", params={"group_id": group.id})
+    assert counter.count == 0
+    assert cached.json() == response.json()
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_schedule_week_needs_a_filter(client: AsyncClient):
+    response = await client.get("/schedules/week/")
+    assert response.status_code == 400
+
+
+def lesson_payload(school, group, subject, teacher_id, day, start, end) -> dict:
+    return {
+        "day_of_week": day,
+        "start_time": start,
+        "end_time": end,
+        "group_id": group.id,
+        "school_id": school.id,
+        "subject_id": subject.id,
+        "teacher_id": teacher_id,
+    }
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_create_schedule_rejects_clashes(
+    client: AsyncClient, db_session, timetable
+):
+    school, group, subject = timetable
+    teacher_id = await db_session.scalar(
+        select(Schedule.teacher_id).where(
+            Schedule.group_id == group.id, Schedule.teacher_id.is_not(None)
+        )
+    )
+    other_group = Group(grade=8, grade_section="D", school_id=school.id)
+    db_session.add(other_group)
+    await db_session.commit()
+
+    response = await client.post(
+        "/schedules/",
+        json=lesson_payload(
+            school, group, subject, teacher_id, "monday", "08:30", "09:30"
+        ),
+    )
+    assert response.status_code == 409
+    assert "from 08:30 to 09:00" in response.json()["detail"]
+
+    # Another group, but the teacher is busy
+    response = await client.post(
+        "/schedules/",
+        json=lesson_payload(
+            school, other_group, subject, teacher_id, "tuesday", "09:30", "10:15"
+        ),
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"].startswith(f"teacher {teacher_id}")
+
+    response = await client.post(
+        "/schedules/",
+        json=lesson_payload(
+            school, group, subject, teacher_id, "monday", "10:00", "09:00"
+        ),
+    )
+    assert response.status_code == 400
+
+    # Lessons may touch
+    response = await client.post(
+        "/schedules/",
+        json=lesson_payload(
+            school, other_group, subject, teacher_id, "monday", "09:00", "10:00"
+        ),
+    )
+    assert response.status_code == 201
+    created = response.json()["id"]
+
+    response = await client.patch(
+        f"/schedules/{created}/", json={"start_time": "10:30", "end_time": "11:30"}
+    )
+    assert response.status_code == 409
+    response = await client.patch(f"/schedules/{created}/", json={"end_time": "11:00"})
+    assert response.status_code == 200
+
+
+@pytest.fixture
+async def group_slot_constraint(db_session):
+    """Stands in for the PostgreSQL exclusion constraint on group slots."""
+    for event in ("INSERT", "UPDATE"):
+        await db_session.execute(
+            text(
+                f"""
+                CREATE TRIGGER excl_schedules_group_slot_{event.lower()}
+                BEFORE {event} ON schedules
+                WHEN EXISTS (
+                    SELECT 1 FROM schedules s
+                    WHERE s.id != NEW.id AND s.group_id = NEW.group_id
+                      AND s.day_of_week = NEW.day_of_week
+                      AND s.start_time < NEW.end_time AND s.end_time > NEW.start_time
+                )
+                BEGIN
+                    SELECT RAISE(
+                        ABORT,
+                        'violates exclusion constraint "excl_schedules_group_slot"'
+                    );
+                END
+                """
+            )
+        )
+    await db_session.commit()
+    yield
+    for event in ("insert", "update"):
+        await db_session.execute(
+            text(f"DROP TRIGGER excl_schedules_group_slot_{event}")
+        )
+    await db_session.commit()
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_concurrent_booking_is_a_conflict(
+    client: AsyncClient, db_session, timetable, group_slot_constraint, monkeypatch
+):
+    school, group, subject = timetable
+    teacher_id = await db_session.scalar(
+        select(Schedule.teacher_id).where(
+            Schedule.group_id == group.id, Schedule.teacher_id.is_not(None)
+        )
+    )
+
+    # The clash check ran before a concurrent request took the slot
+    async def no_clashes(db, lesson):
+        return []
+
+    monkeypatch.setattr(schedules_crud, "find_clashes", no_clashes)
+    response = await client.post(
+        "/schedules/",
+        json=lesson_payload(
+            school, group, subject, teacher_id, "monday", "08:30", "09:30"
+        ),
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"].startswith(f"group {group.id} already has")
+    assert "from 08:30 to 09:00" in response.json()["detail"]
+
+    friday = await db_session.scalar(
+        select(Schedule.id).where(
+            Schedule.group_id == group.id, Schedule.day_of_week == "friday"
+        )
+    )
+    response = await client.patch(
+        f"/schedules/{friday}/",
+        json={"day_of_week": "monday", "start_time": "08:30", "end_time": "09:30"},
+    )
+    assert response.status_code == 409
+    assert "on monday from 08:30 to 09:00" in response.json()["detail"]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_timetable_conflicts_in_one_pass(
+    client: AsyncClient, db_session, timetable
+):
+    school, group, subject = timetable
+    monday_8 = await db_session.scalar(
+        select(Schedule.id).where(
+            Schedule.group_id == group.id,
+            Schedule.day_of_week == "monday",
+            Schedule.start_time == time(8),
+        )
+    )
+    # Written around the API, as data from before the check would be
+    overlapping = Schedule(
+        group_id=group.id,
+        school_id=school.id,
+        subject_id=subject.id,
+        day_of_week="monday",
+        start_time=time(8, 45),
+        end_time=time(9, 30),
+    )
+    db_session.add(overlapping)
+    await db_session.commit()
+
+    with QueryCounter(table="schedules") as counter:
+        response = await client.get(
+            "/schedules/conflicts/", params={"school_id": school.id}
+        )
+    assert response.status_code == 200
+    assert counter.count == 1
+    assert response.json() == [
+        {
+            "resource": "group",
+            "resource_id": group.id,
+            "day_of_week": "monday",
+            "schedule_ids": [monday_8, overlapping.id],
+            "start_time": "08:45:00",
+            "end_time": "09:00:00",
+        }
+    ]
+
+
+@pytest.mark.anyio(backends=["asyncio"])
+async def test_find_conflicts_matches_pairwise_check():
+    rng = random.Random(7)
+    lessons = [
+        SimpleNamespace(
+            id=i,
+            group_id=rng.randrange(5),
+            teacher_id=rng.choice([None, 1, 2, 3]),
+            day_of_week=rng.choice(["monday", "tuesday"]),
+            start_time=time(start // 60, start % 60),
+            end_time=time((start + 45) // 60, (start + 45) % 60),
+        )
+        for i, start in enumerate(
+            rng.randrange(8 * 60, 15 * 60, 15) for _ in range(200)
+        )
+    ]
+    expected = set()
+    for a in lessons:
+        for b in lessons:
+            if a.id >= b.id or a.day_of_week != b.day_of_week:
+                continue
+            if not (a.start_time < b.end_time and b.start_time < a.end_time):
+                continue
+            if a.group_id == b.group_id:
+                expected.add(("group", a.id, b.id))
+            if a.teacher_id is not None and a.teacher_id == b.teacher_id:
+                expected.add(("teacher", a.id, b.id))
+
+    found = {
+        (conflict["resource"].value, *sorted(conflict["schedule_ids"]))
+        for conflict in find_conflicts(lessons)
+    }
+    assert found == expected
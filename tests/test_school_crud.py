@@ -22,7 +22,8 @@ async def test_create_school(client, db_session):
 
 @pytest.mark.anyio(backends=["asyncio"])
 async def test_read_schools(client, db_session):
-    response = await client.get("/schools/")
+    # Other modules create more schools than fit on one page
+    response = await client.get("/schools/", params={"country": "France"})
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)